@@ -0,0 +1,296 @@
+"""
+Offline benchmark suite for the API hot paths
+Runs in-process against the FastAPI app with stub LLM and embedding
+backends (bench_stubs.py), so no server, network or API key is needed.
+Measures agent initialization, /insurance/predict, /insurance/predict/batch,
+/chat and the session endpoints: throughput and p50/p95/p99 latency.
+
+Results are written as JSON and compared with the baseline file: any
+benchmark whose p95 latency or throughput regresses beyond the tolerance
+(and by more than --min-delta-ms, so sub-millisecond jitter is ignored) is
+flagged and the exit code is 1. A missing baseline, or one recorded with
+different load settings, is an error (exit code 2) rather than a pass.
+
+Usage:
+    python bench_api.py [--requests N] [--concurrency C] [--llm-latency-ms MS]
+                        [--output results.json] [--baseline bench_baseline.json]
+                        [--save-baseline] [--tolerance 0.25] [--min-delta-ms 1.0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "bench_baseline.json")
+
+# Run settings that must match the baseline's for a comparison to mean anything
+LOAD_SETTINGS = ("requests", "concurrency", "llm_latency_ms")
+
+PREDICT_PAYLOAD = {
+    "age": 29,
+    "sex": "male",
+    "bmi": 20.0,
+    "children": 0,
+    "smoker": "no",
+    "region": "southeast"
+}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], wall_seconds: float, errors: int) -> Dict:
+    """Throughput and latency percentiles in milliseconds"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds > 0 else None,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+async def run_load(request: Callable[[int], Awaitable], total: int, concurrency: int, warmup: bool = True) -> Dict:
+    """
+    Issue total requests with at most concurrency in flight; request(i) returns an httpx response
+
+    warmup sends a few untimed requests first; disable it for requests that
+    cannot be repeated, such as deletes.
+    """
+    # Untimed warm-up so first-call costs (imports, connections, caches) are not measured
+    for i in range(min(concurrency, total) if warmup else 0):
+        await request(i)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+# ============================================================================
+# Environment
+# ============================================================================
+
+def prepare_workdir() -> str:
+    """Temp copy of the sample data with caches and the model artifact inside it"""
+    workdir = tempfile.mkdtemp(prefix="bench_api_")
+    shutil.copytree(os.path.join(BASE_DIR, "sample_data"), os.path.join(workdir, "sample_data"))
+    os.environ['INDEX_CACHE_DIR'] = os.path.join(workdir, ".index_cache")
+    os.environ['EMBEDDING_CACHE_PATH'] = os.path.join(workdir, ".embedding_cache", "embeddings.db")
+    os.environ['INSURANCE_MODEL_ARTIFACT'] = os.path.join(workdir, "models", "insurance_model")
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-bench-stub')
+    os.environ.pop('TAVILY_API_KEY', None)
+    # Per-turn trace lines would be timed along with the requests
+    os.environ['CHAT_TRACE_LOG'] = ''
+    return workdir
+
+def install_stubs(main_module, llm_latency_seconds: float):
+    """Swap the OpenAI clients for the offline stubs"""
+    from bench_stubs import HashingEmbeddings, StubChatModel
+    main_module.ChatOpenAI = lambda **kwargs: StubChatModel(latency_seconds=llm_latency_seconds)
+    main_module.OpenAIEmbeddings = lambda **kwargs: HashingEmbeddings()
+
+def write_model_artifact(workdir: str):
+    """Train on synthetic data once so workers load the artifact, as in production"""
+    from bench_insurance_predict import write_synthetic_dataset
+    from train_insurance_model import train_and_save
+
+    data_file = os.path.join(workdir, "health_insurance.csv")
+    write_synthetic_dataset(data_file)
+    train_and_save(data_file, os.environ['INSURANCE_MODEL_ARTIFACT'])
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def bench_agent_init(main_module, warm_runs: int) -> Dict:
+    """Cold build (empty caches) and warm restarts (index cache hits)"""
+    start = time.perf_counter()
+    main_module.initialize_agent()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(warm_runs):
+        start = time.perf_counter()
+        main_module.initialize_agent()
+        warm.append(time.perf_counter() - start)
+
+    return {
+        "agent_init_cold": summarize([cold], cold, 0),
+        "agent_init_warm": summarize(warm, sum(warm), 0),
+    }
+
+async def bench_http(main_module, total: int, concurrency: int) -> Dict:
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=main_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        results["insurance_predict"] = await run_load(
+            lambda i: client.post("/insurance/predict", json=PREDICT_PAYLOAD), total, concurrency
+        )
+        batch = {"records": [PREDICT_PAYLOAD] * 100}
+        results["insurance_predict_batch_100"] = await run_load(
+            lambda i: client.post("/insurance/predict/batch", json=batch), max(total // 10, 1), concurrency
+        )
+
+        chats = max(total // 5, 1)
+        results["chat"] = await run_load(
+            lambda i: client.post("/chat", json={"message": f"How do I file a claim? ({i})", "session_id": f"bench-{i}"}),
+            chats, concurrency
+        )
+        results["session_get"] = await run_load(
+            lambda i: client.get(f"/sessions/bench-{i % chats}"), total, concurrency
+        )
+        results["session_list"] = await run_load(
+            lambda i: client.get("/sessions"), max(total // 10, 1), concurrency
+        )
+        results["session_delete"] = await run_load(
+            lambda i: client.delete(f"/sessions/bench-{i}"), chats, concurrency, warmup=False
+        )
+    return results
+
+# ============================================================================
+# Baseline Comparison
+# ============================================================================
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Regressions: p95 slower or throughput lower than the baseline by more than tolerance
+
+    A change only counts when the latency involved also moved by more than
+    min_delta_ms, since sub-millisecond endpoints jitter by large ratios.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get("p95_ms") and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) \
+                and current["p95_ms"] - previous["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {current['p95_ms']:.3f}ms vs baseline {previous['p95_ms']:.3f}ms")
+        if previous.get("throughput_rps") and current["throughput_rps"] is not None \
+                and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance) \
+                and current["mean_ms"] - previous["mean_ms"] > min_delta_ms:
+            regressions.append(
+                f"{name}: {current['throughput_rps']:.1f} req/s vs baseline {previous['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+def print_report(results: Dict):
+    print("\n" + "=" * 86)
+    print("API BENCHMARK")
+    print("=" * 86)
+    print(f"{'benchmark':<30} {'n':>6} {'err':>4} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        throughput = f"{r['throughput_rps']:.1f}" if r['throughput_rps'] is not None else "-"
+        print(f"{name:<30} {r['requests']:>6} {r['errors']:>4} {throughput:>10} "
+              f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+    print("=" * 86)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the API hot paths")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per prediction/session benchmark")
+    parser.add_argument('--concurrency', type=int, default=20, help="Requests in flight at once")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Simulated latency per stub LLM call")
+    parser.add_argument('--warm-inits', type=int, default=3, help="Warm agent initializations to time")
+    parser.add_argument('--output', default=os.path.join(BASE_DIR, "bench_results.json"), help="Where to write results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Also store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    workdir = prepare_workdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, BASE_DIR)
+    try:
+        write_model_artifact(workdir)
+
+        import main as main_module
+        install_stubs(main_module, args.llm_latency_ms / 1000)
+        main_module.initialize_insurance_model()
+
+        results = bench_agent_init(main_module, args.warm_inits)
+        results.update(asyncio.run(bench_http(main_module, args.requests, args.concurrency)))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "results": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline}, nothing was compared. "
+              f"Run with --save-baseline on the reference code to create one")
+        return 2
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    # Latencies under a different load are not comparable
+    mismatched = [
+        f"{key}={baseline.get('meta', {}).get(key)} (now {report['meta'][key]})"
+        for key in LOAD_SETTINGS
+        if baseline.get("meta", {}).get(key) != report["meta"][key]
+    ]
+    if mismatched:
+        print(f"❌ Baseline {args.baseline} was recorded with {', '.join(mismatched)}; "
+              f"rerun with the same settings or save a new baseline")
+        return 2
+    regressions = compare_to_baseline(results, baseline.get("results", {}), args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%} of baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print(f"✓ No regressions beyond {args.tolerance:.0%} of baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
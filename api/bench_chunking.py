@@ -0,0 +1,127 @@
+"""
+Benchmark for the index chunking strategies
+Builds the sales and process indexes from the sample data with each
+strategy and reports build time, chunk count, embedding volume and
+retrieval hit rate. Uses offline hashing embeddings, so no API key is needed.
+
+Hit rate: a sample of script lines is turned into queries (the middle of
+each line); a query hits when a retrieved chunk contains the whole line.
+
+Usage: python bench_chunking.py [queries]
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from bench_stubs import HashingEmbeddings
+from chunking import create_text_splitter
+from incremental_index import scan_directory
+from ingestion import ingest_files
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Source directories, read the way IncrementalIndex reads them (generated
+# dumps skipped, lines deduplicated, one text per file)
+CORPORA = {
+    "sales": os.path.join(BASE_DIR, "sample_data", "AgentScripts"),
+    "process": os.path.join(BASE_DIR, "sample_data", "AgentProcess"),
+}
+
+STRATEGIES = [
+    {"strategy": "semantic", "breakpoint_threshold_type": "percentile"},
+    {"strategy": "line"},
+    {"strategy": "token", "window_tokens": 128, "overlap_tokens": 32},
+    {"strategy": "token", "window_tokens": 64, "overlap_tokens": 16},
+]
+
+TOP_K = 10
+MIN_QUERY_WORDS = 8
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def make_queries(lines: List[str], count: int, seed: int = 42) -> List[tuple]:
+    """(query, source line) pairs; the query drops the first and last fifth of the line"""
+    candidates = [normalize(line) for line in lines if len(line.split()) >= MIN_QUERY_WORDS]
+    rng = random.Random(seed)
+    sample = rng.sample(candidates, min(count, len(candidates)))
+    queries = []
+    for line in sample:
+        words = line.split()
+        trim = len(words) // 5
+        queries.append((" ".join(words[trim:len(words) - trim]), line))
+    return queries
+
+def describe(config: Dict) -> str:
+    if config["strategy"] == "token":
+        return f"token {config['window_tokens']}/{config['overlap_tokens']}"
+    return config["strategy"]
+
+def load_corpus(directory: str) -> Dict[str, str]:
+    """Deduplicated text per source file, exactly what the index embeds"""
+    contents, _ = ingest_files(directory, scan_directory(directory))
+    return {name: text for name, text in contents.items() if text}
+
+def run_strategy(config: Dict, texts: Dict[str, Dict[str, str]], queries: Dict[str, List[tuple]]) -> Dict:
+    embeddings = HashingEmbeddings()
+    splitter = create_text_splitter(config, embeddings)
+
+    start = time.perf_counter()
+    stores = {}
+    for name, files in texts.items():
+        # Each file is split on its own, as in IncrementalIndex
+        docs = splitter.create_documents(list(files.values()), metadatas=[{"source": source} for source in files])
+        stores[name] = InMemoryVectorStore.from_documents(docs, embeddings)
+    build_seconds = time.perf_counter() - start
+    embedded_texts, embedded_tokens = embeddings.texts, embeddings.tokens
+
+    hits_top1 = hits_topk = total = 0
+    for name, pairs in queries.items():
+        for query, line in pairs:
+            chunks = [normalize(doc.page_content) for doc in stores[name].similarity_search(query, k=TOP_K)]
+            found = [line in chunk for chunk in chunks]
+            hits_top1 += bool(found[:1] and found[0])
+            hits_topk += any(found)
+            total += 1
+
+    return {
+        "name": describe(config),
+        "build_seconds": build_seconds,
+        "chunks": sum(len(store.store) for store in stores.values()),
+        "embedded_texts": embedded_texts,
+        "embedded_tokens": embedded_tokens,
+        "hit_at_1": hits_top1 / total if total else 0.0,
+        "hit_at_k": hits_topk / total if total else 0.0,
+    }
+
+def main(query_count: int = 100):
+    texts = {}
+    queries = {}
+    for name, directory in CORPORA.items():
+        texts[name] = load_corpus(directory)
+        if not texts[name]:
+            print(f"❌ No sample data found in {directory}")
+            return 1
+        lines = [line for text in texts[name].values() for line in text.splitlines()]
+        queries[name] = make_queries(lines, query_count // len(CORPORA))
+
+    results = [run_strategy(config, texts, queries) for config in STRATEGIES]
+
+    print("\n" + "=" * 84)
+    print("CHUNKING STRATEGY BENCHMARK")
+    print("=" * 84)
+    print(f"{'strategy':<16} {'build':>9} {'chunks':>7} {'embedded':>9} {'~tokens':>8} {'hit@1':>7} {f'hit@{TOP_K}':>7}")
+    for r in results:
+        print(f"{r['name']:<16} {r['build_seconds'] * 1000:>7.1f}ms {r['chunks']:>7} {r['embedded_texts']:>9} "
+              f"{r['embedded_tokens']:>8} {r['hit_at_1']:>7.1%} {r['hit_at_k']:>7.1%}")
+    print("=" * 84)
+    print(f"{sum(len(q) for q in queries.values())} queries; 'embedded' counts every text sent to the embedding API,")
+    print("including the per-sentence embeddings the semantic chunker needs to place boundaries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
@@ -0,0 +1,110 @@
+"""
+Microbenchmark for the insurance prediction hot path
+Compares the original StandardScaler + statsmodels path with the folded
+LinearInsurancePredictor and checks that both produce the same charges
+
+Usage: python bench_insurance_predict.py [iterations]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from insurance_predictor import REGION_MAPPING
+from train_insurance_model import fit_insurance_model
+
+SAMPLE_CASES = [
+    (29, "male", 20.0, 0, "no", "southeast"),
+    (45, "female", 32.5, 2, "yes", "northwest"),
+    (60, "male", 25.0, 3, "no", "southwest"),
+    (25, "female", 28.0, 1, "yes", "northeast"),
+]
+
+def write_synthetic_dataset(path: str, rows: int = 1338):
+    """Write a synthetic dataset shaped like health_insurance.csv"""
+    rng = np.random.default_rng(42)
+    regions = list(REGION_MAPPING.keys())
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("age,sex,bmi,children,smoker,region,charges\n")
+        for _ in range(rows):
+            age = int(rng.integers(18, 65))
+            sex = rng.choice(["male", "female"])
+            bmi = round(float(rng.normal(30, 6)), 2)
+            children = int(rng.integers(0, 5))
+            smoker = rng.choice(["yes", "no"], p=[0.2, 0.8])
+            region = rng.choice(regions)
+            charges = 250 * age + 300 * bmi + 500 * children + (23000 if smoker == "yes" else 0)
+            charges += float(rng.normal(0, 4000))
+            f.write(f"{age},{sex},{bmi},{children},{smoker},{region},{charges:.2f}\n")
+
+def make_legacy_predict(model, scaler):
+    """The original request path: scaler.transform + np.insert + OLSResults.predict"""
+    def legacy_predict(age, sex, bmi, children, smoker, region) -> float:
+        features = np.array([[
+            age,
+            1 if sex.lower() == "male" else 0,
+            bmi,
+            children,
+            1 if smoker.lower() == "yes" else 0,
+            REGION_MAPPING[region.lower()]
+        ]])
+        scaled_features = scaler.transform(features)
+        scaled_features_with_const = np.insert(scaled_features[0], 0, 1)
+        return float(model.predict(scaled_features_with_const)[0])
+    return legacy_predict
+
+def time_per_call(func, iterations: int) -> float:
+    """Average seconds per call over all sample cases"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for case in SAMPLE_CASES:
+            func(*case)
+    return (time.perf_counter() - start) / (iterations * len(SAMPLE_CASES))
+
+def main(iterations: int = 2000):
+    data_file = os.getenv('HEALTH_INSURANCE_DATA', '')
+    if not os.path.exists(data_file):
+        data_file = os.path.join(tempfile.mkdtemp(), "health_insurance.csv")
+        write_synthetic_dataset(data_file)
+        print(f"HEALTH_INSURANCE_DATA not found - using synthetic data at {data_file}")
+
+    predictor, model, scaler, _ = fit_insurance_model(data_file)
+    legacy_predict = make_legacy_predict(model, scaler)
+
+    # Correctness: every path must agree with the original statsmodels output
+    max_diff = 0.0
+    for case in SAMPLE_CASES:
+        expected = legacy_predict(*case)
+        max_diff = max(max_diff, abs(predictor.predict_one(*case) - expected))
+
+    batch = np.array([
+        [age, 1 if sex == "male" else 0, bmi, children, 1 if smoker == "yes" else 0, REGION_MAPPING[region]]
+        for age, sex, bmi, children, smoker, region in SAMPLE_CASES
+    ], dtype=float)
+    expected_batch = np.array([legacy_predict(*case) for case in SAMPLE_CASES])
+    max_diff = max(max_diff, float(np.max(np.abs(predictor.predict(batch) - expected_batch))))
+
+    legacy = time_per_call(legacy_predict, iterations // 10 or 1)
+    folded = time_per_call(predictor.predict_one, iterations)
+
+    print("\n" + "=" * 60)
+    print("INSURANCE PREDICTION MICROBENCHMARK")
+    print("=" * 60)
+    print(f"{'statsmodels + StandardScaler':.<40} {legacy * 1e6:10.2f} µs/call")
+    print(f"{'folded predictor (pure Python)':.<40} {folded * 1e6:10.2f} µs/call")
+    print(f"{'speedup':.<40} {legacy / folded:10.1f}x")
+    print(f"{'max |difference|':.<40} {max_diff:10.2e}")
+    print("=" * 60)
+
+    if max_diff > 1e-6:
+        print("❌ Outputs do not match")
+        return 1
+
+    print("✓ Outputs match")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
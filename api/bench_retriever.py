@@ -0,0 +1,80 @@
+"""
+Benchmark for the retriever tools: vector vs hybrid (BM25 + vector) vs lexical
+Indexes the sample process and sales data (line chunks) with offline hashing
+embeddings that simulate the query-embedding round trip, then reports
+per-query latency, how many queries needed an embedding, and hit rate.
+
+Usage: python bench_retriever.py [embedding latency ms]
+"""
+
+import statistics
+import sys
+import time
+
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from bench_chunking import CORPORA, load_corpus, make_queries, normalize
+from bench_stubs import HashingEmbeddings
+from chunking import LineTextSplitter
+from hybrid_retriever import HybridRetriever
+
+# Short questions in the exact insurance vocabulary most customers use
+VOCABULARY_QUERIES = [
+    "deductible", "premium", "claim", "file a claim", "claim documents",
+    "policy renewal", "coverage limit", "beneficiary", "copay", "premium payment",
+]
+
+MODES = [("vector", 0.6), ("hybrid", 0.6), ("hybrid", 1.1), ("lexical", 0.6)]
+
+def main(latency_ms: float = 100.0):
+    embeddings = HashingEmbeddings(latency_seconds=latency_ms / 1000)
+    splitter = LineTextSplitter()
+
+    stores = {}
+    queries = []
+    for name, directory in CORPORA.items():
+        # The source files, read and deduplicated as the indexes read them
+        files = load_corpus(directory)
+        if not files:
+            print(f"❌ No sample data found in {directory}")
+            return 1
+        embeddings.latency_seconds = 0.0
+        documents = splitter.create_documents(list(files.values()), metadatas=[{"source": source} for source in files])
+        stores[name] = InMemoryVectorStore.from_documents(documents, embeddings)
+        lines = [line for text in files.values() for line in text.splitlines()]
+        queries += [(name, query, line) for query, line in make_queries(lines, 25)]
+        queries += [(name, query, None) for query in VOCABULARY_QUERIES]
+    embeddings.latency_seconds = latency_ms / 1000
+
+    print("\n" + "=" * 78)
+    print(f"RETRIEVER BENCHMARK ({len(queries)} queries, simulated embedding latency {latency_ms:.0f}ms)")
+    print("=" * 78)
+    print(f"{'mode':<22} {'p50':>9} {'mean':>9} {'embeddings':>11} {'skipped':>8} {'hit@10':>8}")
+
+    for mode, threshold in MODES:
+        retrievers = {
+            name: HybridRetriever.from_vectorstore(store, k=10, mode=mode, fast_threshold=threshold)
+            for name, store in stores.items()
+        }
+        embeddings.reset_counts()
+        latencies = []
+        hits = total = 0
+        for name, query, line in queries:
+            start = time.perf_counter()
+            docs = retrievers[name].invoke(query)
+            latencies.append(time.perf_counter() - start)
+            if line is not None:
+                total += 1
+                hits += any(line in normalize(doc.page_content) for doc in docs)
+
+        label = mode if mode != "hybrid" else f"hybrid (fast >= {threshold})"
+        skipped = 1 - embeddings.calls / len(queries)
+        print(f"{label:<22} {statistics.median(latencies) * 1000:>7.1f}ms {statistics.mean(latencies) * 1000:>7.1f}ms "
+              f"{embeddings.calls:>11} {skipped:>8.0%} {hits / total:>8.1%}")
+
+    print("=" * 78)
+    print("hybrid (fast >= 1.1) never takes the lexical fast path: BM25 + vector fused on every query")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else 100.0))
@@ -0,0 +1,118 @@
+"""
+Offline stand-ins for the OpenAI chat and embedding APIs used by the benchmarks
+Deterministic, so results can be compared between runs without a network
+connection or an API key
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, FunctionMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+class HashingEmbeddings(Embeddings):
+    """
+    Bag-of-words embeddings via the hashing trick
+
+    Texts that share words get similar vectors, which is enough for
+    retrieval benchmarks. Counts calls, texts and approximate tokens so
+    benchmarks can report what the same run would cost against the API;
+    latency_seconds adds a simulated round trip to every call.
+    """
+
+    def __init__(self, size: int = 256, model: str = "hashing-bow", latency_seconds: float = 0.0):
+        self.size = size
+        self.model = model
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.texts = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            vector[zlib.crc32(token.encode('utf-8')) % self.size] += 1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def _count(self, texts: List[str]):
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+            # Same estimate as langchain's count_tokens_approximately
+            self.tokens += sum(len(text) for text in texts) // 4
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls = self.texts = self.tokens = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._count(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._count([text])
+        return self._embed(text)
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that plays one agent turn without calling OpenAI
+
+    The first call of a turn asks for the Agent_Process tool with the user's
+    message; once a tool result is in the prompt it answers. The reply is
+    decided from the messages alone, so concurrent requests do not interfere.
+    latency_seconds simulates the completion round trip.
+    """
+
+    latency_seconds: float = 0.0
+    tool_name: str = "Agent_Process"
+    answer: str = "Hello there, I am Agent Easy from LivEasy. Happy to help with your insurance."
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        if isinstance(messages[-1], (FunctionMessage, ToolMessage)):
+            message = AIMessage(content=self.answer)
+        else:
+            question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+            message = AIMessage(content="", additional_kwargs={
+                "function_call": {"name": self.tool_name, "arguments": json.dumps({"query": question})}
+            })
+        output_tokens = max(len(message.content) // 4, 1)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
@@ -0,0 +1,204 @@
+"""
+Local calculator for the agent's Calculator tool
+Evaluates arithmetic expressions in-process through a whitelisted AST walk,
+and only hands natural-language questions to LLMMathChain, which costs an
+extra LLM completion per call
+"""
+
+import ast
+import math
+import operator
+import re
+import threading
+from typing import Dict, Optional, Union
+
+Number = Union[int, float]
+
+class ExpressionError(ValueError):
+    """Input is not an arithmetic expression the local evaluator accepts"""
+
+class EvaluationError(ExpressionError):
+    """A valid expression whose value cannot be computed (division by zero, overflow)"""
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Same function names as numexpr, plus the rounding helpers people expect
+FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "floor": math.floor,
+    "ceil": math.ceil,
+}
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+}
+
+# Guards against inputs like 9**9**9 that would tie up the worker
+MAX_EXPONENT = 1000
+MAX_MAGNITUDE = 1e100
+MAX_LENGTH = 500
+
+# Worded percentages common in quotes: "10% of 1200", "10% off 1200"
+NUMBER = r"(\d+(?:\.\d+)?)"
+PERCENT_OF_PATTERN = re.compile(NUMBER + r"\s*%\s+of\s+" + NUMBER, re.IGNORECASE)
+PERCENT_OFF_PATTERN = re.compile(NUMBER + r"\s*%\s+off\s+" + NUMBER, re.IGNORECASE)
+# "10%" (a percentage) but not "10 % 3" (modulo): the % is not followed by an operand
+PERCENT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*%(?!\s*[\d.(])")
+# Thousands separators inside numbers: 1,200.50 -> 1200.50
+THOUSANDS_PATTERN = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+def normalize_expression(text: str) -> str:
+    """Strip currency signs and thousands separators, and rewrite percentages and ^"""
+    expression = text.strip().strip("`").strip()
+    expression = expression.replace("$", "").replace("×", "*").replace("÷", "/").replace("^", "**")
+    expression = THOUSANDS_PATTERN.sub("", expression)
+    expression = PERCENT_OFF_PATTERN.sub(r"(\2*(1-\1/100))", expression)
+    expression = PERCENT_OF_PATTERN.sub(r"(\1/100*\2)", expression)
+    return PERCENT_PATTERN.sub(r"(\1/100)", expression)
+
+def _check_magnitude(value: Number) -> Number:
+    if isinstance(value, complex):
+        # A negative base with a fractional exponent, e.g. (-8)**0.5
+        raise EvaluationError("Result is not a real number")
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        raise EvaluationError("Result is not a finite number")
+    if abs(value) > MAX_MAGNITUDE:
+        raise EvaluationError("Result is too large")
+    return value
+
+def _evaluate(node: ast.AST) -> Number:
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left = _evaluate(node.left)
+        right = _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise EvaluationError("Exponent is too large")
+        try:
+            return _check_magnitude(BINARY_OPERATORS[type(node.op)](left, right))
+        except (ZeroDivisionError, OverflowError) as e:
+            raise EvaluationError(str(e))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in FUNCTIONS and not node.keywords):
+        args = [_evaluate(arg) for arg in node.args]
+        try:
+            return _check_magnitude(FUNCTIONS[node.func.id](*args))
+        except (TypeError, ValueError, OverflowError) as e:
+            raise EvaluationError(f"{node.func.id}: {e}")
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+def evaluate_expression(text: str) -> Number:
+    """
+    Evaluate an arithmetic expression without eval()
+
+    Only numbers, + - * / // % **, parentheses, pi/e and the functions in
+    FUNCTIONS are accepted. Raises ExpressionError for anything else,
+    including natural language, and EvaluationError when a valid
+    expression has no finite value.
+    """
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError("Expression is too long")
+    expression = normalize_expression(text)
+    if not expression:
+        raise ExpressionError("Empty expression")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Not an expression: {e.msg}")
+    return _evaluate(tree)
+
+def format_result(value: Number) -> str:
+    """Format like LLMMathChain ("Answer: ..."), without float noise such as 0.30000000000000004"""
+    if isinstance(value, float):
+        value = round(value, 10)
+    return f"Answer: {value}"
+
+class LocalCalculator:
+    """
+    Calculator tool that evaluates expressions locally
+
+    Inputs the evaluator rejects go to the fallback chain (LLMMathChain),
+    which can translate a worded question into an expression.
+    """
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.local = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def _count(self, local: bool):
+        with self._lock:
+            if local:
+                self.local += 1
+            else:
+                self.fallbacks += 1
+
+    def _try_local(self, query: str) -> Optional[str]:
+        try:
+            result = format_result(evaluate_expression(query))
+        except EvaluationError as e:
+            # The LLM cannot do better with 1/0; answer without a round trip
+            result = f"Error: {e}"
+        except ExpressionError:
+            return None
+        self._count(local=True)
+        return result
+
+    def _no_fallback(self, query: str) -> str:
+        return f"Could not evaluate '{query}'. Please provide a math expression such as 1200 * (1 - 10%)."
+
+    def run(self, query: str) -> str:
+        result = self._try_local(query)
+        if result is not None:
+            return result
+        self._count(local=False)
+        if self.fallback is None:
+            return self._no_fallback(query)
+        return self.fallback.run(query)
+
+    async def arun(self, query: str) -> str:
+        result = self._try_local(query)
+        if result is not None:
+            return result
+        self._count(local=False)
+        if self.fallback is None:
+            return self._no_fallback(query)
+        return await self.fallback.arun(query)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"local": self.local, "fallback": self.fallbacks}
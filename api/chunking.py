@@ -0,0 +1,78 @@
+"""
+Chunking strategies for the sales and process vector indexes
+semantic embeds every sentence to find topic breaks, which roughly doubles
+embedding cost at build time; line and token are deterministic and free
+"""
+
+import os
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+from langchain_experimental.text_splitter import SemanticChunker
+from langchain_text_splitters import TextSplitter
+
+CHUNKING_STRATEGIES = ("semantic", "line", "token")
+
+class LineTextSplitter(TextSplitter):
+    """One chunk per non-empty line, i.e. per script line or dialogue turn"""
+
+    def split_text(self, text: str) -> List[str]:
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+class TokenWindowTextSplitter(TextSplitter):
+    """
+    Fixed-size windows of whitespace-separated words
+
+    A "token" here is a word as split by str.split(), not a tokenizer (BPE)
+    token; English text runs about 1.3 tokenizer tokens per word, so a
+    128-word window is roughly 170 model tokens. The name is kept because it
+    is part of the CHUNKING_STRATEGY / CHUNK_*_TOKENS settings and of the
+    index cache key. Consecutive windows share overlap_tokens words, so a
+    sentence cut at a window edge still appears whole in one of the two chunks.
+    """
+
+    def __init__(self, window_tokens: int = 128, overlap_tokens: int = 32, **kwargs):
+        if window_tokens <= 0 or not 0 <= overlap_tokens < window_tokens:
+            raise ValueError("Token windows need window_tokens > 0 and 0 <= overlap_tokens < window_tokens")
+        super().__init__(chunk_size=window_tokens, chunk_overlap=overlap_tokens, **kwargs)
+        self.window_tokens = window_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def split_text(self, text: str) -> List[str]:
+        tokens = text.split()
+        if not tokens:
+            return []
+        step = self.window_tokens - self.overlap_tokens
+        # Stop once the remaining tokens are already covered by the previous window's overlap
+        last_start = max(len(tokens) - self.overlap_tokens, 1)
+        return [" ".join(tokens[start:start + self.window_tokens]) for start in range(0, last_start, step)]
+
+def get_chunking_config() -> Dict:
+    """
+    Chunking settings from the environment
+
+    Only the settings that affect the chosen strategy are included, so the
+    dict can go straight into the index cache key.
+    """
+    strategy = os.getenv('CHUNKING_STRATEGY', 'semantic').strip().lower()
+    if strategy not in CHUNKING_STRATEGIES:
+        raise ValueError(f"Unknown CHUNKING_STRATEGY '{strategy}'. Must be one of: {list(CHUNKING_STRATEGIES)}")
+
+    config = {"strategy": strategy}
+    if strategy == "semantic":
+        config["breakpoint_threshold_type"] = os.getenv('SEMANTIC_BREAKPOINT_TYPE', 'percentile')
+    elif strategy == "token":
+        config["window_tokens"] = int(os.getenv('CHUNK_WINDOW_TOKENS', '128'))
+        config["overlap_tokens"] = int(os.getenv('CHUNK_OVERLAP_TOKENS', '32'))
+    return config
+
+def create_text_splitter(config: Dict, embeddings: Embeddings) -> TextSplitter:
+    """Build the splitter for a chunking config"""
+    strategy = config["strategy"]
+    if strategy == "semantic":
+        return SemanticChunker(embeddings, breakpoint_threshold_type=config["breakpoint_threshold_type"])
+    if strategy == "line":
+        return LineTextSplitter()
+    if strategy == "token":
+        return TokenWindowTextSplitter(config["window_tokens"], config["overlap_tokens"])
+    raise ValueError(f"Unknown chunking strategy '{strategy}'. Must be one of: {list(CHUNKING_STRATEGIES)}")
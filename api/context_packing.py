@@ -0,0 +1,181 @@
+"""
+Token-budgeted packing of retrieved chunks before they reach the agent
+Drops chunks far less relevant than the best one, collapses duplicate and
+overlapping chunks (token windows share their edges) and keeps the most
+relevant passages that fit the token budget, so a retriever tool call adds
+only the context it needs to the agent scratchpad.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ingestion import shingle_hashes
+
+# Token budget for the packed output of one retriever call
+DEFAULT_TOKEN_BUDGET = 1000
+
+# Chunks whose relevance is below this fraction of the best chunk's are dropped
+DEFAULT_MIN_RELEVANCE = 0.5
+
+# A chunk sharing this fraction of its word shingles with a packed passage
+# adds nothing and is dropped
+DUPLICATE_CONTAINMENT = 0.8
+
+# Chunks of the same source whose edges share at least this many words are
+# merged into one passage (e.g. neighbouring token windows)
+MIN_MERGE_WORDS = 8
+
+# Name of the callback event carrying the stats of one packing call
+CONTEXT_PACKED_EVENT = "context_packed"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+def tiktoken_counter(model: Optional[str] = None) -> Callable[[str], int]:
+    """Exact token counter for the chat model, or estimate_tokens if tiktoken is unavailable"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            # Unknown model name: the encoding shared by the GPT-3.5/4 family
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its encodings on first use, which fails offline
+        print(f"⚠️  tiktoken unavailable ({type(e).__name__}); estimating context tokens from length")
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+def _edge_overlap(first: List[str], second: List[str]) -> int:
+    """Number of words the end of first shares with the start of second"""
+    for size in range(min(len(first), len(second)) - 1, MIN_MERGE_WORDS - 1, -1):
+        if first[-size:] == second[:size]:
+            return size
+    return 0
+
+class _Passage:
+    """One packed passage: a chunk, possibly extended by overlapping chunks"""
+
+    def __init__(self, document: Document, relevance: Optional[float]):
+        self.document = document
+        # Original text (line breaks included) until another chunk is merged in
+        self.text = document.page_content
+        self.words = self.text.split()
+        self.relevance = relevance
+        self.shingles = shingle_hashes(document.page_content)
+
+    @property
+    def source(self):
+        return self.document.metadata.get("source")
+
+    def contains(self, words: List[str], shingles: Optional[frozenset]) -> bool:
+        if shingles is None or self.shingles is None:
+            return " ".join(words).casefold() in " ".join(self.words).casefold()
+        return len(shingles & self.shingles) / len(shingles) >= DUPLICATE_CONTAINMENT
+
+    def merge(self, words: List[str], relevance: Optional[float]) -> bool:
+        """Join a chunk that overlaps this passage's start or end; False if it does not"""
+        overlap = _edge_overlap(self.words, words)
+        if overlap:
+            self.text = self.text.rstrip() + " " + " ".join(words[overlap:])
+            self.words = self.words + words[overlap:]
+        else:
+            overlap = _edge_overlap(words, self.words)
+            if not overlap:
+                return False
+            self.text = " ".join(words[:-overlap]) + " " + self.text.lstrip()
+            self.words = words + self.words[overlap:]
+        if relevance is not None and (self.relevance is None or relevance > self.relevance):
+            self.relevance = relevance
+        self.shingles = shingle_hashes(self.text)
+        return True
+
+    def to_document(self, text: str) -> Document:
+        metadata = dict(self.document.metadata)
+        if self.relevance is not None:
+            metadata["relevance"] = self.relevance
+        return Document(id=self.document.id, page_content=text, metadata=metadata)
+
+class ContextPacker:
+    """
+    Packs a ranked list of retrieved chunks into a token budget
+
+    Chunks keep the retriever's order. Relevance is read from
+    metadata["relevance"] (set by HybridRetriever); chunks without one are
+    never cut for relevance. The first passage is always returned, truncated
+    if it alone exceeds the budget.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, min_relevance: float = DEFAULT_MIN_RELEVANCE,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        if token_budget <= 0:
+            raise ValueError("token_budget must be positive")
+        self.token_budget = token_budget
+        self.min_relevance = min_relevance
+        self.count_tokens = count_tokens
+
+    def _collapse(self, documents: List[Document], stats: Dict) -> List[_Passage]:
+        scores = [doc.metadata.get("relevance") for doc in documents]
+        best = max((score for score in scores if score is not None), default=None)
+        cutoff = best * self.min_relevance if best is not None and best > 0 else None
+
+        passages: List[_Passage] = []
+        for doc, relevance in zip(documents, scores):
+            if cutoff is not None and relevance is not None and relevance < cutoff:
+                stats["below_cutoff"] += 1
+                continue
+            words = doc.page_content.split()
+            if not words:
+                stats["duplicates"] += 1
+                continue
+            shingles = shingle_hashes(doc.page_content)
+            if any(passage.contains(words, shingles) for passage in passages):
+                stats["duplicates"] += 1
+                continue
+            source = doc.metadata.get("source")
+            for passage in passages:
+                if passage.source == source and passage.merge(words, relevance):
+                    stats["merged"] += 1
+                    break
+            else:
+                passages.append(_Passage(doc, relevance))
+        return passages
+
+    def pack(self, documents: List[Document]) -> Tuple[List[Document], Dict]:
+        """Return the packed documents and what packing removed"""
+        stats = {
+            "retrieved_chunks": len(documents),
+            "packed_chunks": 0,
+            "below_cutoff": 0,
+            "duplicates": 0,
+            "merged": 0,
+            "over_budget": 0,
+            "retrieved_tokens": sum(self.count_tokens(doc.page_content) for doc in documents),
+            "packed_tokens": 0,
+        }
+
+        packed: List[Document] = []
+        used = 0
+        for passage in self._collapse(documents, stats):
+            text = passage.text
+            tokens = self.count_tokens(text)
+            if used + tokens > self.token_budget:
+                if packed:
+                    # A shorter passage further down may still fit
+                    stats["over_budget"] += 1
+                    continue
+                # Never return nothing: cut the best passage down to the budget
+                words = passage.words
+                while tokens > self.token_budget and len(words) > 1:
+                    words = words[:max(1, min(len(words) - 1, len(words) * self.token_budget // tokens))]
+                    text = " ".join(words)
+                    tokens = self.count_tokens(text)
+            packed.append(passage.to_document(text))
+            used += tokens
+
+        stats["packed_chunks"] = len(packed)
+        stats["packed_tokens"] = used
+        stats["tokens_saved"] = max(stats["retrieved_tokens"] - used, 0)
+        return packed, stats
@@ -0,0 +1,201 @@
+"""
+Content-addressed embedding cache
+Wraps an Embeddings backend so the same text is never sent to the API twice,
+across processes and restarts. Vectors are stored as float32 blobs in SQLite,
+keyed by a hash of the model name and the text. Beyond max_rows entries the
+least recently used are pruned, so one-off chat queries cannot grow the file
+without bound. The async methods run all database work in the executor.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH = 500
+
+# ~600 MB of 1536-dimension vectors
+DEFAULT_MAX_ROWS = 100000
+
+# The row count is checked (and the cache pruned back to max_rows) once this
+# fraction of max_rows has been inserted, not on every save
+PRUNE_FRACTION = 0.05
+
+# Hits are remembered in memory and their last_used times written in one
+# statement once this many are pending, or with the next save
+TOUCH_BATCH = 256
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an on-disk cache"""
+
+    def __init__(self, underlying: Embeddings, db_path: str, model: Optional[str] = None,
+                 max_rows: int = DEFAULT_MAX_ROWS, clock: Callable[[], float] = time.time,
+                 prune_margin: Optional[int] = None):
+        self.underlying = underlying
+        self.db_path = db_path
+        self.model = model or getattr(underlying, 'model', type(underlying).__name__)
+        self.max_rows = max_rows
+        self.clock = clock
+        # The cache may hold up to about max_rows + prune_margin rows between prunes
+        self.prune_margin = prune_margin if prune_margin is not None else max(1, int(max_rows * PRUNE_FRACTION))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # key -> last use, not yet written; inserts since the last row count
+        self._pending_touches: Dict[bytes, float] = {}
+        self._unchecked_rows = 0
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(embeddings)")]
+        if "last_used" not in columns:
+            # Caches written before pruning existed start out equally old
+            conn.execute("ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, kind: str, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\0{kind}\0{text}".encode('utf-8')).digest()
+
+    def _load(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Cached vectors for the keys; hits are queued as recently used when the cache is capped"""
+        found = {}
+        conn = self._connection()
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            batch = unique[start:start + LOOKUP_BATCH]
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        if found and self.max_rows > 0:
+            now = self.clock()
+            with self._write_lock:
+                self._pending_touches.update(dict.fromkeys(found, now))
+                flush = len(self._pending_touches) >= TOUCH_BATCH
+            if flush:
+                with conn:
+                    self._flush_touches(conn)
+        return found
+
+    def _flush_touches(self, conn: sqlite3.Connection):
+        """Write the queued last_used times (inside a transaction)"""
+        with self._write_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+        if touches:
+            conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                             [(used, key) for key, used in touches.items()])
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Delete the least recently used rows beyond max_rows (inside a transaction)"""
+        deleted = conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        ).rowcount
+        if deleted:
+            with self._stats_lock:
+                self.evictions += deleted
+
+    def _save(self, items: Dict[bytes, List[float]]) -> Dict[bytes, List[float]]:
+        """Store fresh vectors; returns them at the stored float32 precision"""
+        arrays = {key: np.asarray(vector, dtype=np.float32) for key, vector in items.items()}
+        now = self.clock()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array.tobytes(), now) for key, array in arrays.items()]
+            )
+            if self.max_rows > 0:
+                self._flush_touches(conn)
+                with self._write_lock:
+                    self._unchecked_rows += len(arrays)
+                    check = self._unchecked_rows >= self.prune_margin
+                    if check:
+                        self._unchecked_rows = 0
+                if check and conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] > self.max_rows:
+                    self._prune(conn)
+        # Same values whether a vector came from the API or the cache
+        return {key: array.tolist() for key, array in arrays.items()}
+
+    def _count(self, hits: int, misses: int):
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _split(self, kind: str, texts: List[str]):
+        """Return keys, cached vectors, and the distinct texts still to embed"""
+        keys = [self._key(kind, text) for text in texts]
+        cached = self._load(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self._count(len(texts) - sum(1 for key in keys if key in missing), len(missing))
+        return keys, cached, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split("document", texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            cached.update(self._save(dict(zip(missing.keys(), vectors))))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, missing = self._split("query", [text])
+        if missing:
+            vector = self.underlying.embed_query(text)
+            return self._save({keys[0]: vector})[keys[0]]
+        return cached[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite calls block (up to the 30 s lock timeout); keep them off the event loop
+        keys, cached, missing = await asyncio.to_thread(self._split, "document", texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            cached.update(await asyncio.to_thread(self._save, dict(zip(missing.keys(), vectors))))
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, cached, missing = await asyncio.to_thread(self._split, "query", [text])
+        if missing:
+            vector = await self.underlying.aembed_query(text)
+            return (await asyncio.to_thread(self._save, {keys[0]: vector}))[keys[0]]
+        return cached[keys[0]]
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "entries": self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0],
+                "max_rows": self.max_rows,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,128 @@
+"""
+History window for the agent prompt
+Limits how much of a session's chat history is sent to the LLM each turn
+(last N turns and/or last T tokens), optionally replacing older turns with
+a rolling summary that is refreshed in the background
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, get_buffer_string
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import RunnableConfig
+
+SUMMARY_PROMPT = (
+    "Progressively summarize the conversation between a customer and Agent Easy, "
+    "an insurance sales agent. Keep names, stated facts about the customer "
+    "(age, family, health, budget), products discussed and any promises made. "
+    "Reply with the updated summary only.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New lines of conversation:\n{new_lines}"
+)
+
+class HistoryWindow:
+    """
+    Selects the chat history the agent sees on each turn
+
+    The cut always lands on a turn boundary (a human message), so the
+    window never starts with an orphaned AI reply. The full history stays
+    in the session store; only the prompt is trimmed.
+    """
+
+    def __init__(self, max_turns: int = 0, max_tokens: int = 0,
+                 summarize_llm: Optional[BaseChatModel] = None,
+                 executor: Optional[Executor] = None,
+                 max_summaries: int = 10000):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarize_llm = summarize_llm
+        self.executor = executor
+        self.max_summaries = max_summaries
+
+        # session_id -> (number of leading messages covered, summary text)
+        self._summaries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _cut_index(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message inside the window"""
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        cut = 0
+
+        if self.max_turns > 0 and len(turn_starts) > self.max_turns:
+            cut = turn_starts[-self.max_turns]
+
+        if self.max_tokens > 0:
+            # Drop whole turns from the front until the window fits the budget
+            candidates = [start for start in turn_starts if start >= cut] + [len(messages)]
+            for start in candidates:
+                cut = start
+                if count_tokens_approximately(messages[start:]) <= self.max_tokens:
+                    break
+
+        return cut
+
+    def select(self, inputs: Dict, config: RunnableConfig) -> List[BaseMessage]:
+        """Return the windowed history for the current turn"""
+        messages = list(inputs.get("chat_history") or [])
+        cut = self._cut_index(messages)
+        if cut == 0:
+            return messages
+
+        window = messages[cut:]
+        if self.summarize_llm is None:
+            return window
+
+        session_id = (config.get("configurable") or {}).get("session_id", "default")
+        with self._lock:
+            covered, summary = self._summaries.get(session_id, (0, ""))
+            if covered > cut:
+                # History was cleared and rebuilt under the same session id
+                covered, summary = 0, ""
+                self._summaries.pop(session_id, None)
+
+        if covered < cut:
+            self._schedule_summary(session_id, messages[:cut], covered, summary)
+
+        if summary:
+            return [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + window
+        return window
+
+    def _schedule_summary(self, session_id: str, dropped: List[BaseMessage], covered: int, summary: str):
+        """Fold newly dropped messages into the session summary, off the request path"""
+        with self._lock:
+            if session_id in self._pending:
+                return
+            self._pending.add(session_id)
+
+        def summarize():
+            try:
+                prompt = SUMMARY_PROMPT.format(
+                    summary=summary or "(none)",
+                    new_lines=get_buffer_string(dropped[covered:])
+                )
+                new_summary = self.summarize_llm.invoke(prompt).content
+                with self._lock:
+                    self._summaries[session_id] = (len(dropped), new_summary)
+                    self._summaries.move_to_end(session_id)
+                    while len(self._summaries) > self.max_summaries:
+                        self._summaries.popitem(last=False)
+            except Exception as e:
+                print(f"⚠️  Warning: Could not summarize history for session {session_id}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(session_id)
+
+        if self.executor is not None:
+            self.executor.submit(summarize)
+        else:
+            threading.Thread(target=summarize, daemon=True).start()
+
+    def forget(self, session_id: str):
+        """Drop the stored summary for a deleted session"""
+        with self._lock:
+            self._summaries.pop(session_id, None)
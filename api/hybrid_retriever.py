@@ -0,0 +1,272 @@
+"""
+Hybrid lexical + vector retrieval for the agent's retriever tools
+An in-process BM25 index over the same chunks as the vector store, fused
+with the vector results by reciprocal rank. Queries the lexical index can
+answer confidently skip the remote query embedding entirely. Results carry
+a relevance score and can be packed into a token budget before they are
+returned (see context_packing.py).
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import InMemoryVectorStore
+from pydantic import ConfigDict, PrivateAttr
+
+from context_packing import CONTEXT_PACKED_EVENT, ContextPacker
+
+RETRIEVER_MODES = ("hybrid", "vector", "lexical")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do does for from have how i if in is it me my
+of on or our so that the their this to was what when where which who why will with
+you your
+""".split())
+
+# Reciprocal rank fusion constant; 60 is the usual choice
+RRF_K = 60
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural 's' folded"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, with an inverted index of numpy postings"""
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for i, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[i] = counts.get(i, 0) + 1
+
+        n = len(documents)
+        avg_length = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        # Per-document length normalization, precomputed once
+        self._norm = k1 * (1 - b + b * lengths / avg_length)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for token, counts in postings.items():
+            doc_ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = float(np.log(1 + (n - len(counts) + 0.5) / (len(counts) + 0.5)))
+            self._postings[token] = (doc_ids, tf, idf)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: InMemoryVectorStore, **kwargs) -> "BM25Index":
+        """Index the chunks already stored in an in-memory vector store"""
+        documents = [
+            Document(id=entry["id"], page_content=entry["text"], metadata=entry.get("metadata") or {})
+            for entry in vectorstore.store.values()
+        ]
+        return cls(documents, **kwargs)
+
+    def search(self, query: str, k: int) -> Tuple[List[Tuple[Document, float]], float]:
+        """
+        Top-k documents with relevance scores, plus a confidence in [0, 1]
+
+        Relevance is a document's BM25 score relative to that of an
+        average-length chunk containing every query term once (capped at 1).
+        Confidence is the top relevance, or 0 when any query term is missing
+        from the corpus.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.documents:
+            return [], 0.0
+
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        reference_score = 0.0
+        all_present = True
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                all_present = False
+                continue
+            doc_ids, tf, idf = posting
+            scores[doc_ids] += idf * tf * (self.k1 + 1) / (tf + self._norm[doc_ids])
+            reference_score += idf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if reference_score <= 0:
+            return [], 0.0
+        results = [(self.documents[i], min(float(scores[i]) / reference_score, 1.0)) for i in top if scores[i] > 0]
+
+        confidence = results[0][1] if results and all_present else 0.0
+        return results, confidence
+
+def with_relevance(documents: List[Document], *scored: List[Tuple[Document, float]]) -> List[Document]:
+    """
+    Copies of the documents with metadata["relevance"] set to their best
+    score in the scored lists; stored documents are shared and never changed
+    """
+    relevance: Dict[str, float] = {}
+    for results in scored:
+        for doc, score in results:
+            key = doc.id or doc.page_content
+            relevance[key] = max(score, relevance.get(key, score))
+    return [
+        Document(id=doc.id, page_content=doc.page_content,
+                 metadata={**doc.metadata, "relevance": round(relevance.get(doc.id or doc.page_content, 0.0), 4)})
+        for doc in documents
+    ]
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int) -> List[Document]:
+    """Merge ranked lists by summed 1 / (RRF_K + rank)"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            documents.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ordered[:k]]
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + vector retriever over one InMemoryVectorStore
+
+    mode "hybrid" fuses both rankings, "vector" and "lexical" use one side
+    only. In hybrid mode a query whose lexical confidence reaches
+    fast_threshold is answered from BM25 alone, without embedding the query.
+    replace_index() swaps in a rebuilt store while queries are running; each
+    query uses one consistent (vectorstore, bm25) pair from start to finish.
+
+    Every result carries metadata["relevance"]: lexical relevance (see
+    BM25Index.search) or cosine similarity, the higher of the two for fused
+    results. With a packer, results are packed into its token budget and the
+    packing stats of each call are sent as a CONTEXT_PACKED_EVENT callback
+    event.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: InMemoryVectorStore
+    bm25: BM25Index
+    k: int = 10
+    mode: str = "hybrid"
+    fast_threshold: float = 0.6
+    candidates: int = 20
+    packer: Optional[ContextPacker] = None
+
+    _counts: Dict[str, int] = PrivateAttr(default_factory=lambda: {"lexical_fast": 0, "fused": 0, "vector": 0, "lexical": 0})
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _packing: Dict[str, int] = PrivateAttr(default_factory=lambda: {"calls": 0, "retrieved_tokens": 0, "packed_tokens": 0})
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: InMemoryVectorStore, **kwargs) -> "HybridRetriever":
+        mode = kwargs.get("mode", "hybrid")
+        if mode not in RETRIEVER_MODES:
+            raise ValueError(f"Unknown retriever mode '{mode}'. Must be one of: {list(RETRIEVER_MODES)}")
+        return cls(vectorstore=vectorstore, bm25=BM25Index.from_vectorstore(vectorstore), **kwargs)
+
+    def replace_index(self, vectorstore: InMemoryVectorStore):
+        """Serve a new vector store; its BM25 index is built before the swap"""
+        bm25 = BM25Index.from_vectorstore(vectorstore)
+        with self._lock:
+            self.vectorstore = vectorstore
+            self.bm25 = bm25
+
+    def _index(self) -> Tuple[InMemoryVectorStore, BM25Index]:
+        with self._lock:
+            return self.vectorstore, self.bm25
+
+    def _count(self, path: str):
+        with self._lock:
+            self._counts[path] += 1
+
+    def _lexical(self, bm25: BM25Index, query: str) -> Tuple[Optional[List[Document]], List[Tuple[Document, float]]]:
+        """Return (final answer if no embedding is needed, lexical ranking with relevance)"""
+        if self.mode == "vector":
+            return None, []
+
+        results, confidence = bm25.search(query, self.candidates)
+        answer = with_relevance([doc for doc, _ in results[:self.k]], results)
+        if self.mode == "lexical":
+            self._count("lexical")
+            return answer, results
+        if results and confidence >= self.fast_threshold:
+            self._count("lexical_fast")
+            return answer, results
+        return None, results
+
+    def _fuse(self, lexical: List[Tuple[Document, float]], vector: List[Tuple[Document, float]]) -> List[Document]:
+        if self.mode == "vector":
+            self._count("vector")
+            return with_relevance([doc for doc, _ in vector[:self.k]], vector)
+        self._count("fused")
+        ranked = reciprocal_rank_fusion([[doc for doc, _ in lexical], [doc for doc, _ in vector]], self.k)
+        return with_relevance(ranked, lexical, vector)
+
+    def _pack(self, documents: List[Document]) -> Tuple[List[Document], Optional[Dict]]:
+        if self.packer is None:
+            return documents, None
+        documents, stats = self.packer.pack(documents)
+        with self._lock:
+            self._packing["calls"] += 1
+            self._packing["retrieved_tokens"] += stats["retrieved_tokens"]
+            self._packing["packed_tokens"] += stats["packed_tokens"]
+        return documents, stats
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vectorstore, bm25 = self._index()
+        answer, lexical = self._lexical(bm25, query)
+        if answer is None:
+            vector = vectorstore.similarity_search_with_score(query, k=self.candidates if lexical else self.k)
+            answer = self._fuse(lexical, vector)
+        documents, stats = self._pack(answer)
+        if stats is not None:
+            # Same dispatch as dispatch_custom_event: handlers see the retriever's run id
+            run_manager.get_child().on_custom_event(CONTEXT_PACKED_EVENT, stats, run_id=run_manager.run_id)
+        return documents
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        vectorstore, bm25 = self._index()
+        answer, lexical = self._lexical(bm25, query)
+        if answer is None:
+            vector = await vectorstore.asimilarity_search_with_score(query, k=self.candidates if lexical else self.k)
+            answer = self._fuse(lexical, vector)
+        documents, stats = self._pack(answer)
+        if stats is not None:
+            await run_manager.get_child().on_custom_event(CONTEXT_PACKED_EVENT, stats, run_id=run_manager.run_id)
+        return documents
+
+    def stats(self) -> Dict:
+        """How often each retrieval path was taken"""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        stats = {
+            "mode": self.mode,
+            "chunks": len(self._index()[1].documents),
+            **counts,
+            "embedding_skipped_rate": round((counts["lexical_fast"] + counts["lexical"]) / total, 4) if total else None
+        }
+        if self.packer is not None:
+            with self._lock:
+                packing = dict(self._packing)
+            packing["tokens_saved"] = packing["retrieved_tokens"] - packing["packed_tokens"]
+            packing["token_budget"] = self.packer.token_budget
+            stats["packing"] = packing
+        return stats
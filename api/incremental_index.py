@@ -0,0 +1,211 @@
+"""
+Incremental vector indexes over the script and process directories
+Every source file is tracked by mtime, size and the hash of its
+deduplicated content (see ingestion.py). A sync only chunks and embeds
+files whose content changed, drops the chunks of removed files and keeps
+every other vector as it is, then publishes the result as a new
+memory-mapped index. Searches already running keep reading the previous
+index, so a sync never blocks chats.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from index_cache import MappedVectorStore, compute_index_key, load_cached_index, save_cached_index
+from ingestion import DEFAULT_NEAR_DUPLICATE_THRESHOLD, dedup_settings, ingest_files
+
+# Combined dumps of each directory written by earlier versions of the API;
+# indexing them again would duplicate every line
+GENERATED_FILES = frozenset({"Agent_lines.txt", "Agent_process.txt"})
+
+# Source name used when a directory has no lines to index
+FALLBACK_SOURCE = "(fallback)"
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def scan_directory(directory: str) -> Dict[str, os.stat_result]:
+    """Regular files directly inside directory, by file name"""
+    if not os.path.isdir(directory):
+        print(f"Warning: Directory {directory} does not exist")
+        return {}
+    files = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name not in GENERATED_FILES:
+                files[entry.name] = entry.stat()
+    return files
+
+class IncrementalIndex:
+    """
+    A vector index kept in step with one source directory
+
+    sync() compares the directory against the sources recorded with the
+    current index. While every file's mtime and size are unchanged nothing
+    is read. Otherwise the whole directory goes through deduplication again
+    (duplicates are judged across files), and only files whose deduplicated
+    content changed are re-embedded. Chunks carry their file name in
+    metadata["source"].
+    """
+
+    def __init__(self, name: str, directory: str, text_splitter, embeddings: Embeddings,
+                 settings: Dict, fallback_text: str,
+                 near_duplicate_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD):
+        self.name = name
+        self.directory = directory
+        self.text_splitter = text_splitter
+        self.embeddings = embeddings
+        # Other dedup settings keep other lines, so the cached index is rebuilt
+        self.key = compute_index_key({**settings, "dedup": dedup_settings(near_duplicate_threshold)})
+        self.fallback_text = fallback_text
+        self.near_duplicate_threshold = near_duplicate_threshold
+        # Dedup report from the last sync that read the directory
+        self.last_ingestion: Optional[Dict] = None
+        self.vectorstore: Optional[MappedVectorStore] = None
+        self.generation = 0
+        self.last_sync: Optional[Dict] = None
+        # One sync at a time; readers never take this lock
+        self._sync_lock = threading.Lock()
+
+    @property
+    def sources(self) -> Dict[str, Dict]:
+        return self.vectorstore.sources if self.vectorstore is not None else {}
+
+    def _detect_changes(self) -> Tuple[Dict[str, Dict], Dict[str, str], List[str], Optional[Dict]]:
+        """
+        Compare the directory with the indexed sources
+
+        Returns (source records for the new index, texts to embed by source,
+        removed source names, ingestion report or None if nothing was read).
+        """
+        previous = self.sources
+        stats = scan_directory(self.directory)
+
+        if not stats and set(previous) == {FALLBACK_SOURCE}:
+            unchanged = previous[FALLBACK_SOURCE]["sha256"] == content_hash(self.fallback_text)
+        else:
+            # An empty directory on the first sync still needs the fallback
+            unchanged = bool(previous) and set(stats) == set(previous) and all(
+                previous[name]["mtime_ns"] == stat.st_mtime_ns and previous[name]["size"] == stat.st_size
+                for name, stat in stats.items()
+            )
+        if unchanged:
+            return dict(previous), {}, [], None
+
+        contents, report = ingest_files(self.directory, stats, self.near_duplicate_threshold)
+        self.last_ingestion = report
+        print(f"✓ Ingested {self.name}: {report['lines']} lines from {report['files']} files, kept {report['kept']} "
+              f"({report['exact_duplicates']} exact and {report['near_duplicates']} near duplicates, "
+              f"{report['empty']} empty lines dropped)")
+
+        records: Dict[str, Dict] = {}
+        texts: Dict[str, str] = {}
+        for name, text in contents.items():
+            stat = stats[name]
+            digest = content_hash(text)
+            records[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+            if previous.get(name, {}).get("sha256") != digest:
+                texts[name] = text
+        for name in report["unreadable"]:
+            # Keep serving what was indexed before; retry on the next sync
+            if name in previous:
+                records[name] = previous[name]
+
+        if not any(contents.values()):
+            print(f"Warning: No lines found in {self.directory}. Using fallback data.")
+            digest = content_hash(self.fallback_text)
+            records[FALLBACK_SOURCE] = {"mtime_ns": None, "size": len(self.fallback_text), "sha256": digest}
+            if previous.get(FALLBACK_SOURCE, {}).get("sha256") != digest:
+                texts[FALLBACK_SOURCE] = self.fallback_text
+
+        removed = [name for name in previous if name not in records]
+        return records, texts, removed, report
+
+    def _embed(self, texts: Dict[str, str], records: Dict[str, Dict]) -> List[Dict]:
+        """Chunk and embed the given sources into vector store entries"""
+        chunks = []
+        for source, text in texts.items():
+            documents = self.text_splitter.create_documents([text], metadatas=[{"source": source}])
+            for i, document in enumerate(documents):
+                # Stable ids: the same content always yields the same chunk ids
+                chunk_id = f"{source}:{records[source]['sha256'][:12]}:{i}"
+                chunks.append({"id": chunk_id, "text": document.page_content, "metadata": document.metadata})
+        if not chunks:
+            return []
+        # One batched call for everything that changed
+        vectors = self.embeddings.embed_documents([chunk["text"] for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            chunk["vector"] = np.asarray(vector, dtype=np.float32)
+        return chunks
+
+    def sync(self) -> Dict:
+        """
+        Bring the index up to date with the directory
+
+        Returns what changed. The new index replaces self.vectorstore only
+        once it is complete; callers holding the old one can keep using it.
+        """
+        with self._sync_lock:
+            started = time.perf_counter()
+            if self.vectorstore is None:
+                self.vectorstore = load_cached_index(self.name, self.key, self.embeddings)
+                if self.vectorstore is not None:
+                    print(f"✓ Loaded {self.name} vector store from cache ({len(self.vectorstore.store)} chunks)")
+
+            previous = self.sources
+            records, texts, removed, ingestion = self._detect_changes()
+            stale = set(removed) | set(texts)
+
+            result = {
+                "added": sorted(name for name in texts if name not in previous),
+                "changed": sorted(name for name in texts if name in previous),
+                "removed": sorted(removed),
+                "unchanged": len(records) - len(texts),
+                "embedded_chunks": 0,
+                "chunks": len(self.vectorstore.store) if self.vectorstore is not None else 0,
+            }
+
+            if stale or self.vectorstore is None:
+                kept = [
+                    entry for entry in (self.vectorstore.store.values() if self.vectorstore is not None else [])
+                    if entry["metadata"].get("source") not in stale
+                ]
+                added = self._embed(texts, records)
+                entries = kept + added
+                if not entries:
+                    raise ValueError(f"No chunks to index for {self.name} from {self.directory}")
+
+                if save_cached_index(self.name, self.key, entries, records):
+                    vectorstore = load_cached_index(self.name, self.key, self.embeddings)
+                else:
+                    vectorstore = None
+                if vectorstore is None:
+                    # Cache not writable: serve an unmapped copy from memory
+                    vectors = np.asarray([entry["vector"] for entry in entries], dtype=np.float32)
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    vectors = vectors / np.where(norms > 0, norms, 1.0)
+                    vectorstore = MappedVectorStore(self.embeddings, vectors, entries, records)
+
+                self.vectorstore = vectorstore
+                self.generation += 1
+                result["embedded_chunks"] = len(added)
+                result["chunks"] = len(entries)
+                print(f"✓ Updated {self.name} vector store: {len(result['added'])} added, "
+                      f"{len(result['changed'])} changed, {len(result['removed'])} removed files; "
+                      f"{len(added)} chunks embedded, {len(entries)} total")
+            else:
+                # Touched but identical files: remember the new mtimes so they
+                # are not hashed again (persisted with the next real update)
+                self.vectorstore.sources = records
+
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            result["updated"] = bool(stale)
+            result["ingestion"] = ingestion
+            self.last_sync = result
+            return result
@@ -0,0 +1,181 @@
+"""
+On-disk cache for the sales and process vector indexes
+Lets startup reuse previously embedded chunks instead of re-embedding every script.
+Embeddings are stored as a float32 .npy matrix that is memory-mapped read-only,
+so every uvicorn worker on a host shares one copy through the OS page cache.
+Alongside the chunks, each index records the source files it was built from
+(see incremental_index.py), so later updates only embed what changed.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+# Bump when the on-disk layout changes so old caches are ignored
+INDEX_CACHE_FORMAT = 3
+
+def get_cache_dir() -> str:
+    """Directory holding the cached indexes"""
+    return os.getenv('INDEX_CACHE_DIR', './.index_cache')
+
+def compute_index_key(settings: Dict) -> str:
+    """
+    Hash the chunker/embedding settings
+
+    Chunks embedded under other settings are never reused. Source content is
+    tracked per file in the index's sources, not in the key.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"format": INDEX_CACHE_FORMAT, **settings}, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def _index_paths(name: str):
+    cache_dir = get_cache_dir()
+    return (
+        os.path.join(cache_dir, f"{name}.npy"),
+        os.path.join(cache_dir, f"{name}.docs.json"),
+        os.path.join(cache_dir, f"{name}.key")
+    )
+
+# ============================================================================
+# Memory-mapped Vector Store
+# ============================================================================
+
+class MappedVectorStore(InMemoryVectorStore):
+    """
+    Read-only InMemoryVectorStore backed by a memory-mapped embedding matrix
+
+    Rows are unit-normalized, so a search is one matrix-vector product.
+    Only chunk texts and metadata are held per process; the vectors in
+    store entries are row views into the mapped file. sources describes the
+    files the chunks came from.
+    """
+
+    def __init__(self, embedding: Embeddings, matrix: np.ndarray, entries: List[Dict],
+                 sources: Optional[Dict[str, Dict]] = None):
+        super().__init__(embedding=embedding)
+        self.matrix = matrix
+        self.sources = sources or {}
+        self._entries = [{**entry, "vector": matrix[i]} for i, entry in enumerate(entries)]
+        self.store = {entry["id"]: entry for entry in self._entries}
+
+    def _similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Callable[[Document], bool]] = None,
+    ) -> List[tuple]:
+        if not self._entries:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if filter is None:
+            rows = np.arange(len(self._entries))
+        else:
+            rows = np.array([
+                i for i, entry in enumerate(self._entries)
+                if filter(Document(id=entry["id"], page_content=entry["text"], metadata=entry["metadata"]))
+            ], dtype=np.int64)
+            if rows.size == 0:
+                return []
+
+        scores = (self.matrix if filter is None else self.matrix[rows]) @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            entry = self._entries[rows[i]]
+            document = Document(id=entry["id"], page_content=entry["text"], metadata=entry["metadata"])
+            results.append((document, float(scores[i]), entry["vector"]))
+        return results
+
+    def _read_only(self, *args: Any, **kwargs: Any):
+        raise NotImplementedError("MappedVectorStore is read-only; rebuild the index instead")
+
+    add_documents = _read_only
+    delete = _read_only
+
+    async def aadd_documents(self, *args: Any, **kwargs: Any):
+        self._read_only()
+
+    async def adelete(self, *args: Any, **kwargs: Any):
+        self._read_only()
+
+# ============================================================================
+# Cache Load / Save
+# ============================================================================
+
+def load_cached_index(name: str, key: str, embeddings: Embeddings) -> Optional[MappedVectorStore]:
+    """Map a cached index if its key matches, otherwise return None"""
+    matrix_path, docs_path, key_path = _index_paths(name)
+
+    if not all(os.path.exists(path) for path in (matrix_path, docs_path, key_path)):
+        return None
+
+    try:
+        with open(key_path, 'r', encoding='utf-8') as f:
+            if f.read().strip() != key:
+                return None
+        with open(docs_path, 'r', encoding='utf-8') as f:
+            docs = json.load(f)
+        entries = docs["entries"]
+        matrix = np.load(matrix_path, mmap_mode='r')
+        if matrix.shape[0] != len(entries):
+            raise ValueError(f"{len(entries)} chunks but {matrix.shape[0]} vectors")
+        return MappedVectorStore(embeddings, matrix, entries, docs.get("sources"))
+    except Exception as e:
+        print(f"⚠️  Warning: Could not load cached index '{name}': {e}")
+        return None
+
+def save_cached_index(name: str, key: str, entries: List[Dict], sources: Optional[Dict[str, Dict]] = None) -> bool:
+    """
+    Persist an index and its key, replacing any previous version
+
+    entries are vector store entries (id, text, metadata, vector), e.g.
+    InMemoryVectorStore.store.values(). Returns False if writing failed.
+    """
+    matrix_path, docs_path, key_path = _index_paths(name)
+    os.makedirs(get_cache_dir(), exist_ok=True)
+
+    entries = list(entries)
+    matrix = np.asarray([entry["vector"] for entry in entries], dtype=np.float32)
+    if matrix.size:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    # Per-process temp names: several workers may build the same index at once
+    tmp = f".tmp{os.getpid()}"
+    try:
+        # Write to temp files first so a crash never leaves a half-written cache.
+        # Workers still mapping the previous matrix keep reading the old inode.
+        with open(matrix_path + tmp, 'wb') as f:
+            np.save(f, matrix)
+        with open(docs_path + tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "sources": sources or {},
+                "entries": [
+                    {"id": entry["id"], "text": entry["text"], "metadata": entry.get("metadata") or {}}
+                    for entry in entries
+                ]
+            }, f, default=str)
+        with open(key_path + tmp, 'w', encoding='utf-8') as f:
+            f.write(key)
+        os.replace(matrix_path + tmp, matrix_path)
+        os.replace(docs_path + tmp, docs_path)
+        os.replace(key_path + tmp, key_path)
+        return True
+    except Exception as e:
+        print(f"⚠️  Warning: Could not save index '{name}' to cache: {e}")
+        return False
@@ -0,0 +1,177 @@
+"""
+Streaming ingestion for the script and process directories
+Reads source files line by line, normalizes whitespace and drops empty
+lines, exact duplicates (by hash) and near-duplicates (MinHash over word
+shingles with LSH banding to find candidates, confirmed by exact Jaccard
+similarity), so every distinct line is embedded once. Returns the kept
+text per file and a report of what was dropped.
+"""
+
+import hashlib
+import os
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Lines whose word-shingle Jaccard similarity to a kept line reaches this are
+# dropped as near-duplicates; above 1 disables near-duplicate removal
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Word n-grams compared by MinHash; shorter lines are only deduplicated exactly
+SHINGLE_SIZE = 3
+
+# 16 bands of 4 rows: pairs above ~0.5 similarity become candidates, which
+# are then checked exactly (MinHash estimates are too coarse for short lines)
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Dropped lines listed in the report, per reason
+MAX_REPORT_EXAMPLES = 5
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Universal hashing modulo a Mersenne prime; products of 31-bit values fit in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20251215)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+def normalize_line(line: str) -> str:
+    """Collapse every run of whitespace (including non-breaking spaces) to one space"""
+    return " ".join(line.split())
+
+def iter_lines(path: str) -> Iterator[str]:
+    """Stream a file's lines without loading it whole"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            yield line
+
+def shingle_hashes(text: str) -> Optional[frozenset]:
+    """31-bit hashes of the line's word shingles, or None if it has fewer than SHINGLE_SIZE words"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return None
+    return frozenset(
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode('utf-8')) & 0x7FFFFFFF
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+
+def dedup_settings(near_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD) -> Dict:
+    """Everything that decides which lines are kept; part of the index key"""
+    near = near_threshold <= 1
+    return {
+        "exact": True,
+        "near": near,
+        "near_threshold": near_threshold if near else None,
+        "shingle_size": SHINGLE_SIZE,
+        "num_permutations": NUM_PERMUTATIONS,
+        "lsh_bands": LSH_BANDS,
+    }
+
+def minhash_signature(shingles: frozenset) -> np.ndarray:
+    """MinHash signature of a set of shingle hashes"""
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p for every permutation and shingle, minimum per permutation
+    return ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+class Deduplicator:
+    """
+    Streaming exact and near-duplicate filter
+
+    Lines are kept in the order they are first seen; a later line that
+    repeats or nearly repeats a kept one is dropped.
+    """
+
+    def __init__(self, near_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD):
+        self.near_threshold = near_threshold
+        self._exact: Dict[bytes, str] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(LSH_BANDS)]
+        self._shingles: List[frozenset] = []
+        self._shingle_lines: List[str] = []
+        self.counts = {"lines": 0, "kept": 0, "empty": 0, "exact_duplicates": 0, "near_duplicates": 0}
+        self.examples: Dict[str, List[Dict]] = {"exact_duplicates": [], "near_duplicates": []}
+
+    def _drop(self, reason: str, line: str, duplicate_of: str, source: Optional[str]):
+        self.counts[reason] += 1
+        if len(self.examples[reason]) < MAX_REPORT_EXAMPLES:
+            self.examples[reason].append({"source": source, "line": line, "duplicate_of": duplicate_of})
+
+    def _near_duplicate(self, shingles: frozenset) -> Tuple[Optional[str], List[bytes]]:
+        """Return (kept line this one nearly repeats or None, LSH band keys)"""
+        signature = minhash_signature(shingles)
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        band_keys = [signature[i * rows:(i + 1) * rows].tobytes() for i in range(LSH_BANDS)]
+
+        candidates = set()
+        for band, key in zip(self._buckets, band_keys):
+            candidates.update(band.get(key, ()))
+        for candidate in sorted(candidates):
+            other = self._shingles[candidate]
+            if len(shingles & other) / len(shingles | other) >= self.near_threshold:
+                return self._shingle_lines[candidate], band_keys
+        return None, band_keys
+
+    def add(self, raw_line: str, source: Optional[str] = None) -> Optional[str]:
+        """Return the normalized line if it is kept, None if it is dropped"""
+        self.counts["lines"] += 1
+        line = normalize_line(raw_line)
+        if not line:
+            self.counts["empty"] += 1
+            return None
+
+        key = hashlib.blake2b(line.casefold().encode('utf-8'), digest_size=16).digest()
+        original = self._exact.get(key)
+        if original is not None:
+            self._drop("exact_duplicates", line, original, source)
+            return None
+
+        shingles = shingle_hashes(line) if self.near_threshold <= 1 else None
+        if shingles is not None:
+            original, band_keys = self._near_duplicate(shingles)
+            if original is not None:
+                self._drop("near_duplicates", line, original, source)
+                return None
+            index = len(self._shingles)
+            self._shingles.append(shingles)
+            self._shingle_lines.append(line)
+            for band, band_key in zip(self._buckets, band_keys):
+                band.setdefault(band_key, []).append(index)
+
+        self._exact[key] = line
+        self.counts["kept"] += 1
+        return line
+
+    def report(self) -> Dict:
+        return {**self.counts, "examples": {reason: list(items) for reason, items in self.examples.items()}}
+
+def ingest_files(directory: str, names: Iterable[str],
+                 near_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD) -> Tuple[Dict[str, str], Dict]:
+    """
+    Deduplicate the given files of a directory as one corpus
+
+    Files are read in name order so the same inputs always keep the same
+    lines. Returns (kept text per file with one line per kept line, dedup
+    report). Unreadable files are reported and skipped.
+    """
+    deduplicator = Deduplicator(near_threshold)
+    texts: Dict[str, str] = {}
+    unreadable: List[str] = []
+    for name in sorted(names):
+        kept = []
+        try:
+            for raw_line in iter_lines(os.path.join(directory, name)):
+                line = deduplicator.add(raw_line, source=name)
+                if line is not None:
+                    kept.append(line + "\n")
+        except OSError as e:
+            print(f"Error reading {name}: {e}")
+            unreadable.append(name)
+            continue
+        texts[name] = "".join(kept)
+
+    report = deduplicator.report()
+    report["files"] = len(texts)
+    report["unreadable"] = unreadable
+    return texts, report
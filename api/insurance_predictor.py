@@ -0,0 +1,155 @@
+"""
+Dependency-free predictor for the health insurance OLS model
+The scaler and intercept are folded into raw-feature coefficients so a
+prediction is a single dot product, with no statsmodels/sklearn calls
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+FEATURES = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
+
+# Categorical encodings shared by training and prediction
+SEX_MAPPING = {'male': 1, 'female': 0}
+SMOKER_MAPPING = {'yes': 1, 'no': 0}
+REGION_MAPPING = {'southwest': 0, 'southeast': 1, 'northwest': 2, 'northeast': 3}
+
+def encode_categories(sex: str, smoker: str, region: str) -> Tuple[int, int, int]:
+    """Codes for the categorical inputs; ValueError names the first unknown value"""
+    codes = []
+    for name, value, mapping in (("sex", sex, SEX_MAPPING), ("smoker", smoker, SMOKER_MAPPING),
+                                 ("region", region, REGION_MAPPING)):
+        code = mapping.get(value.strip().lower())
+        if code is None:
+            raise ValueError(f"Invalid {name}. Must be one of: {list(mapping.keys())}")
+        codes.append(code)
+    return tuple(codes)
+
+# Bump when the artifact layout changes
+ARTIFACT_FORMAT = 1
+
+class LinearInsurancePredictor:
+    """Linear predictor over raw (unscaled) features"""
+
+    def __init__(self, coefficients: List[float], intercept: float):
+        if len(coefficients) != len(FEATURES):
+            raise ValueError(f"Expected {len(FEATURES)} coefficients, got {len(coefficients)}")
+
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.intercept = float(intercept)
+
+        # Plain floats for the scalar path
+        self._age, self._sex, self._bmi, self._children, self._smoker, self._region = (
+            float(c) for c in self.coefficients
+        )
+
+    @classmethod
+    def from_fitted(cls, model, scaler) -> "LinearInsurancePredictor":
+        """
+        Fold a fitted StandardScaler into the OLS parameters
+
+        y = b0 + sum(b_i * (x_i - mean_i) / scale_i)
+          = (b0 - sum(b_i * mean_i / scale_i)) + sum((b_i / scale_i) * x_i)
+        """
+        params = np.asarray(model.params, dtype=float)
+        coefficients = params[1:] / np.asarray(scaler.scale_, dtype=float)
+        intercept = params[0] - float(np.dot(coefficients, np.asarray(scaler.mean_, dtype=float)))
+        return cls(coefficients.tolist(), intercept)
+
+    def predict_one(self, age: float, sex: str, bmi: float, children: float,
+                    smoker: str, region: str) -> float:
+        """Predict charges for one customer using only Python arithmetic"""
+        sex_code, smoker_code, region_code = encode_categories(sex, smoker, region)
+        return (self.intercept + self._age * age + self._sex * sex_code + self._bmi * bmi
+                + self._children * children + self._smoker * smoker_code + self._region * region_code)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predict charges for an encoded (n, 6) raw feature matrix"""
+        return np.asarray(features, dtype=float) @ self.coefficients + self.intercept
+
+# ============================================================================
+# Model Artifact
+# ============================================================================
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_artifact(predictor: LinearInsurancePredictor, path: str, model, scaler,
+                  r_squared: float, training_samples: int, data_sha256: str) -> Dict:
+    """
+    Write a versioned model artifact: <path>.npz holds the arrays and
+    <path>.json is the manifest. Returns the manifest.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    npz_path = path + '.npz'
+    manifest_path = path + '.json'
+
+    # Written through a file object (np.savez would append .npz to the name)
+    # and swapped in, so a reader never sees a half-written archive
+    with open(npz_path + '.tmp', 'wb') as f:
+        np.savez(
+            f,
+            coefficients=predictor.coefficients,
+            intercept=np.array([predictor.intercept]),
+            ols_params=np.asarray(model.params, dtype=float),
+            scaler_mean=np.asarray(scaler.mean_, dtype=float),
+            scaler_scale=np.asarray(scaler.scale_, dtype=float)
+        )
+    os.replace(npz_path + '.tmp', npz_path)
+
+    created_at = datetime.now(timezone.utc)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": f"{created_at.strftime('%Y%m%dT%H%M%SZ')}-{data_sha256[:8]}",
+        "created_at": created_at.isoformat(),
+        "features": FEATURES,
+        "encodings": {
+            "sex": SEX_MAPPING,
+            "smoker": SMOKER_MAPPING,
+            "region": REGION_MAPPING
+        },
+        "r_squared": float(r_squared),
+        "training_samples": int(training_samples),
+        "data_sha256": data_sha256,
+        "arrays_file": os.path.basename(npz_path),
+        "arrays_sha256": file_sha256(npz_path)
+    }
+
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    return manifest
+
+def load_artifact(path: str) -> Tuple[LinearInsurancePredictor, Dict]:
+    """Load a predictor and its manifest from <path>.json / <path>.npz"""
+    with open(path + '.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported artifact format: {manifest.get('format')}")
+    if manifest.get("features") != FEATURES or manifest.get("encodings") != {
+        "sex": SEX_MAPPING, "smoker": SMOKER_MAPPING, "region": REGION_MAPPING
+    }:
+        raise ValueError("Artifact features/encodings do not match this predictor")
+
+    npz_path = os.path.join(os.path.dirname(path + '.json'), manifest["arrays_file"])
+    if file_sha256(npz_path) != manifest["arrays_sha256"]:
+        raise ValueError(f"Checksum mismatch for {npz_path}")
+
+    with np.load(npz_path) as arrays:
+        predictor = LinearInsurancePredictor(
+            arrays["coefficients"].tolist(),
+            float(arrays["intercept"][0])
+        )
+
+    return predictor, manifest
@@ -3,31 +3,50 @@ FastAPI application for Agent Easy Chatbot Agent
 Supports RAG, web search, and mathematical calculations
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, List
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Optional, Dict, List
 import os
 import re
+import secrets
+import json
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Insurance prediction imports
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import statsmodels.api as sm
 
-from langchain_classic.indexes import VectorstoreIndexCreator
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_experimental.text_splitter import SemanticChunker
 from langchain_classic.chains import LLMMathChain
 from langchain_classic.agents import Tool, create_openai_functions_agent, AgentExecutor
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_classic.tools.retriever import create_retriever_tool
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from incremental_index import IncrementalIndex
+from insurance_predictor import LinearInsurancePredictor, encode_categories, load_artifact
+from session_store import create_session_store
+from history_policy import HistoryWindow
+from response_cache import SemanticResponseCache
+from embedding_cache import CachedEmbeddings
+from chunking import create_text_splitter, get_chunking_config
+from hybrid_retriever import HybridRetriever
+from context_packing import ContextPacker, tiktoken_counter
+from calculator import LocalCalculator
+from quote_tool import create_insurance_quote_tool
+import metrics
+from tracing import ChatTracer, configure_trace_log, log_chat_trace
+
 # Load environment variables
 load_dotenv()
 
@@ -47,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # ============================================================================
 # Request/Response Models
 # ============================================================================
@@ -54,6 +76,8 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = "default"
+    # Return the per-step timing breakdown with the response
+    trace: bool = False
     
     class Config:
         json_schema_extra = {
@@ -67,6 +91,8 @@ class ChatResponse(BaseModel):
     response: str
     session_id: str
     tools_used: Optional[List[str]] = None
+    cached: bool = False
+    trace: Optional[Dict] = None
     
     class Config:
         json_schema_extra = {
@@ -124,29 +150,139 @@ class InsurancePredictionResponse(BaseModel):
             }
         }
 
+class InsuranceBatchPredictionRequest(BaseModel):
+    # Validated one by one, so a malformed record fails alone instead of the batch
+    records: List[Any]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "records": [
+                    {"age": 29, "sex": "male", "bmi": 20.0, "children": 0, "smoker": "no", "region": "southeast"},
+                    {"age": 45, "sex": "female", "bmi": 32.5, "children": 2, "smoker": "yes", "region": "northwest"}
+                ]
+            }
+        }
+
+class InsuranceBatchPredictionItem(BaseModel):
+    index: int
+    predicted_charges: Optional[float] = None
+    error: Optional[str] = None
+
+class InsuranceBatchPredictionResponse(BaseModel):
+    predictions: List[InsuranceBatchPredictionItem]
+    total: int
+    succeeded: int
+    failed: int
+
 class ModelInfoResponse(BaseModel):
     model_loaded: bool
     training_samples: Optional[int] = None
     r_squared: Optional[float] = None
     features: Optional[List[str]] = None
+    artifact_version: Optional[str] = None
+    source: Optional[str] = None  # "artifact" or "csv"
 
 # ============================================================================
 # Global Variables
 # ============================================================================
 
-# Store chat histories per session
-chat_histories: Dict[str, ChatMessageHistory] = {}
+# Store chat histories per session, bounded by count and idle time
+# SESSION_BACKEND=sqlite shares histories across worker processes
+chat_histories = create_session_store(
+    backend=os.getenv('SESSION_BACKEND', 'memory'),
+    max_sessions=int(os.getenv('SESSION_MAX_COUNT', '10000')),
+    ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', '86400')),
+    db_path=os.getenv('SESSION_DB_PATH', './sessions.db')
+)
 
 # Agent executor (initialized on startup)
 agent_with_chat_history = None
 
-# Insurance prediction model and scaler
-insurance_model = None
-insurance_scaler = None
+# Chat history window applied to the agent prompt (initialized with the agent)
+history_window: Optional[HistoryWindow] = None
+
+# Semantic cache for first-turn responses (optional, initialized with the agent)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+response_cache: Optional[SemanticResponseCache] = None
+
+# Answers built only from the indexed sources can be reused by other customers;
+# quotes, calculations and web results depend on the asker or on the moment
+CACHEABLE_TOOLS = frozenset({"Agent_lines", "Agent_Process"})
+
+# On-disk cache in front of every embedding call (initialized with the agent)
+embedding_cache: Optional[CachedEmbeddings] = None
+
+# BM25 + vector retrievers behind the retriever tools, keyed by tool name
+# (initialized with the agent)
+retrievers: Dict[str, HybridRetriever] = {}
+
+# Per-file tracked indexes behind those retrievers, same keys; /admin/reindex
+# and the optional watcher sync them with their directories
+source_indexes: Dict[str, IncrementalIndex] = {}
+reindex_lock = threading.Lock()
+
+# Poll the script/process directories every N seconds (0 disables the watcher)
+INDEX_WATCH_INTERVAL = float(os.getenv('INDEX_WATCH_INTERVAL', '0'))
+watch_task: Optional[asyncio.Task] = None
+
+# When set, /admin endpoints require this value in the X-Admin-Key header
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY', '')
+
+# Bounded thread pool for synchronous work on the chat path (sync tools, agent
+# initialization) so it never runs on, or floods, the event loop
+AGENT_OFFLOAD_WORKERS = int(os.getenv('AGENT_OFFLOAD_WORKERS', '8'))
+agent_offload_executor = ThreadPoolExecutor(
+    max_workers=AGENT_OFFLOAD_WORKERS,
+    thread_name_prefix="agent-offload"
+)
+
+# Startup components reported by /ready: pending -> building -> ready | failed
+READINESS_COMPONENTS = ("sales_index", "process_index", "insurance_model", "tools")
+AGENT_COMPONENTS = ("sales_index", "process_index", "tools")
+component_status: Dict[str, Dict] = {
+    name: {"state": "pending", "seconds": None, "error": None} for name in READINESS_COMPONENTS
+}
+
+# Wall-clock startup time: set when startup begins, total filled in once every
+# component has settled (ready or failed)
+startup_timing: Dict[str, Optional[float]] = {"started_at": None, "total_seconds": None}
+readiness_lock = threading.Lock()
+
+# Single-flight agent build: at most one runs, concurrent callers share its future
+agent_init_lock = threading.Lock()
+agent_init_future: Optional[Future] = None
+
+# Times LLM, tool and retriever calls inside agent turns; passed in the
+# invoke config so it reaches every nested run
+agent_metrics = metrics.AgentMetricsCallback()
+metrics.chat_sessions.set_function(lambda: len(chat_histories))
+
+# One JSON line per chat turn (tools, LLM calls, timings): stdout (default),
+# stderr, a file path, or empty to disable. Lines are written by a background
+# thread; files rotate at CHAT_TRACE_MAX_BYTES
+configure_trace_log(
+    os.getenv('CHAT_TRACE_LOG', 'stdout'),
+    sample_rate=float(os.getenv('CHAT_TRACE_SAMPLE_RATE', '1.0')),
+    max_bytes=int(os.getenv('CHAT_TRACE_MAX_BYTES', str(50 * 1024 * 1024)))
+)
+
+# AgentExecutor's step-by-step console output; the chat trace log covers the
+# same ground in a parseable form
+AGENT_VERBOSE = os.getenv('AGENT_VERBOSE', 'false').lower() in ('1', 'true', 'yes')
+
+# Scaler-folded linear predictor used on the request path
+insurance_predictor: Optional[LinearInsurancePredictor] = None
+
+# Upper bound on records accepted by /insurance/predict/batch
+INSURANCE_BATCH_MAX = int(os.getenv('INSURANCE_BATCH_MAX', '10000'))
+
 insurance_model_info = {
     "r_squared": None,
     "training_samples": None,
-    "features": ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
+    "features": ['age', 'sex', 'bmi', 'children', 'smoker', 'region'],
+    "artifact_version": None,
+    "source": None
 }
 
 # ============================================================================
@@ -170,56 +306,76 @@ def is_single_word_all_caps(s: str) -> bool:
     
     return words[0].isupper()
 
-def extract_character_lines(file_path: str, dialogues: list):
-    """Extract dialogue lines for a specific character from script file"""
-    lines = []
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as script_file:
-            lines = script_file.readlines()
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return
-  
-    for line in lines:
-        stripped_line = line.strip()
-        dialogues.append(stripped_line)
-
-def process_directory(directory_path: str) -> list:
-    """Process all script files in directory and extract character lines"""
-    dialogues = []
-    
-    if not os.path.exists(directory_path):
-        print(f"Warning: Directory {directory_path} does not exist")
-        return dialogues
-    
-    for filename in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, filename)
-        if os.path.isfile(file_path):
-            extract_character_lines(file_path, dialogues)
-    
-    # print(f"Extracted {len(dialogues)} dialogue lines for Agent")
-    return dialogues
-
 # ============================================================================
 # Session Management
 # ============================================================================
 
-def get_session_history(session_id: str) -> ChatMessageHistory:
+def get_session_history(session_id: str) -> BaseChatMessageHistory:
     """Get or create chat history for a session"""
-    if session_id not in chat_histories:
-        chat_histories[session_id] = ChatMessageHistory()
-    return chat_histories[session_id]
+    return chat_histories.get_history(session_id)
+
+# ============================================================================
+# Startup Readiness
+# ============================================================================
+
+def mark_component(name: str, state: str, seconds: Optional[float] = None, error: Optional[str] = None):
+    """Record the state of a startup component for /ready"""
+    with readiness_lock:
+        component_status[name] = {
+            "state": state,
+            "seconds": round(seconds, 3) if seconds is not None else None,
+            "error": error
+        }
+        
+        started_at = startup_timing["started_at"]
+        settled = all(status["state"] in ("ready", "failed") for status in component_status.values())
+        if started_at is None or startup_timing["total_seconds"] is not None or not settled:
+            return
+        
+        startup_timing["total_seconds"] = round(time.perf_counter() - started_at, 3)
+        stages = ", ".join(f"{n} {status['seconds']}s ({status['state']})" for n, status in component_status.items())
+        print(f"✓ Startup finished in {startup_timing['total_seconds']}s: {stages}")
+
+@contextmanager
+def track_component(name: str):
+    """Mark a component as building, then ready or failed with its build time"""
+    mark_component(name, "building")
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        mark_component(name, "failed", time.perf_counter() - start, str(e))
+        raise
+    mark_component(name, "ready", time.perf_counter() - start)
 
 # ============================================================================
 # Insurance Model Initialization
 # ============================================================================
 
 def initialize_insurance_model():
-    """Initialize and train the health insurance prediction model"""
-    global insurance_model, insurance_scaler, insurance_model_info
+    """Load the insurance prediction model artifact, or train from CSV as a fallback"""
+    global insurance_predictor, insurance_model_info
     
     print("Initializing Health Insurance Prediction Model...")
     
+    # Prefer the precompiled artifact written by train_insurance_model.py
+    artifact_path = os.getenv('INSURANCE_MODEL_ARTIFACT', './models/insurance_model')
+    
+    if os.path.exists(artifact_path + '.json'):
+        try:
+            insurance_predictor, manifest = load_artifact(artifact_path)
+            
+            insurance_model_info['r_squared'] = manifest['r_squared']
+            insurance_model_info['training_samples'] = manifest['training_samples']
+            insurance_model_info['artifact_version'] = manifest['version']
+            insurance_model_info['source'] = "artifact"
+            
+            print(f"✓ Model artifact {manifest['version']} loaded from {artifact_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️  Warning: Could not load model artifact at {artifact_path}: {e}")
+            print("    Falling back to training from CSV")
+    
     # Get the data file path from environment or use default
     data_file = os.getenv('HEALTH_INSURANCE_DATA', 'E:/MLCourse/Datasets/health_insurance.csv')
     
@@ -229,46 +385,16 @@ def initialize_insurance_model():
         return False
     
     try:
-        # Load the data
-        df = pd.read_csv(data_file)
-        print(f"✓ Loaded {len(df)} insurance records")
-        
-        # Convert categorical variables to numeric
-        # Sex: male -> 1, female -> 0
-        df['sex'] = df['sex'].astype(str).str.strip().str.lower()
-        df['sex'] = df['sex'].map({'male': 1, 'female': 0})
-        
-        # Smoker: yes -> 1, no -> 0
-        df['smoker'] = df['smoker'].astype(str).str.strip().str.lower()
-        df['smoker'] = df['smoker'].map({'yes': 1, 'no': 0})
-        
-        # Region: southwest -> 0, southeast -> 1, northwest -> 2, northeast -> 3
-        df['region'] = df['region'].astype(str).str.strip().str.lower()
-        region_mapping = {'southwest': 0, 'southeast': 1, 'northwest': 2, 'northeast': 3}
-        df['region'] = df['region'].map(region_mapping)
-        
-        # Check for any NaN values after conversion
-        if df.isnull().any().any():
-            print("⚠️  Warning: Some values could not be converted. Dropping rows with NaN.")
-            df = df.dropna()
-        
-        # Prepare features and target
-        X = df[['age', 'sex', 'bmi', 'children', 'smoker', 'region']].copy()
-        y = df['charges']
-        
-        # Scale the features
-        insurance_scaler = StandardScaler()
-        X_scaled = insurance_scaler.fit_transform(X.values)
+        # Training pulls in pandas/statsmodels/sklearn, so only import them on fallback
+        from train_insurance_model import fit_insurance_model
         
-        # Add constant for intercept
-        X_scaled_with_const = sm.add_constant(X_scaled)
-        
-        # Train the model
-        insurance_model = sm.OLS(y, X_scaled_with_const).fit()
+        insurance_predictor, model, _, training_samples = fit_insurance_model(data_file)
         
         # Store model info
-        insurance_model_info['r_squared'] = float(insurance_model.rsquared)
-        insurance_model_info['training_samples'] = len(df)
+        insurance_model_info['r_squared'] = float(model.rsquared)
+        insurance_model_info['training_samples'] = training_samples
+        insurance_model_info['artifact_version'] = None
+        insurance_model_info['source'] = "csv"
         
         print(f"✓ Model trained successfully")
         print(f"  - R-squared: {insurance_model_info['r_squared']:.3f}")
@@ -282,13 +408,56 @@ def initialize_insurance_model():
         traceback.print_exc()
         return False
 
+# ============================================================================
+# Insurance Prediction Helpers
+# ============================================================================
+
+def validation_message(error: ValidationError) -> str:
+    """One line per invalid field, e.g. "age: Input should be a valid integer" """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}" for e in error.errors()
+    )
+
+def encode_insurance_features(records: List[Any]):
+    """
+    Validate raw request records and encode them into a raw feature matrix
+    (same encoding as training)
+    
+    Returns the matrix for the valid records, their positions in the input,
+    and a dict of error messages for the rejected positions.
+    """
+    rows = []
+    valid_indices = []
+    errors = {}
+    
+    for i, raw in enumerate(records):
+        try:
+            record = InsurancePredictionRequest.model_validate(raw)
+            sex_code, smoker_code, region_code = encode_categories(record.sex, record.smoker, record.region)
+        except ValidationError as e:
+            errors[i] = validation_message(e)
+            continue
+        except ValueError as e:
+            errors[i] = str(e)
+            continue
+        
+        rows.append((record.age, sex_code, record.bmi, record.children, smoker_code, region_code))
+        valid_indices.append(i)
+    
+    features = np.array(rows, dtype=float).reshape(len(rows), 6)
+    return features, valid_indices, errors
+
+def predict_charges(features: np.ndarray) -> np.ndarray:
+    """Predict charges for every row of a raw feature matrix at once"""
+    return insurance_predictor.predict(features)
+
 # ============================================================================
 # Agent Initialization
 # ============================================================================
 
 def initialize_agent():
     """Initialize the Agent Easy agent with all tools"""
-    global agent_with_chat_history
+    global agent_with_chat_history, history_window, response_cache, embedding_cache, retrievers, source_indexes
     
     print("Initializing Agent Easy Agent...")
     
@@ -303,94 +472,96 @@ def initialize_agent():
     llm = ChatOpenAI(openai_api_key=openai_api_key, temperature=0)
     
     # ========================================================================
-    # 1. Load and process Agent's sales dialogue lines
+    # 1. Set up embeddings and chunking
     # ========================================================================
     
-    print("Loading sales scripts...")
-    script_directory = os.getenv('SCRIPT_DIRECTORY', './sample_data/AgentScripts')
-    dialogues = process_directory(script_directory)
-    
-    # Create a fallback if no scripts found
-    if len(dialogues) == 0:
-        print("Warning: No dialogue lines found. Using fallback sample data.")
-        dialogues = [
-            "My name is Agent Easy. I from LiveEasy insurance company/agency"
-        ]
-    
-    # Save dialogues to temporary file
-    data_lines_file = './sample_data/AgentScripts/Agent_lines.txt'
-    os.makedirs('./sample_data/AgentScripts', exist_ok=True)
-    
-    with open(data_lines_file, 'w', encoding='utf-8') as f:
-        for line in dialogues:
-            f.write(line + '\n')
-    
-    print(f"✓ Saved {len(dialogues)} sales dialogue lines")
-    
-    # ========================================================================
-    # 2. Create vector store with embeddings for sales scripts
-    # ========================================================================
-    
-    print("Creating sales scripts vector store...")
     embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
-    text_splitter = SemanticChunker(
-        embeddings, 
-        breakpoint_threshold_type="percentile"
-    )
-    
-    with open(data_lines_file, 'r', encoding='utf-8') as f:
-        data_lines = f.read()
     
-    docs_sales = text_splitter.create_documents([data_lines])
-    index_sales = VectorstoreIndexCreator(embedding=embeddings).from_documents(docs_sales)
-    
-    print(f"✓ Sales vector store created with {len(docs_sales)} chunks")
+    # Serve previously embedded texts (sentences, chunks and queries) from disk
+    embedding_cache_path = os.getenv('EMBEDDING_CACHE_PATH', './.embedding_cache/embeddings.db')
+    if embedding_cache_path:
+        embeddings = embedding_cache = CachedEmbeddings(
+            embeddings, embedding_cache_path,
+            max_rows=int(os.getenv('EMBEDDING_CACHE_MAX_ROWS', '100000'))
+        )
+        print(f"✓ Embedding cache at {embedding_cache_path}")
+    chunking = get_chunking_config()
+    text_splitter = create_text_splitter(chunking, embeddings)
+    print(f"✓ Chunking strategy: {chunking['strategy']}")
+    
+    index_settings = {
+        "embedding_model": getattr(embeddings, 'model', type(embeddings).__name__),
+        "chunking": chunking,
+    }
+    # Lines this similar (word-shingle Jaccard) to an earlier line
+    # are dropped before embedding; above 1 keeps near-duplicates
+    near_duplicate_threshold = float(os.getenv('DEDUP_NEAR_THRESHOLD', '0.8'))
     
     # ========================================================================
-    # 3. Load and process Insurance Process information
+    # 2. Sales scripts and insurance process indexes
     # ========================================================================
     
-    print("Loading insurance process data...")
-    process_directory_path = os.getenv('PROCESS_DIRECTORY', './sample_data/AgentProcess')
-    process_dialogues = process_directory(process_directory_path)
-    
-    # Create a fallback if no process data found
-    if len(process_dialogues) == 0:
-        print("Warning: No insurance process data found. Using fallback.")
-        process_dialogues = [
-            "Insurance claims handling involves documenting the incident and providing necessary information to process claims efficiently."
-        ]
-    
-    # Save process data to temporary file
-    process_lines_file = './sample_data/AgentProcess/Agent_process.txt'
-    os.makedirs('./sample_data/AgentProcess', exist_ok=True)
+    # Each index tracks its directory file by file; only new or changed files
+    # are embedded, at startup and on every later reindex
+    print("Loading sales scripts and insurance process data...")
+    sales_index = IncrementalIndex(
+        "sales",
+        os.getenv('SCRIPT_DIRECTORY', './sample_data/AgentScripts'),
+        text_splitter, embeddings, index_settings,
+        fallback_text="My name is Agent Easy. I from LiveEasy insurance company/agency\n",
+        near_duplicate_threshold=near_duplicate_threshold
+    )
+    process_index = IncrementalIndex(
+        "process",
+        os.getenv('PROCESS_DIRECTORY', './sample_data/AgentProcess'),
+        text_splitter, embeddings, index_settings,
+        fallback_text="Insurance claims handling involves documenting the incident and providing necessary information to process claims efficiently.\n",
+        near_duplicate_threshold=near_duplicate_threshold
+    )
     
-    with open(process_lines_file, 'w', encoding='utf-8') as f:
-        for line in process_dialogues:
-            f.write(line + '\n')
+    # Both builds are dominated by embedding round trips, so run them side by
+    # side on a dedicated pool (this function may itself run on the offload pool)
+    def build_tracked(component: str, index: IncrementalIndex):
+        with track_component(component):
+            index.sync()
+            return index.vectorstore
     
-    print(f"✓ Saved {len(process_dialogues)} insurance process lines")
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="index-build") as index_pool:
+        sales_future = index_pool.submit(build_tracked, "sales_index", sales_index)
+        process_future = index_pool.submit(build_tracked, "process_index", process_index)
+        vectorstore_sales = sales_future.result()
+        vectorstore_process = process_future.result()
     
     # ========================================================================
-    # 4. Create vector store for insurance process information
+    # 3. Create retriever tools
     # ========================================================================
     
-    print("Creating insurance process vector store...")
-    
-    with open(process_lines_file, 'r', encoding='utf-8') as f:
-        process_data = f.read()
-    
-    docs_process = text_splitter.create_documents([process_data])
-    index_process = VectorstoreIndexCreator(embedding=embeddings).from_documents(docs_process)
-    
-    print(f"✓ Process vector store created with {len(docs_process)} chunks")
-    
-    # ========================================================================
-    # 5. Create retriever tools
-    # ========================================================================
+    mark_component("tools", "building")
+    tools_started = time.perf_counter()
+    
+    # In-process BM25 over the same chunks, fused with vector search; queries
+    # with a confident lexical match skip the remote query embedding
+    retriever_settings = {
+        "k": 10,
+        "mode": os.getenv('RETRIEVER_MODE', 'hybrid').strip().lower(),
+        "fast_threshold": float(os.getenv('RETRIEVER_LEXICAL_FAST_THRESHOLD', '0.6'))
+    }
+    print(f"✓ Retriever mode: {retriever_settings['mode']} "
+          f"(lexical fast path at confidence >= {retriever_settings['fast_threshold']})")
+    
+    # Pack the retrieved chunks into a token budget before they reach the
+    # agent scratchpad: weak matches, duplicates and window overlaps go first
+    context_token_budget = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1000'))
+    if context_token_budget > 0:
+        retriever_settings["packer"] = ContextPacker(
+            token_budget=context_token_budget,
+            min_relevance=float(os.getenv('CONTEXT_MIN_RELEVANCE', '0.5')),
+            count_tokens=tiktoken_counter(getattr(llm, 'model_name', None))
+        )
+        print(f"✓ Context packing: {context_token_budget} tokens per retriever call")
     
     # Sales scripts retriever
-    retriever_sales = index_sales.vectorstore.as_retriever(search_kwargs={'k': 10})
+    retriever_sales = HybridRetriever.from_vectorstore(vectorstore_sales, **retriever_settings)
     retriever_tool_sales = create_retriever_tool(
         retriever_sales, 
         "Agent_lines",
@@ -398,30 +569,41 @@ def initialize_agent():
     )
     
     # Insurance process retriever
-    retriever_process = index_process.vectorstore.as_retriever(search_kwargs={'k': 10})
+    retriever_process = HybridRetriever.from_vectorstore(vectorstore_process, **retriever_settings)
     retriever_tool_process = create_retriever_tool(
         retriever_process,
         "Agent_Process",
         "Search for information about insurance processes, claim handling procedures, policy information, and documentation requirements. Use this when customers ask about how insurance works or claims processes."
     )
     
+    retrievers = {"Agent_lines": retriever_sales, "Agent_Process": retriever_process}
+    source_indexes = {"Agent_lines": sales_index, "Agent_Process": process_index}
+    
     # ========================================================================
-    # 6. Create math calculator tool
+    # 4. Create math calculator tool
     # ========================================================================
     
+    # Expressions are evaluated in-process; only worded questions cost an
+    # extra LLMMathChain completion
     problem_chain = LLMMathChain.from_llm(llm=llm)
+    calculator = LocalCalculator(fallback=problem_chain)
     math_tool = Tool.from_function(
         name="Calculator",
-        func=problem_chain.run,
-        description="Useful for when you need to answer questions about math. This tool is only for math questions and nothing else. Only input math expressions."
+        func=calculator.run,
+        coroutine=calculator.arun,
+        description="Useful for when you need to answer questions about math. This tool is only for math questions and nothing else. Only input math expressions, e.g. 1200 * (1 - 10%) or 350 * 12."
     )
     
     # ========================================================================
-    # 7. Create web search tool (optional)
+    # 5. Create web search tool (optional)
     # ========================================================================
     
-    # Combine all tools - now includes both retrievers
-    tools = [retriever_tool_sales, retriever_tool_process, math_tool]
+    # Quotes come straight from the in-memory insurance model; the lambda reads
+    # the global at call time, since the model may finish loading later
+    quote_tool = create_insurance_quote_tool(lambda: insurance_predictor)
+    
+    # Combine all tools - now includes both retrievers and the quote tool
+    tools = [retriever_tool_sales, retriever_tool_process, math_tool, quote_tool]
     
     if tavily_api_key:
         print("✓ Tavily API key found - enabling web search")
@@ -430,6 +612,7 @@ def initialize_agent():
         search_tool = Tool.from_function(
             name="Tavily",
             func=search_tavily.run,
+            coroutine=search_tavily.arun,
             description="Useful for browsing information from the Internet about real insurance products, companies, current events, or information you are unsure of."
         )
         tools.append(search_tool)
@@ -441,54 +624,185 @@ def initialize_agent():
         print(f"  - {tool.name}")
     
     # ========================================================================
-    # 8. Create agent prompt
+    # 6. Create agent prompt
     # ========================================================================
     
     prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are Agent Easy from LivEasy Insurance. Answer all questions using Agent Easy's speech style and be persuasive. When customers ask about insurance processes or claims, use the Agent_Process tool to provide accurate information. When trying to sell the insurance product, use the Agent_lines tool. Keep the response short and concise with about 3-4 sentences."),
+        ("system", "You are Agent Easy from LivEasy Insurance. Answer all questions using Agent Easy's speech style and be persuasive. When customers ask about insurance processes or claims, use the Agent_Process tool to provide accurate information. When trying to sell the insurance product, use the Agent_lines tool. When customers ask what insurance would cost them, use the InsuranceQuote tool instead of guessing or calculating. Keep the response short and concise with about 3-4 sentences."),
         MessagesPlaceholder("chat_history", optional=True),
         ("human", "{input}"),
         MessagesPlaceholder("agent_scratchpad"),
     ])
     
     # ========================================================================
-    # 9. Create and configure agent
+    # 7. Create and configure agent
     # ========================================================================
     
     agent = create_openai_functions_agent(llm, tools, prompt)
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE)
+    
+    # Only the most recent part of the history goes into the prompt; the
+    # session store still keeps every message
+    summarize = os.getenv('HISTORY_SUMMARIZE', 'false').lower() in ('1', 'true', 'yes')
+    history_window = HistoryWindow(
+        max_turns=int(os.getenv('HISTORY_MAX_TURNS', '10')),
+        max_tokens=int(os.getenv('HISTORY_MAX_TOKENS', '2000')),
+        summarize_llm=llm if summarize else None,
+        executor=agent_offload_executor
+    )
+    print(f"✓ History window: last {history_window.max_turns or 'all'} turns, "
+          f"{history_window.max_tokens or 'unlimited'} tokens, summarization {'on' if summarize else 'off'}")
+    
+    windowed_agent = RunnablePassthrough.assign(
+        chat_history=RunnableLambda(history_window.select)
+    ) | agent_executor
     
     agent_with_chat_history = RunnableWithMessageHistory(
-        agent_executor,
+        windowed_agent,
         get_session_history,
         input_messages_key="input",
         history_messages_key="chat_history",
     )
     
+    # Cached answers may come from the previous indexes, so start fresh
+    if RESPONSE_CACHE_ENABLED:
+        if response_cache is None:
+            response_cache = SemanticResponseCache(
+                embeddings,
+                threshold=float(os.getenv('RESPONSE_CACHE_THRESHOLD', '0.95')),
+                max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '500')),
+                ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+            )
+        else:
+            response_cache.embeddings = embeddings
+            response_cache.clear()
+        print(f"✓ Response cache enabled (similarity threshold {response_cache.threshold})")
+    
+    mark_component("tools", "ready", time.perf_counter() - tools_started)
     print("Agent initialization complete!")
     return agent_with_chat_history
 
-# ============================================================================
-# API Endpoints
-# ============================================================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize agent and insurance model on application startup"""
-    # Initialize chatbot agent
+def run_agent_initialization():
+    """Build the agent, marking any unfinished component as failed on error"""
     try:
-        initialize_agent()
+        return initialize_agent()
     except Exception as e:
+        for name in AGENT_COMPONENTS:
+            if component_status[name]["state"] in ("pending", "building"):
+                mark_component(name, "failed", error=str(e))
         print(f"Error initializing agent: {e}")
-        print("Agent will be initialized on first request")
+        raise
+
+def start_agent_initialization() -> Future:
+    """
+    Start the agent build in the background unless one is running or done
     
-    # Initialize insurance prediction model
+    Every caller gets the same future, so concurrent first requests wait on
+    one build instead of each starting their own. A failed build is retried
+    by the next caller.
+    """
+    global agent_init_future
+    with agent_init_lock:
+        future = agent_init_future
+        if future is None or (future.done() and future.exception() is not None):
+            future = agent_init_future = agent_offload_executor.submit(run_agent_initialization)
+        return future
+
+def run_insurance_model_initialization():
+    """Load the insurance model, recording its readiness"""
     try:
-        initialize_insurance_model()
+        with track_component("insurance_model"):
+            if not initialize_insurance_model():
+                raise RuntimeError("Insurance model artifact and training data not available")
     except Exception as e:
         print(f"Error initializing insurance model: {e}")
         print("Insurance prediction endpoint will not be available")
 
+def reindex_sources() -> Dict:
+    """
+    Sync every index with its directory and swap updated ones into the retrievers
+    
+    Only new or changed files are embedded. Runs off the event loop; chats
+    keep using the previous index until the swap. Cached responses are
+    dropped if anything changed, since they may cite outdated content.
+    """
+    with reindex_lock:
+        results = {}
+        for tool_name, index in source_indexes.items():
+            result = index.sync()
+            if result["updated"]:
+                retrievers[tool_name].replace_index(index.vectorstore)
+            results[tool_name] = result
+        
+        changed = any(result["updated"] for result in results.values())
+        if changed and response_cache is not None:
+            response_cache.clear()
+        return {"updated": changed, "indexes": results}
+
+async def watch_sources():
+    """Poll the source directories and reindex when files change"""
+    try:
+        await asyncio.wrap_future(start_agent_initialization())
+    except Exception:
+        pass  # The watcher syncs whatever indexes exist once a build succeeds
+    print(f"✓ Watching source directories every {INDEX_WATCH_INTERVAL:g}s")
+    
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(INDEX_WATCH_INTERVAL)
+        if not source_indexes:
+            continue
+        try:
+            await loop.run_in_executor(agent_offload_executor, reindex_sources)
+        except Exception as e:
+            print(f"⚠️  Warning: Source reindex failed: {e}")
+
+def report_watcher_exit(task: asyncio.Task):
+    """Done-callback for the watcher: it only ends on shutdown, so anything else is logged"""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        print(f"❌ Source watcher stopped: {error!r}; files are no longer reindexed automatically")
+
+# ============================================================================
+# API Endpoints
+# ============================================================================
+
+@app.on_event("startup")
+async def startup_event():
+    """Start agent and insurance model initialization in the background"""
+    global watch_task
+    # LangChain runs any remaining synchronous callbacks/tools in the default
+    # executor; route them through the bounded pool
+    asyncio.get_running_loop().set_default_executor(agent_offload_executor)
+    startup_timing["started_at"] = time.perf_counter()
+    
+    # Uvicorn accepts traffic right away; /ready reports when each part is warm.
+    # The insurance model loads independently, so predictions do not wait
+    # for the (much slower) index builds.
+    agent_offload_executor.submit(run_insurance_model_initialization)
+    start_agent_initialization()
+    
+    if INDEX_WATCH_INTERVAL > 0:
+        # Keep a reference: the event loop holds tasks only weakly
+        watch_task = asyncio.create_task(watch_sources())
+        watch_task.add_done_callback(report_watcher_exit)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the source watcher"""
+    global watch_task
+    if watch_task is not None:
+        watch_task.cancel()
+        try:
+            await watch_task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass  # Already reported by report_watcher_exit
+        watch_task = None
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint"""
@@ -500,75 +814,304 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Detailed health check"""
-    agent_status = "initialized" if agent_with_chat_history else "not initialized"
+    if agent_with_chat_history:
+        agent_status = "initialized"
+    elif agent_init_future is not None and not agent_init_future.done():
+        agent_status = "initializing"
+    else:
+        agent_status = "not initialized"
     return HealthResponse(
         status="healthy",
         message=f"API is running. Agent status: {agent_status}"
     )
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+@app.get("/ready")
+async def readiness(component: Optional[List[str]] = Query(None)):
     """
-    Send a message to Agent Easy and get a response
+    Per-component readiness with build timings
     
-    - **message**: The user's message/question
-    - **session_id**: Unique identifier for the conversation session (optional)
+    Returns 200 when every requested component (all by default) is ready and
+    503 otherwise, e.g. /ready?component=insurance_model admits prediction
+    traffic before the chat stack is warm.
     """
-    global agent_with_chat_history
+    names = component or list(READINESS_COMPONENTS)
+    unknown = [name for name in names if name not in component_status]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown component(s): {unknown}. Must be among: {list(READINESS_COMPONENTS)}"
+        )
     
-    # Initialize agent if not already done
+    ready = all(component_status[name]["state"] == "ready" for name in names)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "startup_seconds": startup_timing["total_seconds"],
+            "components": {name: dict(status) for name, status in component_status.items()}
+        }
+    )
+
+async def get_agent():
+    """Return the agent, waiting on the single in-flight build if it is not ready yet"""
     if agent_with_chat_history is None:
         try:
-            initialize_agent()
+            await asyncio.wrap_future(start_agent_initialization())
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to initialize agent: {str(e)}"
             )
+    return agent_with_chat_history
+
+def is_cacheable_answer(tools_used: List[str]) -> bool:
+    """True when the answer used no tools or only the retriever tools"""
+    return set(tools_used) <= CACHEABLE_TOOLS
+
+def is_first_turn(session_id: str) -> bool:
+    """True when the session has no prior history"""
+    try:
+        return len(chat_histories[session_id].messages) == 0
+    except KeyError:
+        return True
+
+async def lookup_cached_response(request: ChatRequest):
+    """
+    Check the response cache for a first-turn message
+    
+    Returns (cached response or None, query vector or None, cache generation).
+    A hit is recorded in the session history just like an agent answer.
+    """
+    cache = response_cache
+    if cache is None:
+        return None, None, None
+    # Session stores may hit the database; keep it off the event loop
+    if not await asyncio.get_running_loop().run_in_executor(agent_offload_executor, is_first_turn, request.session_id):
+        return None, None, None
+    
+    generation = cache.generation
+    vector = await cache.aembed(request.message)
+    response = cache.lookup(vector)
+    
+    if response is not None:
+        await get_session_history(request.session_id).aadd_messages([
+            HumanMessage(content=request.message),
+            AIMessage(content=response)
+        ])
+    
+    return response, vector, generation
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """
+    Send a message to Agent Easy and get a response
+    
+    - **message**: The user's message/question
+    - **session_id**: Unique identifier for the conversation session (optional)
+    - **trace**: Include the tool/LLM timing breakdown in the response (optional)
+    """
+    agent = await get_agent()
+    tracer = ChatTracer()
     
     try:
-        # Invoke the agent
-        result = agent_with_chat_history.invoke(
+        cached_response, vector, generation = await lookup_cached_response(request)
+        if cached_response is not None:
+            log_chat_trace("/chat", request.session_id, request.message, tracer, cached=True)
+            return ChatResponse(
+                response=cached_response,
+                session_id=request.session_id,
+                tools_used=[],
+                cached=True,
+                trace=tracer.summary() if request.trace else None
+            )
+        
+        # Invoke the agent without blocking the event loop
+        result = await agent.ainvoke(
             {"input": request.message},
-            config={"configurable": {"session_id": request.session_id}}
+            config={"configurable": {"session_id": request.session_id}, "callbacks": [agent_metrics, tracer]}
         )
         
+        if vector is not None and is_cacheable_answer(tracer.tools_used()):
+            response_cache.store(request.message, vector, result['output'], generation)
+        
+        log_chat_trace("/chat", request.session_id, request.message, tracer)
         return ChatResponse(
             response=result['output'],
             session_id=request.session_id,
-            tools_used=None  # Could extract from result if needed
+            tools_used=tracer.tools_used(),
+            trace=tracer.summary() if request.trace else None
         )
         
     except Exception as e:
+        log_chat_trace("/chat", request.session_id, request.message, tracer, error=str(e))
         raise HTTPException(
             status_code=500,
             detail=f"Error processing request: {str(e)}"
         )
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Send a message to Agent Easy and stream the response as server-sent events
+    
+    Uses the same session history as **/chat**. Events:
+    - **tool_start** / **tool_end**: a tool call began or finished
+    - **retrieval**: number of chunks a retriever tool returned
+    - **token**: a piece of the LLM response
+    - **end**: the complete response, with **tools_used** (and **trace** when requested)
+    - **error**: processing failed
+    """
+    agent = await get_agent()
+    
+    async def event_stream():
+        tool_runs = {}
+        root_run_id = None
+        tracer = ChatTracer()
+        
+        def end_event(response: str, cached: bool = False) -> Dict:
+            log_chat_trace("/chat/stream", request.session_id, request.message, tracer, cached=cached)
+            data = {
+                "response": response,
+                "session_id": request.session_id,
+                "tools_used": tracer.tools_used()
+            }
+            if cached:
+                data["cached"] = True
+            if request.trace:
+                data["trace"] = tracer.summary()
+            return data
+        
+        try:
+            cached_response, vector, generation = await lookup_cached_response(request)
+            if cached_response is not None:
+                yield format_sse("token", {"content": cached_response})
+                yield format_sse("end", end_event(cached_response, cached=True))
+                return
+            
+            async for event in agent.astream_events(
+                {"input": request.message},
+                config={"configurable": {"session_id": request.session_id}, "callbacks": [agent_metrics, tracer]},
+                version="v2"
+            ):
+                kind = event["event"]
+                
+                if root_run_id is None:
+                    root_run_id = event["run_id"]
+                
+                if kind == "on_tool_start":
+                    tool_runs[event["run_id"]] = event["name"]
+                    yield format_sse("tool_start", {"tool": event["name"]})
+                
+                elif kind == "on_tool_end":
+                    tool_runs.pop(event["run_id"], None)
+                    yield format_sse("tool_end", {"tool": event["name"]})
+                
+                elif kind == "on_retriever_end":
+                    # Attribute the retrieval to the tool that triggered it
+                    tool = next(
+                        (tool_runs[pid] for pid in event.get("parent_ids", []) if pid in tool_runs),
+                        event["name"]
+                    )
+                    documents = event["data"].get("output") or []
+                    yield format_sse("retrieval", {"tool": tool, "chunks": len(documents)})
+                
+                elif kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield format_sse("token", {"content": content})
+                
+                elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+                    output = event["data"].get("output") or {}
+                    if vector is not None and is_cacheable_answer(tracer.tools_used()):
+                        response_cache.store(request.message, vector, output.get("output", ""), generation)
+                    yield format_sse("end", end_event(output.get("output", "")))
+        
+        except Exception as e:
+            log_chat_trace("/chat/stream", request.session_id, request.message, tracer, error=str(e))
+            yield format_sse("error", {"detail": f"Error processing request: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss statistics for the response and embedding caches, and the retrievers' lexical fast path"""
+    return {
+        "response_cache": response_cache.stats() if response_cache is not None else {"enabled": False},
+        "embedding_cache": embedding_cache.stats() if embedding_cache is not None else {"enabled": False},
+        "retrievers": {name: retriever.stats() for name, retriever in retrievers.items()}
+    }
+
+@app.post("/admin/reindex")
+async def reindex(x_admin_key: Optional[str] = Header(None)):
+    """
+    Re-scan the script and process directories and update the indexes
+    
+    Only added or changed files are chunked and embedded; chunks of removed
+    files are dropped. Chats keep being served from the previous index
+    while this runs. Requires ADMIN_API_KEY in the X-Admin-Key header; with
+    no key configured the endpoint is disabled.
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_API_KEY to enable them")
+    if not secrets.compare_digest((x_admin_key or "").encode('utf-8'), ADMIN_API_KEY.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+    
+    await get_agent()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(agent_offload_executor, reindex_sources)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reindexing: {str(e)}")
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Request, agent stage, token, session and prediction metrics in Prometheus text format
+
+    Values belong to the worker process that serves the scrape; they are not
+    aggregated across workers.
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+# Session endpoints are plain functions: FastAPI runs them in its threadpool,
+# so session store reads and writes never block the event loop
+
 @app.get("/sessions/{session_id}", response_model=SessionResponse)
-async def get_session(session_id: str):
+def get_session(session_id: str):
     """Get information about a chat session"""
-    if session_id not in chat_histories:
+    try:
+        history = chat_histories[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = chat_histories[session_id]
     return SessionResponse(
         session_id=session_id,
         message_count=len(history.messages)
     )
 
 @app.delete("/sessions/{session_id}")
-async def delete_session(session_id: str):
+def delete_session(session_id: str):
     """Delete a chat session and its history"""
-    if session_id not in chat_histories:
+    try:
+        del chat_histories[session_id]
+    except KeyError:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del chat_histories[session_id]
+    if history_window is not None:
+        history_window.forget(session_id)
+    
     return {"message": f"Session {session_id} deleted successfully"}
 
 @app.get("/sessions")
-async def list_sessions():
-    """List all active sessions"""
+def list_sessions():
+    """List all active sessions, with session store statistics"""
     sessions = [
         {
             "session_id": sid,
@@ -576,7 +1119,7 @@ async def list_sessions():
         }
         for sid, history in chat_histories.items()
     ]
-    return {"sessions": sessions, "total": len(sessions)}
+    return {"sessions": sessions, "total": len(sessions), "store": chat_histories.stats()}
 
 @app.post("/insurance/predict", response_model=InsurancePredictionResponse)
 async def predict_insurance_charges(request: InsurancePredictionRequest):
@@ -590,49 +1133,27 @@ async def predict_insurance_charges(request: InsurancePredictionRequest):
     - **smoker**: Smoking status ("yes" or "no")
     - **region**: Region ("southwest", "southeast", "northwest", "northeast")
     """
-    global insurance_model, insurance_scaler
-    
     # Check if model is loaded
-    if insurance_model is None or insurance_scaler is None:
+    if insurance_predictor is None:
         raise HTTPException(
             status_code=503,
             detail="Insurance prediction model not available. Please check if the data file exists."
         )
     
     try:
-        # Convert categorical inputs to numeric (same as training)
-        sex_numeric = 1 if request.sex.lower() == "male" else 0
-        smoker_numeric = 1 if request.smoker.lower() == "yes" else 0
-        
-        region_mapping = {'southwest': 0, 'southeast': 1, 'northwest': 2, 'northeast': 3}
-        region_numeric = region_mapping.get(request.region.lower())
-        
-        if region_numeric is None:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid region. Must be one of: {list(region_mapping.keys())}"
+        try:
+            predicted_charge = insurance_predictor.predict_one(
+                request.age,
+                request.sex,
+                request.bmi,
+                request.children,
+                request.smoker,
+                request.region
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Create feature array
-        features = np.array([[
-            request.age,
-            sex_numeric,
-            request.bmi,
-            request.children,
-            smoker_numeric,
-            region_numeric
-        ]])
-        
-        # Scale the features
-        scaled_features = insurance_scaler.transform(features)
-        
-        # Add constant for intercept
-        scaled_features_with_const = np.insert(scaled_features[0], 0, 1)
-        
-        # Make prediction
-        prediction = insurance_model.predict(scaled_features_with_const)
-        predicted_charge = float(prediction[0])
-        
+        metrics.insurance_predictions_total.inc(endpoint="predict")
         return InsurancePredictionResponse(
             predicted_charges=round(predicted_charge, 2),
             input_parameters={
@@ -653,26 +1174,111 @@ async def predict_insurance_charges(request: InsurancePredictionRequest):
             detail=f"Error making prediction: {str(e)}"
         )
 
+@app.post("/insurance/predict/batch", response_model=InsuranceBatchPredictionResponse)
+async def predict_insurance_charges_batch(request: InsuranceBatchPredictionRequest):
+    """
+    Predict health insurance charges for many customers in one call
+    
+    All valid records are scored together as a single matrix operation.
+    Results are returned in input order; records that fail validation
+    carry an **error** instead of **predicted_charges**.
+    """
+    if insurance_predictor is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Insurance prediction model not available. Please check if the data file exists."
+        )
+    
+    if len(request.records) > INSURANCE_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large. Maximum is {INSURANCE_BATCH_MAX} records per request."
+        )
+    
+    try:
+        features, valid_indices, errors = encode_insurance_features(request.records)
+        
+        predictions = predict_charges(features) if valid_indices else np.empty(0)
+        charges = dict(zip(valid_indices, np.round(predictions, 2).tolist()))
+        metrics.insurance_predictions_total.inc(len(valid_indices), endpoint="batch")
+        
+        items = [
+            InsuranceBatchPredictionItem(
+                index=i,
+                predicted_charges=charges.get(i),
+                error=errors.get(i)
+            )
+            for i in range(len(request.records))
+        ]
+        
+        return InsuranceBatchPredictionResponse(
+            predictions=items,
+            total=len(items),
+            succeeded=len(valid_indices),
+            failed=len(errors)
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error making batch prediction: {str(e)}"
+        )
+
 @app.get("/insurance/model-info", response_model=ModelInfoResponse)
 async def get_model_info():
     """Get information about the insurance prediction model"""
     return ModelInfoResponse(
-        model_loaded=insurance_model is not None,
+        model_loaded=insurance_predictor is not None,
         training_samples=insurance_model_info.get('training_samples'),
         r_squared=insurance_model_info.get('r_squared'),
-        features=insurance_model_info.get('features')
+        features=insurance_model_info.get('features'),
+        artifact_version=insurance_model_info.get('artifact_version'),
+        source=insurance_model_info.get('source')
     )
 
 # ============================================================================
 # Run the application
 # ============================================================================
 
+def preload_shared_artifacts():
+    """
+    Build everything workers can share before they start
+    
+    Writes the memory-mapped index cache and the insurance model artifact,
+    so each worker only maps the indexes and loads a handful of coefficients
+    instead of embedding scripts or importing pandas/statsmodels itself.
+    """
+    print("Preloading shared indexes and model artifact...")
+    initialize_agent()
+    
+    artifact_path = os.getenv('INSURANCE_MODEL_ARTIFACT', './models/insurance_model')
+    data_file = os.getenv('HEALTH_INSURANCE_DATA', 'E:/MLCourse/Datasets/health_insurance.csv')
+    if not os.path.exists(artifact_path + '.json') and os.path.exists(data_file):
+        from train_insurance_model import train_and_save
+        manifest = train_and_save(data_file, artifact_path)
+        print(f"✓ Model artifact {manifest['version']} written to {artifact_path}")
+
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True  # Auto-reload on code changes
-    )
+    
+    workers = int(os.getenv('UVICORN_WORKERS', '1'))
+    
+    # python main.py --preload: build the shared files and exit (e.g. in an init container)
+    if "--preload" in sys.argv:
+        preload_shared_artifacts()
+        sys.exit(0)
+    
+    if workers > 1:
+        # Build once in this master process; the workers map the results
+        preload_shared_artifacts()
+        print(f"⚠️  /metrics is per worker: each scrape returns the counters of one of the {workers} workers, not the total")
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True  # Auto-reload on code changes
+        )
 
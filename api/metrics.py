@@ -0,0 +1,407 @@
+"""
+Prometheus metrics for the API
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format, an ASGI middleware timing every route and a LangChain callback that
+times the agent's internal stages (LLM calls, tools, retrievers) and counts
+token usage.
+
+Values are per process and nothing is shared between processes: with several
+uvicorn workers, each /metrics scrape returns only the numbers of the worker
+that happened to serve it, and they restart from zero when that worker does.
+Run one worker per scrape target, or scrape each worker separately, when
+totals matter.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from context_packing import CONTEXT_PACKED_EVENT
+
+# Request and stage latencies span sub-millisecond predictions to multi-second
+# agent turns
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+# ============================================================================
+# Metric Types
+# ============================================================================
+
+class Metric:
+    """A named family of samples, one per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) for every series"""
+        with self._lock:
+            return [("", _format_labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a function at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Report function() on every scrape (unlabelled gauges only)"""
+        if self.labelnames:
+            raise ValueError("set_function is only supported on gauges without labels")
+        self._function = function
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        if self._function is None:
+            return super().samples()
+        try:
+            return [("", "", float(self._function()))]
+        except Exception:
+            # A failing source (e.g. a locked database) skips the sample rather than the scrape
+            return []
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+
+        samples = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", _format_labels(self.labelnames, key, ("le", _format_value(bound))), cumulative))
+            samples.append(("_bucket", _format_labels(self.labelnames, key, ("le", "+Inf")), count))
+            samples.append(("_sum", _format_labels(self.labelnames, key), total))
+            samples.append(("_count", _format_labels(self.labelnames, key), count))
+        return samples
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """Holds metrics in registration order and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labelnames))
+
+    def histogram(self, name: str, description: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# ============================================================================
+# Service Metrics
+# ============================================================================
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to complete an HTTP response, including streamed bodies", ("method", "route")
+)
+agent_stage_duration_seconds = registry.histogram(
+    "agent_stage_duration_seconds", "Time spent in agent stages: llm calls, tools and retrievers", ("stage", "name")
+)
+agent_stage_errors_total = registry.counter(
+    "agent_stage_errors_total", "Agent stages that raised an error", ("stage", "name")
+)
+llm_tokens_total = registry.counter(
+    "llm_tokens_total", "Tokens reported by the LLM, by model and direction", ("model", "type")
+)
+retriever_context_tokens_total = registry.counter(
+    "retriever_context_tokens_total", "Tokens of retrieved chunks before and after context packing, by tool",
+    ("tool", "type")
+)
+chat_sessions = registry.gauge(
+    "chat_sessions", "Sessions currently held in the session store"
+)
+insurance_predictions_total = registry.counter(
+    "insurance_predictions_total", "Insurance charges predicted, by endpoint", ("endpoint",)
+)
+
+# ============================================================================
+# HTTP Middleware
+# ============================================================================
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing every HTTP request
+
+    Requests are labelled with the route template (/sessions/{session_id}),
+    not the raw path, so the number of series stays bounded. Timing ends when
+    the last body chunk is sent, so streamed responses are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label instead of one series per URL
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests_total.inc(method=method, route=route_path, status=status)
+            http_request_duration_seconds.observe(time.perf_counter() - started, method=method, route=route_path)
+
+# ============================================================================
+# Agent Stage Callback
+# ============================================================================
+
+# Runs whose end event never arrives (e.g. a client disconnect mid-stream)
+# are dropped oldest-first beyond this many
+MAX_OPEN_RUNS = 10000
+
+class AgentMetricsCallback(BaseCallbackHandler):
+    """
+    Times LLM calls, tool calls and retriever calls inside an agent turn
+
+    Pass one shared instance in the invoke config's callbacks so it reaches
+    every nested run. Retriever calls are labelled with the tool that made
+    them (Agent_lines, Agent_Process); tools with their own name (Calculator,
+    Tavily, InsuranceQuote); LLM calls with the model name.
+    """
+
+    # Recording is a few dict updates; run in the caller's thread instead of
+    # hopping to an executor for every event
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, stage: str, name: str):
+        with self._lock:
+            if len(self._runs) >= MAX_OPEN_RUNS:
+                self._runs.pop(next(iter(self._runs)))
+            self._runs[run_id] = (stage, name, time.perf_counter())
+
+    def _end(self, run_id: UUID, error: bool = False) -> Optional[str]:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        stage, name, started = run
+        agent_stage_duration_seconds.observe(time.perf_counter() - started, stage=stage, name=name)
+        if error:
+            agent_stage_errors_total.inc(stage=stage, name=name)
+        return name
+
+    def _name_of(self, run_id: Optional[UUID]) -> Optional[str]:
+        with self._lock:
+            run = self._runs.get(run_id) if run_id is not None else None
+        return run[1] if run is not None else None
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", model_name(serialized, metadata))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", model_name(serialized, metadata))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._end(run_id) or "unknown"
+        input_tokens, output_tokens = token_usage(response)
+        if input_tokens:
+            llm_tokens_total.inc(input_tokens, model=model, type="input")
+        if output_tokens:
+            llm_tokens_total.inc(output_tokens, model=model, type="output")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    # Tools
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    # Retrievers
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        # Retriever tools call their retriever directly, so the parent run is the tool
+        name = self._name_of(parent_run_id) or kwargs.get("name") or (serialized or {}).get("name") or "retriever"
+        self._start(run_id, "retriever", name)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        if name != CONTEXT_PACKED_EVENT:
+            return
+        # Sent from inside the retriever run, which is labelled with its tool
+        tool = self._name_of(run_id) or "retriever"
+        retriever_context_tokens_total.inc(data["retrieved_tokens"], tool=tool, type="retrieved")
+        retriever_context_tokens_total.inc(data["packed_tokens"], tool=tool, type="packed")
+
+def model_name(serialized: Optional[Dict], metadata: Optional[Dict]) -> str:
+    """Model name of an LLM run, from LangChain's run metadata or the serialized model"""
+    model = (metadata or {}).get("ls_model_name")
+    if not model and serialized:
+        kwargs = serialized.get("kwargs") or {}
+        model = kwargs.get("model_name") or kwargs.get("model") or serialized.get("name")
+    return model or "unknown"
+
+def token_usage(response) -> Tuple[int, int]:
+    """(input, output) tokens from an LLMResult, from message usage metadata or OpenAI's llm_output"""
+    input_tokens = output_tokens = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                found = True
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not found:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return input_tokens, output_tokens
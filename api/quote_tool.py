@@ -0,0 +1,106 @@
+"""
+Insurance quote tool for the chat agent
+Calls the in-memory insurance predictor directly with structured arguments,
+so a quote costs microseconds instead of an HTTP hop or an LLM reasoning loop
+"""
+
+from typing import Callable, List, Literal, Optional
+
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from insurance_predictor import REGION_MAPPING, LinearInsurancePredictor
+
+# Used when the customer has not given a value; close to the training data mean
+DEFAULT_BMI = 30.0
+DEFAULT_CHILDREN = 0
+
+QUOTE_TOOL_DESCRIPTION = (
+    "Get an estimated annual health insurance premium for a customer from LivEasy's pricing model. "
+    "Use this whenever a customer asks how much insurance would cost them. age and smoker are "
+    "required; pass sex, bmi, children and region if the customer mentioned them. The result says "
+    "which values were assumed, so you can offer a more precise quote if they share more details."
+)
+
+UNAVAILABLE_MESSAGE = (
+    "The pricing model is not available right now, so no quote can be given. "
+    "Apologize and offer to follow up with an exact quote later; do not guess a number."
+)
+
+class InsuranceQuoteInput(BaseModel):
+    age: int = Field(..., ge=18, le=100, description="Customer age in years")
+    smoker: Literal["yes", "no"] = Field(..., description="Whether the customer smokes")
+    sex: Optional[Literal["male", "female"]] = Field(None, description="Customer sex, if known")
+    bmi: Optional[float] = Field(None, gt=10, lt=80, description="Body mass index, if known")
+    children: Optional[int] = Field(None, ge=0, le=10, description="Number of children covered, if known")
+    region: Optional[Literal["southwest", "southeast", "northwest", "northeast"]] = Field(
+        None, description="US region the customer lives in, if known"
+    )
+
+def quote_charges(predictor: LinearInsurancePredictor, age: int, smoker: str,
+                  sex: Optional[str] = None, bmi: Optional[float] = None,
+                  children: Optional[int] = None, region: Optional[str] = None):
+    """
+    Predict annual charges, filling unknown inputs
+
+    Unknown sex or region are averaged over their categories rather than
+    guessed. Returns (charges, list of assumptions made).
+    """
+    assumptions: List[str] = []
+    if bmi is None:
+        bmi = DEFAULT_BMI
+        assumptions.append(f"BMI {DEFAULT_BMI}")
+    if children is None:
+        children = DEFAULT_CHILDREN
+        assumptions.append(f"{DEFAULT_CHILDREN} children")
+
+    sexes = [sex] if sex else ["male", "female"]
+    regions = [region] if region else list(REGION_MAPPING.keys())
+    if not sex:
+        assumptions.append("average of male and female")
+    if not region:
+        assumptions.append("average across regions")
+
+    charges = [
+        predictor.predict_one(age, s, bmi, children, smoker, r)
+        for s in sexes
+        for r in regions
+    ]
+    return sum(charges) / len(charges), assumptions
+
+def create_insurance_quote_tool(get_predictor: Callable[[], Optional[LinearInsurancePredictor]]) -> StructuredTool:
+    """
+    Build the InsuranceQuote tool
+
+    get_predictor is called on every use, so the tool picks up a model that
+    finishes loading after the agent was built, and degrades to a clear
+    message while none is available.
+    """
+    def insurance_quote(age: int, smoker: str, sex: Optional[str] = None, bmi: Optional[float] = None,
+                        children: Optional[int] = None, region: Optional[str] = None) -> str:
+        predictor = get_predictor()
+        if predictor is None:
+            return UNAVAILABLE_MESSAGE
+
+        charges, assumptions = quote_charges(predictor, age, smoker, sex, bmi, children, region)
+        quote = f"Estimated annual premium: ${charges:,.2f} (about ${charges / 12:,.2f} per month)."
+        if assumptions:
+            quote += f" Assumed: {', '.join(assumptions)}."
+        return quote
+
+    async def ainsurance_quote(**kwargs) -> str:
+        # Pure arithmetic; no need to hop to a worker thread
+        return insurance_quote(**kwargs)
+
+    return StructuredTool.from_function(
+        func=insurance_quote,
+        coroutine=ainsurance_quote,
+        name="InsuranceQuote",
+        description=QUOTE_TOOL_DESCRIPTION,
+        args_schema=InsuranceQuoteInput,
+        # Out-of-range arguments go back to the agent instead of failing the turn
+        handle_validation_error=(
+            "Invalid quote arguments: age must be 18-100, smoker yes/no, sex male/female, "
+            "region southwest/southeast/northwest/northeast. Ask the customer and try again."
+        ),
+    )
@@ -0,0 +1,133 @@
+"""
+Semantic response cache for first-turn chat questions
+Answers repeated opening questions ("who are you", "how do claims work")
+from memory when a new query's embedding is close enough to a cached one
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class SemanticResponseCache:
+    """
+    Embedding-keyed response cache with LRU size bound and TTL
+
+    Lookups compare the normalized query embedding against every cached
+    entry with one matrix-vector product.
+    """
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.95,
+                 max_entries: int = 500, ttl_seconds: float = 3600):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (query, response, unit vector, created_at)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_key = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[int] = []
+        self._lock = threading.Lock()
+
+        # Bumped by clear(); responses computed before an invalidation are not stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm > 0 else array
+
+    def _evict_expired(self, now: float):
+        """Drop entries older than the TTL (lock must be held)"""
+        if self.ttl_seconds <= 0:
+            return
+        expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self.evictions += len(expired)
+            self._matrix = None
+
+    def _search_matrix(self):
+        """Stacked embeddings of all entries, rebuilt only after changes (lock must be held)"""
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries.keys())
+            self._matrix = (
+                np.stack([self._entries[key][2] for key in self._matrix_keys])
+                if self._matrix_keys else None
+            )
+        return self._matrix
+
+    async def aembed(self, query: str) -> np.ndarray:
+        """Embed and normalize a query"""
+        return self._normalize(await self.embeddings.aembed_query(query))
+
+    def lookup(self, vector: np.ndarray) -> Optional[str]:
+        """Return the cached response closest to the query if it clears the threshold"""
+        with self._lock:
+            self._evict_expired(time.time())
+            matrix = self._search_matrix()
+
+            if matrix is not None:
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = self._matrix_keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][1]
+
+            self.misses += 1
+            return None
+
+    def store(self, query: str, vector: np.ndarray, response: str, generation: int):
+        """
+        Cache a response, evicting the least recently used entries beyond the limit
+
+        generation is the value read before the response was computed; if the
+        cache was invalidated in the meantime the response is discarded.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[self._next_key] = (query, response, vector, time.time())
+            self._next_key += 1
+            while self.max_entries > 0 and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self):
+        """Invalidate every entry, e.g. after the indexes are rebuilt"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
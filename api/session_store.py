@@ -0,0 +1,322 @@
+"""
+Session stores for per-session chat histories
+Bounds the number of live sessions with LRU eviction and an idle TTL.
+The in-memory store is per process; the SQLite store can be shared by
+several uvicorn workers (or pods on a shared volume).
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+class InMemorySessionStore:
+    """
+    Process-local session store with LRU + idle TTL eviction
+
+    Sessions are kept in last-access order, so both the least recently used
+    and the longest idle sessions sit at the front of the queue.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 86400,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._sessions: "OrderedDict[str, Tuple[ChatMessageHistory, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions_lru = 0
+        self.evictions_ttl = 0
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_access > self.ttl_seconds
+
+    def _evict_expired(self, now: float):
+        """Drop idle sessions from the front of the queue (lock must be held)"""
+        while self._sessions:
+            session_id, (_, last_access) = next(iter(self._sessions.items()))
+            if not self._is_expired(last_access, now):
+                break
+            del self._sessions[session_id]
+            self.evictions_ttl += 1
+
+    def get_history(self, session_id: str) -> ChatMessageHistory:
+        """Get or create the history for a session and mark it as recently used"""
+        now = self.clock()
+        with self._lock:
+            self._evict_expired(now)
+
+            entry = self._sessions.pop(session_id, None)
+            history = entry[0] if entry else ChatMessageHistory()
+            self._sessions[session_id] = (history, now)
+
+            while self.max_sessions > 0 and len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions_lru += 1
+
+            return history
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            self._evict_expired(self.clock())
+            return session_id in self._sessions
+
+    def __getitem__(self, session_id: str) -> ChatMessageHistory:
+        """Look up a session without refreshing its position"""
+        with self._lock:
+            self._evict_expired(self.clock())
+            return self._sessions[session_id][0]
+
+    def __delitem__(self, session_id: str):
+        with self._lock:
+            del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired(self.clock())
+            return len(self._sessions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([session_id for session_id, _ in self.items()])
+
+    def items(self) -> List[Tuple[str, ChatMessageHistory]]:
+        """Snapshot of live sessions, least recently used first"""
+        with self._lock:
+            self._evict_expired(self.clock())
+            return [(session_id, history) for session_id, (history, _) in self._sessions.items()]
+
+    def stats(self) -> Dict:
+        """Session counts, eviction counters and approximate memory usage"""
+        sessions = self.items()
+        messages = 0
+        memory_bytes = 0
+        for session_id, history in sessions:
+            memory_bytes += sys.getsizeof(session_id)
+            for message in history.messages:
+                messages += 1
+                memory_bytes += sys.getsizeof(message) + sys.getsizeof(message.content)
+
+        return {
+            "backend": "memory",
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "messages": messages,
+            "memory_bytes": memory_bytes,
+            "evictions_lru": self.evictions_lru,
+            "evictions_ttl": self.evictions_ttl
+        }
+
+# ============================================================================
+# SQLite Backend
+# ============================================================================
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions(last_access);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+"""
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """Chat history for one session, stored in the shared SQLite database"""
+
+    def __init__(self, store: "SQLiteSessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Messages of the session; empty once it has been idle longer than the TTL"""
+        rows = self.store._connection().execute(
+            "SELECT m.message FROM messages m JOIN sessions s ON s.session_id = m.session_id "
+            "WHERE m.session_id = ? AND s.last_access >= ? ORDER BY m.id",
+            (self.session_id, self.store._expiry_cutoff())
+        ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in rows])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """
+        Append all messages of a turn in a single transaction
+
+        Also marks the session as recently used and, for a new or expired
+        session, applies the store's eviction rules first. aadd_messages runs
+        this in the executor, so no database work happens on the event loop.
+        """
+        rows = [(self.session_id, json.dumps(message_to_dict(m))) for m in messages]
+        conn = self.store._connection()
+        with conn:
+            self.store._touch(conn, self.session_id)
+            conn.executemany("INSERT INTO messages (session_id, message) VALUES (?, ?)", rows)
+
+    def clear(self) -> None:
+        conn = self.store._connection()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (self.session_id,))
+
+class SQLiteSessionStore:
+    """
+    Session store backed by a SQLite database in WAL mode
+
+    Every worker process opens the same file, so a conversation continues
+    no matter which worker serves the next request. Same interface and
+    eviction rules as InMemorySessionStore.
+    """
+
+    def __init__(self, db_path: str = "./sessions.db", max_sessions: int = 10000, ttl_seconds: float = 86400,
+                 clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # Wall clock: last_access values are compared across processes
+        self.clock = clock
+        self.evictions_lru = 0
+        self.evictions_ttl = 0
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SQLITE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections must not be shared across threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _expiry_cutoff(self) -> float:
+        return self.clock() - self.ttl_seconds if self.ttl_seconds > 0 else float("-inf")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop idle sessions, then the least recently used beyond the limit (inside a transaction)"""
+        if self.ttl_seconds > 0:
+            expired = conn.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ?", (self._expiry_cutoff(),)
+            ).fetchall()
+            self._delete_sessions(conn, expired)
+            self.evictions_ttl += len(expired)
+
+        if self.max_sessions > 0:
+            overflow = conn.execute(
+                "SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                (self.max_sessions,)
+            ).fetchall()
+            self._delete_sessions(conn, overflow)
+            self.evictions_lru += len(overflow)
+
+    @staticmethod
+    def _delete_sessions(conn: sqlite3.Connection, rows: List[Tuple[str]]):
+        conn.executemany("DELETE FROM messages WHERE session_id = ?", rows)
+        conn.executemany("DELETE FROM sessions WHERE session_id = ?", rows)
+
+    def _touch(self, conn: sqlite3.Connection, session_id: str):
+        """
+        Mark a live session as recently used, or start it afresh (inside a transaction)
+
+        An expired session is deleted before it is recreated, so its old
+        messages never come back.
+        """
+        now = self.clock()
+        touched = conn.execute(
+            "UPDATE sessions SET last_access = ? WHERE session_id = ? AND last_access >= ?",
+            (now, session_id, self._expiry_cutoff())
+        ).rowcount
+        # Only new sessions can push the store over its limits
+        if not touched:
+            expired = conn.execute("SELECT session_id FROM sessions WHERE session_id = ?", (session_id,)).fetchall()
+            self._delete_sessions(conn, expired)
+            self.evictions_ttl += len(expired)
+            conn.execute("INSERT INTO sessions (session_id, last_access) VALUES (?, ?)", (session_id, now))
+            self._evict(conn)
+
+    def get_history(self, session_id: str) -> SQLiteChatMessageHistory:
+        """
+        History handle for a session; does no I/O
+
+        RunnableWithMessageHistory calls this synchronously on the event
+        loop. The session is created and marked as used when a turn's
+        messages are added.
+        """
+        return SQLiteChatMessageHistory(self, session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ? AND last_access >= ?",
+            (session_id, self._expiry_cutoff())
+        ).fetchone()
+        return row is not None
+
+    def __getitem__(self, session_id: str) -> SQLiteChatMessageHistory:
+        """Look up a session without refreshing its position"""
+        if session_id not in self:
+            raise KeyError(session_id)
+        return SQLiteChatMessageHistory(self, session_id)
+
+    def __delitem__(self, session_id: str):
+        conn = self._connection()
+        with conn:
+            if conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount == 0:
+                raise KeyError(session_id)
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_access >= ?", (self._expiry_cutoff(),)
+        ).fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([session_id for session_id, _ in self.items()])
+
+    def items(self) -> List[Tuple[str, SQLiteChatMessageHistory]]:
+        """Snapshot of live sessions, least recently used first"""
+        rows = self._connection().execute(
+            "SELECT session_id FROM sessions WHERE last_access >= ? ORDER BY last_access",
+            (self._expiry_cutoff(),)
+        ).fetchall()
+        return [(row[0], SQLiteChatMessageHistory(self, row[0])) for row in rows]
+
+    def stats(self) -> Dict:
+        """Session counts, eviction counters (this process) and database size"""
+        conn = self._connection()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "sessions": len(self),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "messages": conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0],
+            "disk_bytes": page_count * page_size,
+            "evictions_lru": self.evictions_lru,
+            "evictions_ttl": self.evictions_ttl
+        }
+
+def create_session_store(backend: str, max_sessions: int, ttl_seconds: float, db_path: str = "./sessions.db"):
+    """Build the session store selected by configuration"""
+    backend = backend.strip().lower()
+    if backend == "memory":
+        return InMemorySessionStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteSessionStore(db_path=db_path, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}'. Must be 'memory' or 'sqlite'")
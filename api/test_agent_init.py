@@ -0,0 +1,105 @@
+"""
+Tests for single-flight agent initialization and /ready
+Replaces the agent build with a slow stub, so no index, server or OpenAI
+key is needed.
+Run with: python -m pytest test_agent_init.py
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import main
+
+BUILD_SECONDS = 0.2
+
+class StubBuild:
+    """Stand-in for initialize_agent: counts builds, optionally fails the first ones"""
+
+    def __init__(self, failures: int = 0):
+        self.builds = 0
+        self.failures = failures
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.builds += 1
+            attempt = self.builds
+        for name in main.AGENT_COMPONENTS:
+            main.mark_component(name, "building")
+        self.release.wait(10)
+        time.sleep(BUILD_SECONDS)
+        if attempt <= self.failures:
+            raise RuntimeError("index build failed")
+        for name in main.AGENT_COMPONENTS:
+            main.mark_component(name, "ready", BUILD_SECONDS)
+        main.agent_with_chat_history = f"agent from build {attempt}"
+        return main.agent_with_chat_history
+
+@pytest.fixture
+def stub_build(monkeypatch):
+    """Fresh, unbuilt agent state with the stub build installed"""
+    monkeypatch.setattr(main, "agent_with_chat_history", None)
+    monkeypatch.setattr(main, "agent_init_future", None)
+    monkeypatch.setattr(main, "component_status", {
+        name: {"state": "pending", "seconds": None, "error": None} for name in main.READINESS_COMPONENTS
+    })
+    build = StubBuild()
+    monkeypatch.setattr(main, "initialize_agent", build)
+    return build
+
+def test_concurrent_callers_share_one_build(stub_build):
+    async def callers():
+        return await asyncio.gather(*(main.get_agent() for _ in range(20)))
+
+    agents = asyncio.run(callers())
+    assert stub_build.builds == 1
+    assert set(agents) == {"agent from build 1"}
+
+    # Later callers get the finished agent without another build
+    assert asyncio.run(main.get_agent()) == "agent from build 1"
+    assert stub_build.builds == 1
+
+def test_failed_build_is_retried(stub_build):
+    stub_build.failures = 1
+
+    with pytest.raises(main.HTTPException) as error:
+        asyncio.run(main.get_agent())
+    assert error.value.status_code == 500
+    assert "index build failed" in error.value.detail
+    assert main.component_status["sales_index"]["state"] == "failed"
+
+    assert asyncio.run(main.get_agent()) == "agent from build 2"
+    assert stub_build.builds == 2
+    assert main.component_status["sales_index"]["state"] == "ready"
+
+def test_ready_reports_503_until_built(stub_build):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            stub_build.release.clear()
+            future = main.start_agent_initialization()
+            before = await client.get("/ready", params={"component": list(main.AGENT_COMPONENTS)})
+
+            stub_build.release.set()
+            await asyncio.wrap_future(future)
+            after = await client.get("/ready", params={"component": list(main.AGENT_COMPONENTS)})
+            return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before.status_code == 503 and before.json()["ready"] is False
+    assert before.json()["components"]["tools"]["state"] in ("pending", "building")
+    assert after.status_code == 200 and after.json()["ready"] is True
+
+def test_ready_rejects_unknown_components(stub_build):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/ready", params={"component": "search_index"})
+
+    assert asyncio.run(request()).status_code == 400
@@ -0,0 +1,135 @@
+"""
+Accuracy and latency tests for the local Calculator tool
+Runs a corpus of typical premium and discount calculations through the
+AST evaluator, checks worded questions go to the LLM fallback and unsafe
+input is rejected. No server or OpenAI key is needed.
+Run with: python -m pytest test_calculator.py
+"""
+
+import asyncio
+import time
+
+from calculator import EvaluationError, ExpressionError, LocalCalculator, evaluate_expression
+
+# (expression as the agent sends it, expected value)
+CORPUS = [
+    ("1200 * (1 - 10%)", 1080.0),
+    ("10% off $1200", 1080.0),
+    ("15% of 2,400", 360.0),
+    ("$1,200.50 * 12", 14406.0),
+    ("350 * 12", 4200),
+    ("4200 / 12", 350.0),
+    ("(350 - 50) * 12", 3600),
+    ("1200 * 0.85", 1020.0),
+    ("1200 - 1200 * 15%", 1020.0),
+    ("2500 + 2500 * 18%", 2950.0),
+    ("13453.88 / 12", 1121.1566666667),
+    ("13453.88 * 1.05", 14126.574),
+    ("round(13453.88 / 12, 2)", 1121.16),
+    ("1000 * (1 + 0.05)^10", 1628.894626777442),
+    ("1000 * (1 + 5%)**10", 1628.894626777442),
+    ("500 + 0.2 * (4000 - 500)", 1200.0),
+    ("max(0, 3000 - 1000) * 80%", 1600.0),
+    ("min(5000, 12000 * 0.3)", 3600.0),
+    ("250 * 40 + 23000", 33000),
+    ("(29 * 250 + 20 * 300) * 1.1", 14575.0),
+    ("12 * 99.99", 1199.88),
+    ("100 - 100 * 2.5%", 97.5),
+    ("7 % 3", 1),
+    ("-(1200 - 1500)", 300),
+    ("sqrt(144) * 100", 1200.0),
+]
+
+NATURAL_LANGUAGE = [
+    "What is the monthly cost if the annual premium is 1200?",
+    "how much do I save with a 10 percent discount on 1200 dollars",
+    "premium for a family of four",
+]
+
+UNSAFE = [
+    "__import__('os').system('echo hi')",
+    "(1).__class__",
+    "open('/etc/passwd')",
+    "[x for x in range(10)]",
+    "lambda: 1",
+    "premium * 12",
+]
+
+MAX_LOCAL_MS = 1.0
+
+class StubFallback:
+    """Stands in for LLMMathChain and records what it was asked"""
+
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query: str) -> str:
+        self.queries.append(query)
+        return "Answer: fallback"
+
+    async def arun(self, query: str) -> str:
+        return self.run(query)
+
+def test_corpus_accuracy():
+    """Every corpus entry evaluates locally to the expected value"""
+    for expression, expected in CORPUS:
+        value = evaluate_expression(expression)
+        assert abs(value - expected) < 1e-6, f"{expression} = {value}, expected {expected}"
+
+def test_corpus_latency():
+    """Local evaluation stays well under a millisecond per call"""
+    iterations = 50
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for expression, _ in CORPUS:
+            evaluate_expression(expression)
+    per_call_ms = (time.perf_counter() - start) * 1000 / (iterations * len(CORPUS))
+    assert per_call_ms < MAX_LOCAL_MS, f"{per_call_ms:.3f}ms per expression"
+
+def test_expressions_never_reach_fallback():
+    fallback = StubFallback()
+    calculator = LocalCalculator(fallback=fallback)
+    for expression, _ in CORPUS:
+        assert calculator.run(expression).startswith("Answer: ")
+    assert fallback.queries == []
+    assert calculator.stats() == {"local": len(CORPUS), "fallback": 0}
+
+def test_natural_language_uses_fallback():
+    fallback = StubFallback()
+    calculator = LocalCalculator(fallback=fallback)
+    for question in NATURAL_LANGUAGE:
+        assert calculator.run(question) == "Answer: fallback"
+        assert asyncio.run(calculator.arun(question)) == "Answer: fallback"
+    assert fallback.queries == [q for q in NATURAL_LANGUAGE for _ in range(2)]
+
+def test_unsafe_input_rejected():
+    for expression in UNSAFE:
+        try:
+            evaluate_expression(expression)
+        except EvaluationError:
+            raise AssertionError(f"{expression} was evaluated")
+        except ExpressionError:
+            continue
+        raise AssertionError(f"{expression} was accepted")
+
+def test_invalid_math_answered_locally():
+    """Division by zero and runaway exponents are reported without an LLM call"""
+    fallback = StubFallback()
+    calculator = LocalCalculator(fallback=fallback)
+    assert calculator.run("1200 / 0").startswith("Error: ")
+    assert calculator.run("9**9**9").startswith("Error: ")
+    assert calculator.run("(-8)**0.5").startswith("Error: ")
+    assert fallback.queries == []
+
+def test_complex_results_rejected():
+    for expression in ("(-8)**0.5", "(-1)**(1/3)", "-2**0.5 + (-2)**0.5"):
+        try:
+            value = evaluate_expression(expression)
+        except EvaluationError:
+            continue
+        raise AssertionError(f"{expression} evaluated to {value!r}")
+
+def test_result_formatting():
+    calculator = LocalCalculator()
+    assert calculator.run("0.1 + 0.2") == "Answer: 0.3"
+    assert calculator.run("350 * 12") == "Answer: 4200"
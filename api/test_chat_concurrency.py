@@ -0,0 +1,99 @@
+"""
+Concurrency test: /insurance/predict latency must stay flat while many
+slow /chat requests are in flight on the same event loop
+
+Runs in-process against the FastAPI app with a stub agent that takes
+CHAT_SECONDS per turn, so no server or OpenAI key is needed.
+Run with: python -m pytest test_chat_concurrency.py
+"""
+
+import asyncio
+import time
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+import main
+from insurance_predictor import LinearInsurancePredictor
+
+CHAT_SECONDS = 0.5
+CONCURRENT_CHATS = 20
+PREDICTIONS = 50
+MAX_PREDICT_SECONDS = 0.1
+
+PREDICT_PAYLOAD = {
+    "age": 29,
+    "sex": "male",
+    "bmi": 20.0,
+    "children": 0,
+    "smoker": "no",
+    "region": "southeast"
+}
+
+def slow_agent_sync(inputs):
+    """What a blocking OpenAI round trip looks like to the event loop"""
+    time.sleep(CHAT_SECONDS)
+    return {"output": f"echo: {inputs['input']}"}
+
+async def slow_agent_async(inputs):
+    """Async round trip, plus a synchronous tool offloaded to the executor"""
+    await asyncio.sleep(CHAT_SECONDS / 2)
+    await asyncio.get_running_loop().run_in_executor(None, time.sleep, CHAT_SECONDS / 2)
+    return {"output": f"echo: {inputs['input']}"}
+
+def install_stubs():
+    """Replace the agent and insurance model with in-memory stand-ins"""
+    main.agent_with_chat_history = RunnableWithMessageHistory(
+        RunnableLambda(slow_agent_sync, afunc=slow_agent_async),
+        main.get_session_history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+    main.insurance_predictor = LinearInsurancePredictor([250.0, -100.0, 300.0, 500.0, 23000.0, -300.0], -2000.0)
+
+async def run_scenario():
+    """Fire CONCURRENT_CHATS chats, then time predictions while they run"""
+    install_stubs()
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        chat_start = time.perf_counter()
+        chats = [
+            asyncio.create_task(client.post("/chat", json={"message": f"hi {i}", "session_id": f"concurrency-{i}"}))
+            for i in range(CONCURRENT_CHATS)
+        ]
+
+        # Let the chats get going before measuring
+        await asyncio.sleep(0.05)
+
+        latencies = []
+        for _ in range(PREDICTIONS):
+            start = time.perf_counter()
+            response = await client.post("/insurance/predict", json=PREDICT_PAYLOAD)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+        predict_done = time.perf_counter() - chat_start
+
+        chat_responses = await asyncio.gather(*chats)
+        chat_elapsed = time.perf_counter() - chat_start
+
+    return latencies, predict_done, chat_responses, chat_elapsed
+
+def test_prediction_latency_flat_during_chats():
+    """Predictions are not queued behind in-flight chats"""
+    latencies, predict_done, chat_responses, _ = asyncio.run(run_scenario())
+
+    assert all(r.status_code == 200 for r in chat_responses)
+    assert max(latencies) < MAX_PREDICT_SECONDS, f"max predict latency {max(latencies):.3f}s"
+
+    # All predictions finished while the chats were still in flight
+    assert predict_done < CHAT_SECONDS, f"predictions finished after {predict_done:.3f}s"
+
+def test_chats_run_concurrently():
+    """Concurrent chats overlap instead of running back to back"""
+    _, _, chat_responses, chat_elapsed = asyncio.run(run_scenario())
+
+    assert [r.json()["response"] for r in chat_responses] == [f"echo: hi {i}" for i in range(CONCURRENT_CHATS)]
+    assert chat_elapsed < CHAT_SECONDS * CONCURRENT_CHATS / 2
@@ -0,0 +1,125 @@
+"""
+Tests for /chat/stream (server-sent events)
+Runs in-process with a stub agent that calls a retriever tool and streams
+its answer from a fake chat model, so no server or OpenAI key is needed.
+Run with: python -m pytest test_chat_stream.py
+"""
+
+import asyncio
+import json
+import uuid
+from typing import Dict, List, Tuple
+
+import httpx
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_core.tools import StructuredTool
+
+import main
+from bench_stubs import HashingEmbeddings
+from response_cache import SemanticResponseCache
+
+ANSWER = "Claims are filed within thirty days."
+
+def lookup_tool(query: str) -> str:
+    """Stand-in for Agent_Process"""
+    return "File a claim within thirty days."
+
+class StubAgent:
+    """One tool call, then the answer streamed token by token; counts turns"""
+
+    def __init__(self):
+        self.calls = 0
+        self.tool = StructuredTool.from_function(lookup_tool, name="Agent_Process")
+
+    async def ainvoke(self, inputs, config):
+        self.calls += 1
+        await self.tool.ainvoke({"query": inputs["input"]}, config)
+        model = GenericFakeChatModel(messages=iter([AIMessage(content=ANSWER)]))
+        message = await model.ainvoke(inputs["input"], config)
+        return {"output": message.content}
+
+def install_stubs(cache: bool = False) -> StubAgent:
+    stub = StubAgent()
+    main.agent_with_chat_history = RunnableWithMessageHistory(
+        RunnableLambda(lambda inputs: None, afunc=stub.ainvoke),
+        main.get_session_history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+    main.response_cache = SemanticResponseCache(HashingEmbeddings(), threshold=0.95) if cache else None
+    return stub
+
+def parse_sse(body: str) -> List[Tuple[str, Dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def stream(message: str, session_id: str, **extra) -> List[Tuple[str, Dict]]:
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            response = await client.post("/chat/stream", json={"message": message, "session_id": session_id, **extra})
+            assert response.headers["content-type"].startswith("text/event-stream")
+            return response.text
+    return parse_sse(asyncio.run(send()))
+
+def test_events_arrive_in_order():
+    install_stubs()
+    events = stream("how do claims work", uuid.uuid4().hex)
+    kinds = [kind for kind, _ in events]
+
+    assert kinds[:2] == ["tool_start", "tool_end"]
+    assert events[0][1] == {"tool": "Agent_Process"}
+    assert kinds[-1] == "end"
+    tokens = kinds[2:-1]
+    assert len(tokens) > 1 and set(tokens) == {"token"}
+    assert "".join(data["content"] for kind, data in events if kind == "token") == ANSWER
+
+def test_end_payload_and_history():
+    install_stubs()
+    session_id = uuid.uuid4().hex
+    events = stream("how do claims work", session_id, trace=True)
+
+    end = events[-1][1]
+    assert end["response"] == ANSWER
+    assert end["session_id"] == session_id
+    assert end["tools_used"] == ["Agent_Process"]
+    assert "cached" not in end
+    assert [step["name"] for step in end["trace"]["steps"] if step["type"] == "tool"] == ["Agent_Process"]
+
+    # The turn is in the session history once the stream has finished
+    history = main.chat_histories[session_id].messages
+    assert [message.content for message in history] == ["how do claims work", ANSWER]
+
+def test_cache_hit_streams_the_cached_answer():
+    stub = install_stubs(cache=True)
+    stream("how do claims work", uuid.uuid4().hex)
+
+    session_id = uuid.uuid4().hex
+    events = stream("how do claims work", session_id)
+    assert stub.calls == 1
+    assert [kind for kind, _ in events] == ["token", "end"]
+    assert events[0][1] == {"content": ANSWER}
+    assert events[1][1]["cached"] is True and events[1][1]["tools_used"] == []
+    assert len(main.chat_histories[session_id].messages) == 2
+
+def test_error_event():
+    install_stubs()
+
+    async def failing(inputs, config):
+        raise RuntimeError("model unavailable")
+
+    main.agent_with_chat_history = RunnableWithMessageHistory(
+        RunnableLambda(lambda inputs: None, afunc=failing),
+        main.get_session_history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+    events = stream("hello", uuid.uuid4().hex)
+    assert events[-1][0] == "error"
+    assert "model unavailable" in events[-1][1]["detail"]
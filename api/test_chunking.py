@@ -0,0 +1,62 @@
+"""
+Tests for the line and word-window chunkers
+Checks line splitting, the window/overlap arithmetic and the settings read
+from the environment. The semantic chunker is not exercised, so no OpenAI
+key is needed.
+Run with: python -m pytest test_chunking.py
+"""
+
+import pytest
+
+from bench_stubs import HashingEmbeddings
+from chunking import LineTextSplitter, TokenWindowTextSplitter, create_text_splitter, get_chunking_config
+
+def words(n: int) -> str:
+    return " ".join(f"w{i}" for i in range(n))
+
+def test_line_splitter_drops_blank_lines_and_strips():
+    text = "  Hello, this is LivEasy.  \n\n\tHow can I help?\n   \nBye\n"
+    assert LineTextSplitter().split_text(text) == ["Hello, this is LivEasy.", "How can I help?", "Bye"]
+    assert LineTextSplitter().split_text("\n \n") == []
+
+def test_windows_overlap_and_cover_every_word():
+    chunks = TokenWindowTextSplitter(window_tokens=4, overlap_tokens=1).split_text(words(10))
+    assert chunks == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+
+def test_no_window_only_repeats_the_previous_overlap():
+    splitter = TokenWindowTextSplitter(window_tokens=4, overlap_tokens=2)
+    # Words 4-5 are already at the end of the second window
+    assert splitter.split_text(words(6)) == ["w0 w1 w2 w3", "w2 w3 w4 w5"]
+    assert splitter.split_text(words(7)) == ["w0 w1 w2 w3", "w2 w3 w4 w5", "w4 w5 w6"]
+
+def test_windows_count_words_not_characters():
+    text = "first   line\nsecond\tline  third"
+    assert TokenWindowTextSplitter(window_tokens=3, overlap_tokens=0).split_text(text) == [
+        "first line second", "line third"
+    ]
+
+def test_short_and_empty_text():
+    splitter = TokenWindowTextSplitter(window_tokens=128, overlap_tokens=32)
+    assert splitter.split_text(words(3)) == ["w0 w1 w2"]
+    assert splitter.split_text("  \n ") == []
+
+@pytest.mark.parametrize("window, overlap", [(0, 0), (4, 4), (4, -1)])
+def test_invalid_window_settings(window, overlap):
+    with pytest.raises(ValueError):
+        TokenWindowTextSplitter(window_tokens=window, overlap_tokens=overlap)
+
+def test_config_from_environment(monkeypatch):
+    monkeypatch.setenv("CHUNKING_STRATEGY", " Token ")
+    monkeypatch.setenv("CHUNK_WINDOW_TOKENS", "64")
+    monkeypatch.setenv("CHUNK_OVERLAP_TOKENS", "8")
+    config = get_chunking_config()
+    assert config == {"strategy": "token", "window_tokens": 64, "overlap_tokens": 8}
+
+    splitter = create_text_splitter(config, HashingEmbeddings())
+    assert (splitter.window_tokens, splitter.overlap_tokens) == (64, 8)
+
+    monkeypatch.setenv("CHUNKING_STRATEGY", "line")
+    assert get_chunking_config() == {"strategy": "line"}
+    monkeypatch.setenv("CHUNKING_STRATEGY", "paragraph")
+    with pytest.raises(ValueError, match="Unknown CHUNKING_STRATEGY"):
+        get_chunking_config()
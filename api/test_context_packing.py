@@ -0,0 +1,117 @@
+"""
+Tests for token-budgeted context packing of retriever results
+Covers the relevance cutoff, duplicate and overlap collapsing, the token
+budget and the stats a packing HybridRetriever reports to tracing. Uses the
+offline hashing embeddings, so no OpenAI key is needed.
+Run with: python -m pytest test_context_packing.py
+"""
+
+from langchain_classic.agents import AgentExecutor, create_openai_functions_agent
+from langchain_classic.tools.retriever import create_retriever_tool
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.vectorstores import InMemoryVectorStore
+
+import metrics
+from bench_stubs import HashingEmbeddings, StubChatModel
+from chunking import TokenWindowTextSplitter
+from context_packing import ContextPacker
+from hybrid_retriever import HybridRetriever
+from tracing import ChatTracer
+
+def doc(text: str, relevance: float = None, source: str = "process.txt", id: str = None) -> Document:
+    metadata = {"source": source}
+    if relevance is not None:
+        metadata["relevance"] = relevance
+    return Document(id=id or text[:20], page_content=text, metadata=metadata)
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+def test_relevance_cutoff_is_relative_to_best():
+    packer = ContextPacker(min_relevance=0.5)
+    docs = [doc("Claims need a police report.", 0.9),
+            doc("Premiums are billed monthly.", 0.5),
+            doc("Dental cover is optional.", 0.3)]
+    packed, stats = packer.pack(docs)
+    assert [d.page_content for d in packed] == ["Claims need a police report.", "Premiums are billed monthly."]
+    assert stats["below_cutoff"] == 1
+    # Chunks without a score are never cut for relevance
+    packed, _ = packer.pack([doc("Claims need a police report.", 0.9), doc("Dental cover is optional.")])
+    assert len(packed) == 2
+
+def test_duplicates_are_dropped():
+    text = "Send the police report and photos of the damage to the claims team within thirty days"
+    packed, stats = ContextPacker().pack([doc(text, 0.9), doc(text + ".", 0.8, source="other.txt"), doc("Yes.", 0.9),
+                                          doc("yes.", 0.9, id="second")])
+    assert [d.page_content for d in packed] == [text, "Yes."]
+    assert stats["duplicates"] == 2
+
+def test_overlapping_windows_are_merged():
+    words = [f"w{i}" for i in range(60)]
+    windows = TokenWindowTextSplitter(window_tokens=30, overlap_tokens=10).split_text(" ".join(words))
+    assert len(windows) == 3
+    # Retrieved out of order: the middle window first
+    packed, stats = ContextPacker().pack([doc(windows[1], 0.9, id="1"), doc(windows[0], 0.8, id="0"),
+                                          doc(windows[2], 0.7, id="2"), doc(windows[2], 0.9, source="other.txt", id="x")])
+    assert packed[0].page_content == " ".join(words)
+    assert packed[0].metadata["relevance"] == 0.9
+    assert stats["merged"] == 2 and stats["duplicates"] == 1
+    assert stats["packed_tokens"] < stats["retrieved_tokens"]
+
+def test_token_budget():
+    packer = ContextPacker(token_budget=10, count_tokens=word_count)
+    docs = [doc("one two three four five six", 0.9),
+            doc("seven eight nine ten eleven", 0.9),
+            doc("twelve thirteen", 0.9)]
+    packed, stats = packer.pack(docs)
+    # The second chunk does not fit; the shorter third one still does
+    assert [d.page_content for d in packed] == ["one two three four five six", "twelve thirteen"]
+    assert stats["over_budget"] == 1
+    assert stats["retrieved_tokens"] == 13 and stats["packed_tokens"] == 8 and stats["tokens_saved"] == 5
+
+def test_oversized_first_chunk_is_truncated():
+    packed, stats = ContextPacker(token_budget=4, count_tokens=word_count).pack([doc("a b c d e f g h i j", 0.9)])
+    assert packed[0].page_content == "a b c d"
+    assert stats["packed_tokens"] == 4
+
+def build_retriever(packer=None) -> HybridRetriever:
+    store = InMemoryVectorStore(HashingEmbeddings())
+    texts = ["File a claim within 30 days.", "Claims need a police report.", "File a claim within 30 days!",
+             "Premiums are paid monthly.", "Dental cover is optional."]
+    store.add_documents([doc(text, id=str(i)) for i, text in enumerate(texts)])
+    return HybridRetriever.from_vectorstore(store, k=5, mode="hybrid", packer=packer)
+
+def test_retriever_results_carry_relevance():
+    retriever = build_retriever()
+    for mode in ("hybrid", "vector", "lexical"):
+        retriever.mode = mode
+        results = retriever.invoke("file a claim police report")
+        assert results and all(0 <= d.metadata["relevance"] <= 1 for d in results), mode
+    # Stored documents are not modified
+    assert all("relevance" not in entry["metadata"] for entry in retriever.vectorstore.store.values())
+
+def test_packing_stats_reach_tracer_metrics_and_stats():
+    retriever = build_retriever(ContextPacker(token_budget=15))
+    tool = create_retriever_tool(retriever, "Agent_Process", "Insurance processes")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are Agent Easy."),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    executor = AgentExecutor(agent=create_openai_functions_agent(StubChatModel(), [tool], prompt), tools=[tool])
+
+    def packed_total() -> float:
+        return metrics.retriever_context_tokens_total._values.get(("Agent_Process", "packed"), 0)
+
+    before = packed_total()
+    tracer = ChatTracer()
+    executor.invoke({"input": "How do I file a claim?"},
+                    config={"callbacks": [metrics.AgentMetricsCallback(), tracer]})
+
+    packing = retriever.stats()["packing"]
+    assert packing["calls"] == 1 and packing["tokens_saved"] > 0
+    tool_step = next(step for step in tracer.summary()["steps"] if step["type"] == "tool")
+    assert tool_step["context_tokens"] == packing["packed_tokens"] <= 15
+    assert tool_step["tokens_saved"] == tracer.summary()["context_tokens_saved"] == packing["tokens_saved"]
+    assert packed_total() - before == packing["packed_tokens"]
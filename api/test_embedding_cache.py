@@ -0,0 +1,111 @@
+"""
+Tests for the on-disk embedding cache
+Checks that repeated texts skip the underlying model, across instances,
+and that the row cap prunes the least recently used vectors. Uses the
+offline hashing embeddings and a fake clock, so no OpenAI key is needed.
+Run with: python -m pytest test_embedding_cache.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+from bench_stubs import HashingEmbeddings
+from embedding_cache import CachedEmbeddings
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+def test_second_embed_skips_the_model():
+    with tempfile.TemporaryDirectory() as tmp:
+        underlying = HashingEmbeddings()
+        cache = CachedEmbeddings(underlying, os.path.join(tmp, "embeddings.db"))
+
+        first = cache.embed_documents(["File a claim within thirty days.", "Premiums are billed monthly."])
+        assert underlying.texts == 2
+
+        underlying.reset_counts()
+        second = cache.embed_documents(["Premiums are billed monthly.", "File a claim within thirty days."])
+        assert underlying.texts == 0
+        assert second == [first[1], first[0]]
+
+        # Queries and documents are cached separately; async calls share the cache
+        query = cache.embed_query("how do claims work")
+        assert underlying.texts == 1
+        assert asyncio.run(cache.aembed_query("how do claims work")) == query
+        assert underlying.texts == 1
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 3, 3)
+
+def test_cache_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "embeddings.db")
+        vector = CachedEmbeddings(HashingEmbeddings(), db_path).embed_query("who are you")
+
+        underlying = HashingEmbeddings()
+        assert CachedEmbeddings(underlying, db_path).embed_query("who are you") == vector
+        assert underlying.texts == 0
+
+def test_row_cap_prunes_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        underlying = HashingEmbeddings()
+        cache = CachedEmbeddings(underlying, os.path.join(tmp, "embeddings.db"), max_rows=2, clock=clock)
+        for text in ("first", "second"):
+            cache.embed_query(text)
+            clock.advance(1)
+
+        # Using "first" again makes "second" the least recently used
+        cache.embed_query("first")
+        clock.advance(1)
+        cache.embed_query("third")
+        assert cache.stats()["entries"] == 2 and cache.evictions == 1
+
+        underlying.reset_counts()
+        cache.embed_query("first")
+        cache.embed_query("third")
+        assert underlying.texts == 0
+        cache.embed_query("second")
+        assert underlying.texts == 1
+
+def test_prune_runs_once_the_margin_is_inserted():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        cache = CachedEmbeddings(HashingEmbeddings(), os.path.join(tmp, "embeddings.db"),
+                                 max_rows=4, prune_margin=3, clock=clock)
+        for i in range(5):
+            cache.embed_query(f"question {i}")
+            clock.advance(1)
+        # Over the cap, but only two rows were inserted since the last check
+        assert cache.stats()["entries"] == 5 and cache.evictions == 0
+
+        cache.embed_query("question 5")
+        assert cache.stats()["entries"] == 4 and cache.evictions == 2
+
+def test_hits_are_written_in_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        db_path = os.path.join(tmp, "embeddings.db")
+        cache = CachedEmbeddings(HashingEmbeddings(), db_path, max_rows=10, clock=clock)
+        cache.embed_query("who are you")
+        clock.advance(5)
+
+        def last_used():
+            rows = cache._connection().execute("SELECT last_used FROM embeddings").fetchall()
+            return sorted(row[0] for row in rows)
+
+        # A hit only queues its new last_used; the next save writes it
+        asyncio.run(cache.aembed_query("who are you"))
+        assert last_used() == [1000.0]
+        cache.embed_query("how do claims work")
+        assert last_used() == [1005.0, 1005.0]
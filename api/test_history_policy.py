@@ -0,0 +1,108 @@
+"""
+Tests for the agent prompt's history window
+Checks that cuts land on turn boundaries, that the window fits its token
+budget and that each overflow schedules exactly one background summary.
+Uses a fake summarizer and a manual executor, so no OpenAI key is needed.
+Run with: python -m pytest test_history_policy.py
+"""
+
+from typing import List
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from history_policy import HistoryWindow
+
+def conversation(turns: int, words: int = 5) -> List[BaseMessage]:
+    """Alternating human/AI turns; the AI reply of turn 2 is split in two messages"""
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"question {turn} " + "word " * words))
+        messages.append(AIMessage(content=f"answer {turn} " + "word " * words))
+        if turn == 2:
+            messages.append(AIMessage(content=f"follow-up {turn}"))
+    return messages
+
+def config(session_id: str = "s1"):
+    return {"configurable": {"session_id": session_id}}
+
+class ManualExecutor:
+    """Holds submitted jobs until the test runs them"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn):
+        self.jobs.append(fn)
+
+    def run_all(self):
+        jobs, self.jobs = self.jobs, []
+        for job in jobs:
+            job()
+
+def test_turn_limit_cuts_at_a_human_message():
+    messages = conversation(5)
+    window = HistoryWindow(max_turns=3).select({"chat_history": messages}, config())
+
+    assert isinstance(window[0], HumanMessage)
+    assert window[0].content.startswith("question 2")
+    # The split reply of turn 2 stays with its question
+    assert window == messages[4:]
+
+def test_short_history_is_unchanged():
+    messages = conversation(2)
+    assert HistoryWindow(max_turns=3, max_tokens=10000).select({"chat_history": messages}, config()) == messages
+
+def test_token_budget_keeps_whole_turns():
+    messages = conversation(6, words=20)
+    turn_tokens = count_tokens_approximately(messages[-2:])
+    window = HistoryWindow(max_tokens=turn_tokens * 2 + 5).select({"chat_history": messages}, config())
+
+    assert count_tokens_approximately(window) <= turn_tokens * 2 + 5
+    assert isinstance(window[0], HumanMessage)
+    assert [m.content.split()[0:2] for m in window[::2]] == [["question", "4"], ["question", "5"]]
+
+def test_token_budget_smaller_than_one_turn_drops_everything():
+    messages = conversation(3, words=50)
+    assert HistoryWindow(max_tokens=5).select({"chat_history": messages}, config()) == []
+
+def test_one_summary_per_overflow():
+    executor = ManualExecutor()
+    llm = FakeListChatModel(responses=["first summary", "second summary"])
+    window = HistoryWindow(max_turns=2, summarize_llm=llm, executor=executor)
+    messages = conversation(4)
+
+    # Repeated turns while the summary is pending schedule it once
+    first = window.select({"chat_history": messages}, config())
+    window.select({"chat_history": messages}, config())
+    assert len(executor.jobs) == 1
+    assert not isinstance(first[0], SystemMessage)
+
+    executor.run_all()
+    summarized = window.select({"chat_history": messages}, config())
+    assert summarized[0] == SystemMessage(content="Summary of the earlier conversation: first summary")
+    assert summarized[1:] == messages[4:]
+    assert executor.jobs == []
+
+    # Another turn pushes more messages out: exactly one more summary
+    messages = conversation(5)
+    window.select({"chat_history": messages}, config())
+    window.select({"chat_history": messages}, config())
+    assert len(executor.jobs) == 1
+    executor.run_all()
+    assert window.select({"chat_history": messages}, config())[0].content.endswith("second summary")
+
+def test_summaries_are_per_session_and_forgotten():
+    executor = ManualExecutor()
+    window = HistoryWindow(max_turns=1, summarize_llm=FakeListChatModel(responses=["summary"]), executor=executor)
+    messages = conversation(3)
+
+    window.select({"chat_history": messages}, config("a"))
+    window.select({"chat_history": messages}, config("b"))
+    assert len(executor.jobs) == 2
+    executor.run_all()
+
+    window.forget("a")
+    assert not isinstance(window.select({"chat_history": messages}, config("a"))[0], SystemMessage)
+    assert isinstance(window.select({"chat_history": messages}, config("b"))[0], SystemMessage)
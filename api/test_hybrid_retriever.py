@@ -0,0 +1,77 @@
+"""
+Tests for the hybrid retriever
+Checks that confident lexical queries skip the query embedding and that
+fused results follow reciprocal rank order. A stub embedder with fixed
+vectors makes the vector ranking deterministic; no OpenAI key is needed.
+Run with: python -m pytest test_hybrid_retriever.py
+"""
+
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from hybrid_retriever import RRF_K, HybridRetriever, reciprocal_rank_fusion
+
+# Vector ranking for QUERY_VECTOR by cosine similarity: D, B, C, A
+CHUNKS = {
+    "A": ("The claim deadline is thirty days after the claim event.", [0.0, 0.0, 1.0]),
+    "B": ("A claim must be filed online.", [0.8, 0.6, 0.0]),
+    "C": ("Renewals happen yearly.", [0.6, 0.8, 0.0]),
+    "D": ("Premiums are billed monthly.", [1.0, 0.0, 0.0]),
+}
+QUERY_VECTOR = [1.0, 0.0, 0.0]
+
+class FixedEmbeddings(Embeddings):
+    """Fixed vector per chunk text and one vector for every query; counts query embeddings"""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+        self.queries = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.queries += 1
+        return QUERY_VECTOR
+
+def build_retriever(**kwargs):
+    embeddings = FixedEmbeddings({text: vector for text, vector in CHUNKS.values()})
+    store = InMemoryVectorStore(embeddings)
+    store.add_documents([Document(id=name, page_content=text) for name, (text, _) in CHUNKS.items()])
+    return HybridRetriever.from_vectorstore(store, k=4, mode="hybrid", **kwargs), embeddings
+
+def test_confident_lexical_query_skips_embedding():
+    retriever, embeddings = build_retriever(fast_threshold=0.6)
+    documents = retriever.invoke("claim deadline")
+
+    assert embeddings.queries == 0
+    assert [doc.id for doc in documents] == ["A", "B"]
+    assert documents[0].metadata["relevance"] >= 0.6
+    stats = retriever.stats()
+    assert stats["lexical_fast"] == 1 and stats["fused"] == 0
+
+def test_missing_term_falls_back_to_fusion():
+    retriever, embeddings = build_retriever(fast_threshold=0.6)
+    # "zebra" is not in the corpus, so the lexical side is not confident
+    documents = retriever.invoke("claim deadline zebra")
+
+    assert embeddings.queries == 1
+    # Lexical: A, B. Vector: D, B, C, A. B ranks second on both sides and wins.
+    assert [doc.id for doc in documents] == ["B", "A", "D", "C"]
+    assert documents[2].metadata["relevance"] == 1.0  # cosine similarity of D
+    assert retriever.stats()["fused"] == 1
+
+def test_reciprocal_rank_fusion_scores():
+    docs = {name: Document(id=name, page_content=name) for name in "ABCD"}
+    lexical = [docs["A"], docs["B"]]
+    vector = [docs["D"], docs["B"], docs["C"], docs["A"]]
+
+    fused = reciprocal_rank_fusion([lexical, vector], k=4)
+    assert [doc.id for doc in fused] == ["B", "A", "D", "C"]
+
+    # A: 1/(K+1) + 1/(K+4) against B: 2/(K+2)
+    assert 2 / (RRF_K + 2) > 1 / (RRF_K + 1) + 1 / (RRF_K + 4)
+    assert [doc.id for doc in reciprocal_rank_fusion([lexical, vector], k=2)] == ["B", "A"]
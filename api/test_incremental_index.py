@@ -0,0 +1,173 @@
+"""
+Tests for incremental index updates
+Adds, edits, touches and removes files in a temp source directory and checks
+that only the affected files are embedded, removed files disappear from
+search results and retrievers pick up the new index. Uses the offline
+hashing embeddings, so no OpenAI key is needed.
+Run with: python -m pytest test_incremental_index.py
+"""
+
+import os
+import shutil
+import tempfile
+
+from bench_stubs import HashingEmbeddings
+from chunking import LineTextSplitter
+from hybrid_retriever import HybridRetriever
+from incremental_index import FALLBACK_SOURCE, IncrementalIndex
+
+SETTINGS = {"embedding_model": "hashing-bow", "chunking": {"strategy": "line"}}
+
+FILES = {
+    "claims.txt": "File a claim within thirty days.\nAttach the police report to the claim.\n",
+    "premiums.txt": "Premiums are billed monthly.\nAnnual payment earns a discount.\n",
+}
+
+class Sandbox:
+    """Temp source directory and index cache, removed on exit"""
+
+    def __enter__(self):
+        self.root = tempfile.mkdtemp(prefix="incremental_index_")
+        self.source_dir = os.path.join(self.root, "sources")
+        os.makedirs(self.source_dir)
+        self._previous_cache_dir = os.environ.get('INDEX_CACHE_DIR')
+        os.environ['INDEX_CACHE_DIR'] = os.path.join(self.root, "cache")
+        for name, text in FILES.items():
+            self.write(name, text)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._previous_cache_dir is None:
+            os.environ.pop('INDEX_CACHE_DIR', None)
+        else:
+            os.environ['INDEX_CACHE_DIR'] = self._previous_cache_dir
+        shutil.rmtree(self.root, ignore_errors=True)
+        return False
+
+    def write(self, name: str, text: str):
+        with open(os.path.join(self.source_dir, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def index(self, embeddings: HashingEmbeddings, **kwargs) -> IncrementalIndex:
+        return IncrementalIndex("test", self.source_dir, LineTextSplitter(), embeddings, SETTINGS,
+                                "fallback line\n", **kwargs)
+
+def sources_in_store(index: IncrementalIndex):
+    return sorted({entry["metadata"]["source"] for entry in index.vectorstore.store.values()})
+
+def test_initial_build_then_cache_hit():
+    with Sandbox() as sandbox:
+        embeddings = HashingEmbeddings()
+        result = sandbox.index(embeddings).sync()
+        assert result["added"] == sorted(FILES)
+        assert result["embedded_chunks"] == 4
+        assert embeddings.texts == 4
+
+        # A restart maps the cached index and reads no file contents
+        embeddings.reset_counts()
+        index = sandbox.index(embeddings)
+        result = index.sync()
+        assert not result["updated"] and result["unchanged"] == 2
+        assert embeddings.texts == 0
+        assert len(index.vectorstore.store) == 4
+
+def test_only_changed_files_are_embedded():
+    with Sandbox() as sandbox:
+        embeddings = HashingEmbeddings()
+        index = sandbox.index(embeddings)
+        index.sync()
+        claims_ids = {entry_id for entry_id in index.vectorstore.store if entry_id.startswith("claims.txt")}
+
+        embeddings.reset_counts()
+        sandbox.write("premiums.txt", FILES["premiums.txt"] + "Smokers pay a higher premium.\n")
+        sandbox.write("cover.txt", "Dental cover is optional.\n")
+        result = index.sync()
+
+        assert result["added"] == ["cover.txt"]
+        assert result["changed"] == ["premiums.txt"]
+        assert result["unchanged"] == 1
+        assert embeddings.texts == 4  # 3 premium lines + 1 cover line
+        assert len(index.vectorstore.store) == 6
+        # Untouched files keep their chunks
+        assert claims_ids <= set(index.vectorstore.store)
+
+def test_touched_but_identical_file_is_not_embedded():
+    with Sandbox() as sandbox:
+        embeddings = HashingEmbeddings()
+        index = sandbox.index(embeddings)
+        index.sync()
+
+        embeddings.reset_counts()
+        path = os.path.join(sandbox.source_dir, "claims.txt")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        result = index.sync()
+
+        assert not result["updated"]
+        assert embeddings.texts == 0
+        assert index.sources["claims.txt"]["mtime_ns"] == stat.st_mtime_ns + 5_000_000_000
+
+def test_removed_files_leave_the_index():
+    with Sandbox() as sandbox:
+        index = sandbox.index(HashingEmbeddings())
+        index.sync()
+        retriever = HybridRetriever.from_vectorstore(index.vectorstore, k=2, mode="hybrid")
+        assert "police" in retriever.invoke("police report")[0].page_content
+
+        os.remove(os.path.join(sandbox.source_dir, "claims.txt"))
+        result = index.sync()
+        retriever.replace_index(index.vectorstore)
+
+        assert result["removed"] == ["claims.txt"]
+        assert sources_in_store(index) == ["premiums.txt"]
+        assert all("police" not in doc.page_content for doc in retriever.invoke("police report"))
+
+def test_shared_lines_are_embedded_once():
+    with Sandbox() as sandbox:
+        embeddings = HashingEmbeddings()
+        index = sandbox.index(embeddings)
+        index.sync()
+
+        # A new file repeating a claims line only adds its own line
+        embeddings.reset_counts()
+        sandbox.write("reminders.txt", "Attach the  police report to the claim.\nKeep your receipts.\n")
+        result = index.sync()
+        assert result["added"] == ["reminders.txt"]
+        assert result["ingestion"]["exact_duplicates"] == 1
+        assert embeddings.texts == 1
+
+        # Once claims.txt is gone the shared line is indexed from reminders.txt
+        os.remove(os.path.join(sandbox.source_dir, "claims.txt"))
+        index.sync()
+        texts = {entry["text"]: entry["metadata"]["source"] for entry in index.vectorstore.store.values()}
+        assert texts["Attach the police report to the claim."] == "reminders.txt"
+
+def test_dedup_settings_change_rebuilds_the_index():
+    with Sandbox() as sandbox:
+        sandbox.write("reminders.txt", "Attach the police report to the claim form.\n")
+        embeddings = HashingEmbeddings()
+        result = sandbox.index(embeddings).sync()
+        assert result["ingestion"]["near_duplicates"] == 1
+
+        # Same files, near-duplicate removal turned off: the line comes back
+        embeddings.reset_counts()
+        index = sandbox.index(embeddings, near_duplicate_threshold=1.1)
+        result = index.sync()
+        assert result["ingestion"]["near_duplicates"] == 0
+        assert "reminders.txt" in sources_in_store(index)
+        assert embeddings.texts == 5
+
+def test_generated_files_and_fallback():
+    with Sandbox() as sandbox:
+        for name in FILES:
+            os.remove(os.path.join(sandbox.source_dir, name))
+        # Combined dumps from older versions are not sources
+        sandbox.write("Agent_lines.txt", "Old combined dump.\n")
+        index = sandbox.index(HashingEmbeddings())
+        index.sync()
+        assert sources_in_store(index) == [FALLBACK_SOURCE]
+
+        sandbox.write("claims.txt", FILES["claims.txt"])
+        result = index.sync()
+        assert result["added"] == ["claims.txt"] and result["removed"] == [FALLBACK_SOURCE]
+        assert sources_in_store(index) == ["claims.txt"]
@@ -0,0 +1,69 @@
+"""
+Tests for the deduplicating ingestion stage
+Checks whitespace normalization, exact and near-duplicate removal across
+files and the dedup report. Needs no server or OpenAI key.
+Run with: python -m pytest test_ingestion.py
+"""
+
+import os
+import tempfile
+
+from ingestion import Deduplicator, ingest_files, normalize_line
+
+CLAIM = "Please send the police report and photos of the damage to the claims team within thirty days"
+
+def test_whitespace_is_normalized():
+    assert normalize_line("  File\ta   claim today \n") == "File a claim today"
+    assert normalize_line(" \t\n") == ""
+
+def test_exact_duplicates_ignore_case_and_spacing():
+    dedup = Deduplicator()
+    assert dedup.add("File a claim online.\n") == "File a claim online."
+    assert dedup.add("file a CLAIM   online.") is None
+    assert dedup.add("\n") is None
+    report = dedup.report()
+    assert report["kept"] == 1 and report["exact_duplicates"] == 1 and report["empty"] == 1
+    assert report["examples"]["exact_duplicates"][0]["duplicate_of"] == "File a claim online."
+
+def test_near_duplicates_are_dropped():
+    dedup = Deduplicator()
+    assert dedup.add(CLAIM) is not None
+    assert dedup.add(CLAIM + ".") is None  # punctuation only
+    assert dedup.add(CLAIM.replace("Please send", "Kindly send")) is None
+    assert dedup.report()["near_duplicates"] == 2
+
+def test_distinct_short_lines_are_kept():
+    dedup = Deduplicator()
+    # One word apart, but that word is the whole point of the question
+    assert dedup.add("Have you had any prior lawsuits?") is not None
+    assert dedup.add("Have you had any prior claims?") is not None
+    # Too short for shingles: only exact duplicates are removed
+    assert dedup.add("Yes.") is not None
+    assert dedup.add("Yes!") is not None
+    assert dedup.report()["near_duplicates"] == 0
+
+def test_threshold_above_one_disables_near_duplicates():
+    dedup = Deduplicator(near_threshold=1.1)
+    assert dedup.add(CLAIM) is not None
+    assert dedup.add(CLAIM + ".") is not None
+    assert dedup.add(CLAIM) is None
+
+def test_ingest_files_dedups_across_files():
+    with tempfile.TemporaryDirectory() as directory:
+        files = {
+            "a.txt": f"Welcome to Agent Easy.\n\n{CLAIM}\n",
+            "b.txt": f"welcome to agent easy.\n{CLAIM}.\nPremiums are billed monthly.\n",
+        }
+        for name, text in files.items():
+            with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        texts, report = ingest_files(directory, ["b.txt", "a.txt", "missing.txt"])
+
+    # Files are read in name order, so a.txt keeps the shared lines
+    assert texts["a.txt"] == f"Welcome to Agent Easy.\n{CLAIM}\n"
+    assert texts["b.txt"] == "Premiums are billed monthly.\n"
+    assert report["files"] == 2 and report["unreadable"] == ["missing.txt"]
+    assert (report["lines"], report["kept"], report["empty"]) == (6, 3, 1)
+    assert report["exact_duplicates"] == 1 and report["near_duplicates"] == 1
+    assert report["examples"]["near_duplicates"][0]["source"] == "b.txt"
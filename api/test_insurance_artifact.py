@@ -0,0 +1,57 @@
+"""
+Tests for the versioned insurance model artifact
+Checks the save/load round trip and that a changed archive or an unknown
+format version is refused. Uses stand-ins for the fitted OLS model and
+scaler, so no training data or statsmodels fit is needed.
+Run with: python -m pytest test_insurance_artifact.py
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from insurance_predictor import ARTIFACT_FORMAT, LinearInsurancePredictor, load_artifact, save_artifact
+
+def saved_artifact(tmp_path):
+    """Save a small fitted model; returns the artifact path, predictor and manifest"""
+    model = SimpleNamespace(params=[13000.0, 3600.0, 0.0, 2000.0, 570.0, 9600.0, -350.0])
+    scaler = SimpleNamespace(mean_=[39.2, 0.5, 30.7, 1.1, 0.2, 1.5], scale_=[14.0, 0.5, 6.1, 1.2, 0.4, 1.1])
+    predictor = LinearInsurancePredictor.from_fitted(model, scaler)
+    path = str(tmp_path / "models" / "insurance")
+    manifest = save_artifact(predictor, path, model, scaler, r_squared=0.75,
+                             training_samples=1338, data_sha256="ab" * 32)
+    return path, predictor, manifest
+
+def test_round_trip(tmp_path):
+    path, predictor, manifest = saved_artifact(tmp_path)
+    loaded, loaded_manifest = load_artifact(path)
+
+    assert loaded_manifest == manifest
+    assert manifest["format"] == ARTIFACT_FORMAT
+    assert manifest["version"].endswith("-abababab")
+    np.testing.assert_allclose(loaded.coefficients, predictor.coefficients)
+    assert loaded.intercept == pytest.approx(predictor.intercept)
+    assert loaded.predict_one(40, "female", 28.0, 2, "no", "northwest") == pytest.approx(
+        predictor.predict_one(40, "female", 28.0, 2, "no", "northwest"))
+    # No temp files are left behind
+    assert sorted(os.listdir(tmp_path / "models")) == ["insurance.json", "insurance.npz"]
+
+def test_checksum_mismatch_is_refused(tmp_path):
+    path, _, _ = saved_artifact(tmp_path)
+    with open(path + ".npz", "ab") as f:
+        f.write(b"\0")
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        load_artifact(path)
+
+def test_unknown_format_is_refused(tmp_path):
+    path, _, manifest = saved_artifact(tmp_path)
+    manifest["format"] = ARTIFACT_FORMAT + 1
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError, match="Unsupported artifact format"):
+        load_artifact(path)
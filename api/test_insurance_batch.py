@@ -0,0 +1,59 @@
+"""
+Tests for /insurance/predict/batch input validation
+Every record is validated on its own: bad categories and wrong types are
+reported per index while the valid records are still priced.
+Runs in-process with a stub model, so no server or data file is needed.
+Run with: python -m pytest test_insurance_batch.py
+"""
+
+import asyncio
+
+import httpx
+
+import main
+from insurance_predictor import LinearInsurancePredictor
+
+VALID_RECORD = {"age": 29, "sex": "male", "bmi": 20.0, "children": 0, "smoker": "no", "region": "southeast"}
+
+def post(path: str, payload):
+    """POST to the app in-process with a stub insurance model"""
+    main.insurance_predictor = LinearInsurancePredictor([250.0, -100.0, 300.0, 500.0, 23000.0, -300.0], -2000.0)
+
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload)
+
+    return asyncio.run(send())
+
+def test_batch_reports_invalid_records_per_index():
+    records = [
+        VALID_RECORD,
+        {**VALID_RECORD, "sex": "Malee"},
+        {**VALID_RECORD, "smoker": "sometimes"},
+        {**VALID_RECORD, "age": "twenty-nine"},
+        "not a record",
+        {**VALID_RECORD, "sex": "Female", "smoker": "YES", "region": "NorthWest"},
+    ]
+    response = post("/insurance/predict/batch", {"records": records})
+    assert response.status_code == 200, response.text
+
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (6, 2, 4)
+    predictions = body["predictions"]
+    assert predictions[0]["predicted_charges"] is not None
+    assert predictions[5]["predicted_charges"] is not None
+    assert "Invalid sex" in predictions[1]["error"] and predictions[1]["predicted_charges"] is None
+    assert "Invalid smoker" in predictions[2]["error"]
+    assert predictions[3]["error"].startswith("age:")
+    assert predictions[4]["error"] is not None
+
+def test_batch_matches_single_prediction():
+    single = post("/insurance/predict", VALID_RECORD).json()
+    batch = post("/insurance/predict/batch", {"records": [VALID_RECORD]}).json()
+    assert batch["predictions"][0]["predicted_charges"] == single["predicted_charges"]
+
+def test_single_prediction_rejects_unknown_sex():
+    response = post("/insurance/predict", {**VALID_RECORD, "sex": "Malee"})
+    assert response.status_code == 400
+    assert "Invalid sex" in response.json()["detail"]
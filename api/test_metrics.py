@@ -0,0 +1,102 @@
+"""
+Tests for the Prometheus metrics: text format, per-route HTTP metrics and
+agent stage timing through the callback. Uses the offline stubs, so no
+server or OpenAI key is needed.
+Run with: python -m pytest test_metrics.py
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_classic.agents import AgentExecutor, create_openai_functions_agent
+from langchain_classic.tools.retriever import create_retriever_tool
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.vectorstores import InMemoryVectorStore
+
+import metrics
+from bench_stubs import HashingEmbeddings, StubChatModel
+
+def sample_value(text: str, line_prefix: str) -> float:
+    """Value of the first sample line starting with line_prefix, 0 if absent"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_text_format():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs run", ("kind",))
+    histogram = registry.histogram("job_seconds", "Job time", ("kind",), buckets=(0.1, 1.0))
+    counter.inc(kind="a")
+    counter.inc(2, kind='say "hi"')
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, kind="a")
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 1\n' in text
+    assert 'jobs_total{kind="say \\"hi\\""} 2\n' in text
+    assert "# TYPE job_seconds histogram" in text
+    # Buckets are cumulative and +Inf equals the count
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1\n' in text
+    assert 'job_seconds_bucket{kind="a",le="1"} 2\n' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 3\n' in text
+    assert 'job_seconds_count{kind="a"} 3\n' in text
+    assert sample_value(text, 'job_seconds_sum{kind="a"}') == 5.55
+
+def test_labels_must_match():
+    counter = metrics.Counter("x_total", "x", ("route",))
+    for labels in ({}, {"path": "/"}, {"route": "/", "extra": "1"}):
+        try:
+            counter.inc(**labels)
+        except ValueError:
+            continue
+        raise AssertionError(f"{labels} was accepted")
+
+def test_http_metrics_use_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"item_id": item_id}
+
+    before = metrics.registry.render()
+    prefix = 'http_requests_total{method="GET",route="/items/{item_id}",status="200"}'
+    client = TestClient(app)
+    for i in range(3):
+        assert client.get(f"/items/{i}").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    after = metrics.registry.render()
+    assert sample_value(after, prefix) - sample_value(before, prefix) == 3
+    assert "/items/0" not in after
+    assert sample_value(after, 'http_requests_total{method="GET",route="unmatched",status="404"}') >= 1
+
+def test_agent_stages_and_tokens():
+    embeddings = HashingEmbeddings()
+    store = InMemoryVectorStore.from_texts(["File a claim within 30 days of the incident."], embeddings)
+    tool = create_retriever_tool(store.as_retriever(), "Agent_Process", "Insurance processes")
+    llm = StubChatModel()
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are Agent Easy."),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    executor = AgentExecutor(agent=create_openai_functions_agent(llm, [tool], prompt), tools=[tool])
+
+    before = metrics.registry.render()
+    callback = metrics.AgentMetricsCallback()
+    result = executor.invoke({"input": "How do I file a claim?"}, config={"callbacks": [callback]})
+    assert result["output"] == llm.answer
+    after = metrics.registry.render()
+
+    def delta(prefix):
+        return sample_value(after, prefix) - sample_value(before, prefix)
+
+    # Two LLM calls (tool call, then answer), one tool call and its retrieval
+    assert delta('agent_stage_duration_seconds_count{stage="llm",name="StubChatModel"}') == 2
+    assert delta('agent_stage_duration_seconds_count{stage="tool",name="Agent_Process"}') == 1
+    assert delta('agent_stage_duration_seconds_count{stage="retriever",name="Agent_Process"}') == 1
+    assert delta('llm_tokens_total{model="StubChatModel",type="input"}') > 0
+    assert delta('llm_tokens_total{model="StubChatModel",type="output"}') > 0
+    assert callback._runs == {}
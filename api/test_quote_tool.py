@@ -0,0 +1,64 @@
+"""
+Tests for the InsuranceQuote agent tool
+Checks that unknown sex and region are averaged over their categories, that
+the assumptions are reported, and the message used while no model is loaded.
+Uses a fixed linear predictor, so no model artifact is needed.
+Run with: python -m pytest test_quote_tool.py
+"""
+
+import asyncio
+
+import pytest
+
+from insurance_predictor import REGION_MAPPING, LinearInsurancePredictor
+from quote_tool import UNAVAILABLE_MESSAGE, create_insurance_quote_tool, quote_charges
+
+# age, sex, bmi, children, smoker, region
+PREDICTOR = LinearInsurancePredictor([250, -100, 300, 500, 23000, -300], -2000)
+
+def test_known_inputs_make_no_assumptions():
+    charges, assumptions = quote_charges(PREDICTOR, 40, "no", sex="female", bmi=25.0, children=1, region="southeast")
+    assert charges == pytest.approx(PREDICTOR.predict_one(40, "female", 25.0, 1, "no", "southeast"))
+    assert assumptions == []
+
+def test_unknown_sex_and_region_are_averaged():
+    charges, assumptions = quote_charges(PREDICTOR, 40, "yes", bmi=25.0, children=1)
+    expected = [
+        PREDICTOR.predict_one(40, sex, 25.0, 1, "yes", region)
+        for sex in ("male", "female")
+        for region in REGION_MAPPING
+    ]
+    assert charges == pytest.approx(sum(expected) / len(expected))
+    # Halfway between the sexes, not either one
+    assert charges != pytest.approx(quote_charges(PREDICTOR, 40, "yes", sex="male", bmi=25.0, children=1)[0])
+    assert assumptions == ["average of male and female", "average across regions"]
+
+def test_missing_bmi_and_children_use_the_defaults():
+    charges, assumptions = quote_charges(PREDICTOR, 40, "no", sex="male", region="northeast")
+    assert charges == pytest.approx(PREDICTOR.predict_one(40, "male", 30.0, 0, "no", "northeast"))
+    assert assumptions == ["BMI 30.0", "0 children"]
+
+def test_tool_reports_the_quote_and_assumptions():
+    tool = create_insurance_quote_tool(lambda: PREDICTOR)
+    charges, _ = quote_charges(PREDICTOR, 40, "no", sex="female", bmi=25.0, children=1)
+    result = tool.invoke({"age": 40, "smoker": "no", "sex": "female", "bmi": 25.0, "children": 1})
+
+    assert result.startswith(f"Estimated annual premium: ${charges:,.2f} (about ${charges / 12:,.2f} per month).")
+    assert result.endswith("Assumed: average across regions.")
+    assert asyncio.run(tool.ainvoke({"age": 40, "smoker": "no", "sex": "female", "bmi": 25.0, "children": 1})) == result
+
+def test_tool_without_a_model_says_so():
+    tool = create_insurance_quote_tool(lambda: None)
+    assert tool.invoke({"age": 40, "smoker": "no"}) == UNAVAILABLE_MESSAGE
+
+def test_tool_picks_up_a_model_loaded_later():
+    loaded = {"predictor": None}
+    tool = create_insurance_quote_tool(lambda: loaded["predictor"])
+    assert tool.invoke({"age": 40, "smoker": "no"}) == UNAVAILABLE_MESSAGE
+
+    loaded["predictor"] = PREDICTOR
+    assert tool.invoke({"age": 40, "smoker": "no"}).startswith("Estimated annual premium")
+
+def test_invalid_arguments_go_back_to_the_agent():
+    tool = create_insurance_quote_tool(lambda: PREDICTOR)
+    assert tool.invoke({"age": 12, "smoker": "no"}).startswith("Invalid quote arguments")
@@ -0,0 +1,124 @@
+"""
+Tests for the semantic response cache
+Covers hits, misses and stale-generation stores directly, then runs /chat
+in-process with a stub agent. Uses the offline hashing embeddings, so no
+server or OpenAI key is needed.
+Run with: python -m pytest test_response_cache.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_core.tools import StructuredTool
+
+import main
+from bench_stubs import HashingEmbeddings
+from response_cache import SemanticResponseCache
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+def embed(cache: SemanticResponseCache, text: str):
+    return asyncio.run(cache.aembed(text))
+
+def test_similar_question_hits():
+    cache = SemanticResponseCache(HashingEmbeddings(), threshold=0.9)
+    cache.store("how do claims work", embed(cache, "how do claims work"), "File within thirty days.", cache.generation)
+
+    assert cache.lookup(embed(cache, "How do claims work?")) == "File within thirty days."
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 0, 1)
+
+def test_unrelated_question_misses():
+    cache = SemanticResponseCache(HashingEmbeddings(), threshold=0.9)
+    assert cache.lookup(embed(cache, "who are you")) is None
+
+    cache.store("how do claims work", embed(cache, "how do claims work"), "File within thirty days.", cache.generation)
+    assert cache.lookup(embed(cache, "what does a policy for my boat cost")) is None
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 0
+
+def test_stale_generation_is_not_stored():
+    cache = SemanticResponseCache(HashingEmbeddings(), threshold=0.9)
+    vector = embed(cache, "how do claims work")
+    generation = cache.generation
+
+    # The indexes were rebuilt while the answer was being computed
+    cache.clear()
+    cache.store("how do claims work", vector, "Answer from the old index.", generation)
+    assert cache.lookup(vector) is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 1
+
+    cache.store("how do claims work", vector, "Answer from the new index.", cache.generation)
+    assert cache.lookup(vector) == "Answer from the new index."
+
+# ============================================================================
+# Chat Endpoint
+# ============================================================================
+
+def quote_tool(age: int) -> str:
+    """Stand-in for InsuranceQuote"""
+    return f"${age * 100} per year"
+
+def lookup_tool(query: str) -> str:
+    """Stand-in for Agent_Process"""
+    return "File a claim within thirty days."
+
+TOOLS = {
+    "quote": StructuredTool.from_function(quote_tool, name="InsuranceQuote"),
+    "claims": StructuredTool.from_function(lookup_tool, name="Agent_Process"),
+}
+
+class StubAgent:
+    """Calls the tool named by the first word of the message and counts turns"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs, config):
+        self.calls += 1
+        topic = inputs["input"].split()[0]
+        tool = TOOLS[topic]
+        args = {"age": 40} if topic == "quote" else {"query": inputs["input"]}
+        return {"output": await tool.ainvoke(args, config)}
+
+def install_stubs() -> StubAgent:
+    stub = StubAgent()
+    main.agent_with_chat_history = RunnableWithMessageHistory(
+        RunnableLambda(lambda inputs: None, afunc=stub.ainvoke),
+        main.get_session_history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+    main.response_cache = SemanticResponseCache(HashingEmbeddings(), threshold=0.95)
+    return stub
+
+def ask_twice(message: str):
+    """The same opening question from two new sessions"""
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            return [
+                (await client.post("/chat", json={"message": message, "session_id": uuid.uuid4().hex})).json()
+                for _ in range(2)
+            ]
+    return asyncio.run(send())
+
+def test_quote_answer_is_not_reused():
+    stub = install_stubs()
+    first, second = ask_twice("quote for a 40 year old")
+    assert first["tools_used"] == ["InsuranceQuote"]
+    assert not second.get("cached")
+    assert stub.calls == 2
+    assert main.response_cache.stats()["entries"] == 0
+
+def test_retrieval_answer_is_reused():
+    stub = install_stubs()
+    first, second = ask_twice("claims deadline please")
+    assert first["tools_used"] == ["Agent_Process"]
+    assert second.get("cached") is True
+    assert second["response"] == first["response"]
+    assert stub.calls == 1
@@ -0,0 +1,198 @@
+"""
+Tests for the session stores: LRU cap, idle-TTL eviction and SQLite persistence
+Uses a fake clock, so expiry is checked without sleeping.
+Run with: python -m pytest test_session_store.py
+"""
+
+import os
+import tempfile
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from session_store import InMemorySessionStore, SQLiteSessionStore
+
+class FakeClock:
+    """Monotonic clock that only moves when told to"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+def test_memory_lru_cap_evicts_least_recently_used():
+    clock = FakeClock()
+    store = InMemorySessionStore(max_sessions=3, ttl_seconds=0, clock=clock)
+    for session_id in ("a", "b", "c"):
+        store.get_history(session_id)
+        clock.advance(1)
+
+    # Using "a" again makes "b" the least recently used
+    store.get_history("a").add_messages([HumanMessage(content="hi"), AIMessage(content="hello")])
+    store.get_history("d")
+
+    assert list(store) == ["c", "a", "d"]
+    assert "b" not in store
+    assert store.evictions_lru == 1
+    assert len(store["a"].messages) == 2
+
+def test_memory_lookups_do_not_refresh_position():
+    store = InMemorySessionStore(max_sessions=2, ttl_seconds=0, clock=FakeClock())
+    store.get_history("a")
+    store.get_history("b")
+    # Reading a session (GET /sessions/{id}) must not protect it from eviction
+    assert store["a"].messages == []
+    store.get_history("c")
+    assert list(store) == ["b", "c"]
+
+def test_memory_ttl_expiry():
+    clock = FakeClock()
+    store = InMemorySessionStore(max_sessions=100, ttl_seconds=60, clock=clock)
+    store.get_history("idle")
+    clock.advance(30)
+    store.get_history("active")
+    clock.advance(31)
+
+    # "idle" was last used 61s ago, "active" 31s ago
+    assert "idle" not in store
+    assert "active" in store
+    assert len(store) == 1 and store.evictions_ttl == 1
+
+    # Using a session restarts its idle timer
+    store.get_history("active")
+    clock.advance(59)
+    assert "active" in store
+    clock.advance(2)
+    assert len(store) == 0 and store.evictions_ttl == 2
+
+def test_memory_delete_and_stats():
+    store = InMemorySessionStore(max_sessions=10, ttl_seconds=60, clock=FakeClock())
+    store.get_history("a").add_messages([HumanMessage(content="hi")])
+    store.get_history("b")
+    del store["a"]
+    try:
+        del store["a"]
+        assert False, "deleting a missing session should raise KeyError"
+    except KeyError:
+        pass
+
+    stats = store.stats()
+    assert stats["backend"] == "memory"
+    assert stats["sessions"] == 1 and stats["messages"] == 0
+
+# ============================================================================
+# SQLite Backend
+# ============================================================================
+
+def add_turn(store, session_id: str, text: str = "hi"):
+    store.get_history(session_id).add_messages([HumanMessage(content=text), AIMessage(content="hello")])
+
+def test_sqlite_get_history_does_no_io():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), clock=FakeClock())
+        history = store.get_history("a")
+        assert "a" not in store and len(store) == 0
+
+        history.add_messages([HumanMessage(content="hi")])
+        assert "a" in store and len(store) == 1
+
+def test_sqlite_persists_across_instances():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db")
+        add_turn(SQLiteSessionStore(db_path, clock=FakeClock()), "a", "remember me")
+
+        reopened = SQLiteSessionStore(db_path, clock=FakeClock())
+        assert "a" in reopened
+        assert [m.content for m in reopened["a"].messages] == ["remember me", "hello"]
+
+def test_sqlite_stores_share_one_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sessions.db")
+        clock = FakeClock()
+        first = SQLiteSessionStore(db_path, clock=clock)
+        second = SQLiteSessionStore(db_path, clock=clock)
+
+        # A conversation continues on whichever store serves the next turn
+        add_turn(first, "a", "first turn")
+        add_turn(second, "a", "second turn")
+        assert [m.content for m in first["a"].messages] == ["first turn", "hello", "second turn", "hello"]
+
+        del second["a"]
+        assert "a" not in first
+
+def test_sqlite_lru_cap_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), max_sessions=3, ttl_seconds=0, clock=clock)
+        for session_id in ("a", "b", "c"):
+            add_turn(store, session_id)
+            clock.advance(1)
+
+        # A new turn in "a" makes "b" the least recently used
+        add_turn(store, "a")
+        clock.advance(1)
+        add_turn(store, "d")
+
+        assert list(store) == ["c", "a", "d"]
+        assert store.evictions_lru == 1
+        assert store.stats()["messages"] == 3 * 2 + 2
+
+def test_sqlite_ttl_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), max_sessions=0, ttl_seconds=60, clock=clock)
+        add_turn(store, "a")
+        clock.advance(30)
+        add_turn(store, "b")
+        clock.advance(45)
+
+        # Expired sessions are hidden at once and deleted by the next new session
+        assert "a" not in store and list(store) == ["b"]
+        add_turn(store, "c")
+        assert store.evictions_ttl == 1
+        assert store.stats()["messages"] == 2 * 2
+
+def test_sqlite_expired_session_history_is_not_served():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), max_sessions=0, ttl_seconds=60, clock=clock)
+        add_turn(store, "a", "old question")
+        clock.advance(61)
+
+        # Same view as the in-memory backend: the agent starts from an empty history
+        assert store.get_history("a").messages == []
+
+        # The next turn starts the session afresh instead of reviving it
+        add_turn(store, "a", "new question")
+        assert [m.content for m in store["a"].messages] == ["new question", "hello"]
+        assert store.evictions_ttl == 1
+        assert store.stats()["messages"] == 2
+
+def test_sqlite_delete_len_and_listing():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), clock=clock)
+        for session_id in ("a", "b", "c"):
+            add_turn(store, session_id)
+            clock.advance(1)
+
+        del store["b"]
+        assert len(store) == 2
+        assert [session_id for session_id, _ in store.items()] == ["a", "c"]
+        try:
+            del store["b"]
+            assert False, "deleting a missing session should raise KeyError"
+        except KeyError:
+            pass
+        try:
+            store["b"]
+            assert False, "looking up a missing session should raise KeyError"
+        except KeyError:
+            pass
+
+        stats = store.stats()
+        assert stats["backend"] == "sqlite"
+        assert stats["sessions"] == 2 and stats["messages"] == 4
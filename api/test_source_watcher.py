@@ -0,0 +1,42 @@
+"""
+Tests for the source watcher's lifecycle
+Checks that a crashed watcher is reported and that shutdown cancels it.
+Runs the watcher hooks directly, so no index, server or OpenAI key is needed.
+Run with: python -m pytest test_source_watcher.py
+"""
+
+import asyncio
+
+import main
+
+def test_crashed_watcher_is_reported(capsys):
+    async def crash():
+        raise RuntimeError("disk gone")
+
+    async def scenario():
+        task = asyncio.create_task(crash())
+        task.add_done_callback(main.report_watcher_exit)
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)  # let the done-callback run
+
+    asyncio.run(scenario())
+    assert "Source watcher stopped: RuntimeError('disk gone')" in capsys.readouterr().out
+
+def test_shutdown_cancels_the_watcher(monkeypatch, capsys):
+    async def scenario():
+        task = asyncio.create_task(asyncio.sleep(3600))
+        task.add_done_callback(main.report_watcher_exit)
+        monkeypatch.setattr(main, "watch_task", task)
+        await asyncio.sleep(0)
+        await main.shutdown_event()
+        return task
+
+    task = asyncio.run(scenario())
+    assert task.cancelled()
+    assert main.watch_task is None
+    # A cancelled watcher is the normal shutdown path, not an error
+    assert "Source watcher stopped" not in capsys.readouterr().out
+
+def test_shutdown_without_a_watcher():
+    asyncio.run(main.shutdown_event())
+    assert main.watch_task is None
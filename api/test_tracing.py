@@ -0,0 +1,114 @@
+"""
+Tests for the per-request chat tracer and the JSON trace log
+Runs a real AgentExecutor turn with the offline stubs, so no server or
+OpenAI key is needed.
+Run with: python -m pytest test_tracing.py
+"""
+
+import json
+import os
+import tempfile
+
+from langchain_classic.agents import AgentExecutor, create_openai_functions_agent
+from langchain_classic.tools.retriever import create_retriever_tool
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from bench_stubs import HashingEmbeddings, StubChatModel
+from tracing import ChatTracer, configure_trace_log, log_chat_trace
+
+QUESTION = "How do I file a claim?"
+
+def build_executor() -> AgentExecutor:
+    embeddings = HashingEmbeddings()
+    store = InMemoryVectorStore.from_texts(
+        ["File a claim within 30 days.", "Claims need a police report.", "Premiums are paid monthly."],
+        embeddings
+    )
+    tool = create_retriever_tool(store.as_retriever(search_kwargs={"k": 2}), "Agent_Process", "Insurance processes")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are Agent Easy."),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    return AgentExecutor(agent=create_openai_functions_agent(StubChatModel(), [tool], prompt), tools=[tool])
+
+def run_traced_turn() -> ChatTracer:
+    tracer = ChatTracer()
+    build_executor().invoke({"input": QUESTION}, config={"callbacks": [tracer]})
+    tracer.finish()
+    return tracer
+
+def test_steps_recorded_in_order():
+    tracer = run_traced_turn()
+    summary = tracer.summary()
+
+    assert tracer.tools_used() == ["Agent_Process"]
+    assert [step["type"] for step in summary["steps"]] == ["llm", "tool", "llm"]
+
+    tool_step = summary["steps"][1]
+    assert tool_step["name"] == "Agent_Process"
+    assert tool_step["chunks"] == 2
+    assert tool_step["input_chars"] > len(QUESTION)
+    assert "error" not in tool_step
+
+    starts = [step["start_ms"] for step in summary["steps"]]
+    assert starts == sorted(starts)
+    assert all(step["latency_ms"] is not None for step in summary["steps"])
+
+def test_summary_totals():
+    summary = run_traced_turn().summary()
+    llm_steps = [step for step in summary["steps"] if step["type"] == "llm"]
+
+    assert summary["llm_calls"] == 2
+    assert summary["input_tokens"] == sum(step["input_tokens"] for step in llm_steps) > 0
+    assert summary["output_tokens"] == sum(step["output_tokens"] for step in llm_steps) > 0
+    assert summary["total_ms"] >= summary["llm_ms"] + summary["tool_ms"]
+
+def test_trace_log_is_json_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.log")
+        configure_trace_log(path)
+        try:
+            log_chat_trace("/chat", "s1", QUESTION, run_traced_turn())
+            log_chat_trace("/chat", "s2", QUESTION, ChatTracer(), cached=True)
+        finally:
+            configure_trace_log("")
+
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+    assert [record["session_id"] for record in records] == ["s1", "s2"]
+    assert records[0]["tools_used"] == ["Agent_Process"]
+    assert records[0]["message_chars"] == len(QUESTION)
+    assert records[1]["cached"] is True and records[1]["steps"] == []
+    # The message itself is never logged
+    assert all(QUESTION not in json.dumps(record) for record in records)
+
+def test_sampling_keeps_failed_turns():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.log")
+        configure_trace_log(path, sample_rate=0.0)
+        try:
+            for _ in range(5):
+                log_chat_trace("/chat", "ok", QUESTION, ChatTracer())
+            log_chat_trace("/chat", "failed", QUESTION, ChatTracer(), error="model unavailable")
+        finally:
+            configure_trace_log("")
+
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line)["session_id"] for line in f] == ["failed"]
+
+def test_trace_file_is_rotated():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.log")
+        configure_trace_log(path, max_bytes=2000)
+        try:
+            for i in range(40):
+                log_chat_trace("/chat", f"s{i}", QUESTION, ChatTracer())
+        finally:
+            configure_trace_log("")
+
+        names = sorted(os.listdir(tmp))
+        assert names == ["trace.log", "trace.log.1", "trace.log.2", "trace.log.3"]
+        assert all(os.path.getsize(os.path.join(tmp, name)) <= 2000 for name in names)
@@ -0,0 +1,178 @@
+"""
+Tests for the web ingestion CLI
+Serves pages from a local HTTP server that honours ETag and Last-Modified,
+so fetching, conditional GETs, the page cache, extraction rules and output
+files are exercised without network access.
+Run with: python -m pytest test_web_ingest.py
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web_ingest import extract_lines, ingest_all
+
+SALES_PAGE = """<html><body>
+<p><strong>Agent:</strong> Hi, this is Sam from LiveEasy.<br/><strong>Customer</strong>: Hello?<br/>Stage note</p>
+<p>No speakers here.</p>
+</body></html>"""
+
+COLD_CALL_PAGE = """<html><body><table><tr>
+<td><strong>Opener</strong> "Good morning! Do you have a minute?" "I am calling about your renewal."</td>
+<td>"Ok."</td>
+</tr></table></body></html>"""
+
+PROCESS_PAGE = """<html><body><div class="post-content">
+<p>Collect the <a href="#">policy number</a> first.</p>
+<ul><li>Police report</li><li><p>Photos</p></li></ul>
+<p>Follow up weekly.</p>
+</div><p>Footer text outside the post.</p></body></html>"""
+
+SOURCES = [
+    {"name": "sales", "url": "/sales", "output": "AgentScripts/web_sales.txt",
+     "extractor": "speaker_lines", "selector": "p"},
+    {"name": "cold_calls", "url": "/cold", "output": "AgentScripts/web_cold.txt",
+     "extractor": "quotes", "selector": "td", "drop": ["strong"], "min_chars": 5},
+    {"name": "process", "url": "/process", "output": "AgentProcess/web_process.txt",
+     "extractor": "blocks", "selector": "div.post-content"},
+]
+
+class StandIn:
+    """Local HTTP server for the test pages; counts full (200) and 304 responses per path"""
+
+    def __init__(self, delay: float = 0.0):
+        self.pages = {
+            "/sales": {"body": SALES_PAGE, "etag": '"sales-v1"'},
+            "/cold": {"body": COLD_CALL_PAGE, "last_modified": "Mon, 15 Dec 2025 10:00:00 GMT"},
+            "/process": {"body": PROCESS_PAGE},
+        }
+        self.delay = delay
+        self.full = {}
+        self.not_modified = {}
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(stand_in.delay)
+                page = stand_in.pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                etag, last_modified = page.get("etag"), page.get("last_modified")
+                if (etag and self.headers.get("If-None-Match") == etag) or \
+                        (last_modified and self.headers.get("If-Modified-Since") == last_modified):
+                    stand_in.not_modified[self.path] = stand_in.not_modified.get(self.path, 0) + 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stand_in.full[self.path] = stand_in.full.get(self.path, 0) + 1
+                body = page["body"].encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                if last_modified:
+                    self.send_header("Last-Modified", last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.root = tempfile.mkdtemp(prefix="web_ingest_")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+        return False
+
+    def sources(self, extra=()):
+        return [{**source, "url": self.base_url + source["url"]} for source in [*SOURCES, *extra]]
+
+    def ingest(self, extra=(), **kwargs):
+        return asyncio.run(ingest_all(self.sources(extra), output_dir=os.path.join(self.root, "out"),
+                                      cache_dir=os.path.join(self.root, "cache"), **kwargs))
+
+    def output(self, name: str) -> str:
+        with open(os.path.join(self.root, "out", name), encoding="utf-8") as f:
+            return f.read()
+
+def test_extraction_rules():
+    assert extract_lines(SALES_PAGE, SOURCES[0]) == ["Agent: Hi, this is Sam from LiveEasy.", "Customer: Hello?"]
+    assert extract_lines(COLD_CALL_PAGE, SOURCES[1]) == ["Good morning! Do you have a minute?",
+                                                        "I am calling about your renewal."]
+    assert extract_lines(PROCESS_PAGE, SOURCES[2]) == ["Collect the policy number first.",
+                                                      "Police report | Photos", "Follow up weekly."]
+
+def test_first_run_downloads_and_writes_outputs():
+    with StandIn() as stand_in:
+        results = stand_in.ingest()
+        assert [r["status"] for r in results] == ["downloaded"] * 3
+        assert all(r["written"] for r in results)
+        assert stand_in.output("AgentScripts/web_sales.txt") == \
+            "Agent: Hi, this is Sam from LiveEasy.\nCustomer: Hello?\n"
+        assert stand_in.output("AgentProcess/web_process.txt").splitlines()[1] == "Police report | Photos"
+
+def test_unchanged_pages_are_revalidated_not_downloaded():
+    with StandIn() as stand_in:
+        stand_in.ingest()
+        path = os.path.join(stand_in.root, "out", "AgentScripts", "web_sales.txt")
+        mtime = os.stat(path).st_mtime_ns
+
+        results = {r["name"]: r for r in stand_in.ingest()}
+        # ETag and Last-Modified pages answer 304; the page without validators is downloaded again
+        assert results["sales"]["status"] == "not_modified" and results["sales"]["bytes"] == 0
+        assert results["cold_calls"]["status"] == "not_modified"
+        assert results["process"]["status"] == "downloaded"
+        assert stand_in.full == {"/sales": 1, "/cold": 1, "/process": 2}
+        assert stand_in.not_modified == {"/sales": 1, "/cold": 1}
+        # Same lines: outputs are left alone, so the indexes see no change
+        assert not any(r["written"] for r in results.values())
+        assert os.stat(path).st_mtime_ns == mtime
+
+def test_changed_page_and_force_download():
+    with StandIn() as stand_in:
+        stand_in.ingest()
+        stand_in.pages["/sales"] = {"body": SALES_PAGE.replace("Hello?", "Who is this?"), "etag": '"sales-v2"'}
+        results = {r["name"]: r for r in stand_in.ingest()}
+        assert results["sales"]["status"] == "downloaded" and results["sales"]["written"]
+        assert "Customer: Who is this?" in stand_in.output("AgentScripts/web_sales.txt")
+
+        results = {r["name"]: r for r in stand_in.ingest(force=True)}
+        assert all(r["status"] == "downloaded" for r in results.values())
+        assert stand_in.full["/cold"] == 2
+
+def test_failures_are_isolated():
+    with StandIn() as stand_in:
+        stand_in.ingest()
+        # Layout change: nothing matches, the previous output is kept
+        stand_in.pages["/sales"] = {"body": "<html><body><div>Redesigned</div></body></html>", "etag": '"sales-v3"'}
+        missing = {"name": "missing", "url": "/missing", "output": "AgentScripts/web_missing.txt",
+                   "extractor": "blocks", "selector": "div"}
+        results = {r["name"]: r for r in stand_in.ingest(extra=[missing])}
+
+        assert results["sales"]["status"] == "error" and "No lines matched" in results["sales"]["error"]
+        assert results["missing"]["status"] == "error" and "404" in results["missing"]["error"]
+        assert results["process"]["status"] == "downloaded"
+        assert "Customer: Hello?" in stand_in.output("AgentScripts/web_sales.txt")
+        assert not os.path.exists(os.path.join(stand_in.root, "out", "AgentScripts", "web_missing.txt"))
+
+def test_pages_are_fetched_concurrently():
+    with StandIn(delay=0.3) as stand_in:
+        started = time.perf_counter()
+        stand_in.ingest(concurrency=4)
+        elapsed = time.perf_counter() - started
+    # Three 0.3s responses one after another would take 0.9s
+    assert elapsed < 0.75, f"took {elapsed:.2f}s"
@@ -0,0 +1,243 @@
+"""
+Per-request tracing for chat turns
+A LangChain callback that records every tool call (name, input size,
+latency, chunks retrieved, context tokens after packing) and LLM call
+(model, latency, tokens) of one agent turn. Traces feed ChatResponse.tools_used, are returned on request,
+and are written as one JSON line per turn to the chat trace log.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from context_packing import CONTEXT_PACKED_EVENT
+from metrics import model_name, token_usage
+
+trace_logger = logging.getLogger("agent_easy.chat_trace")
+# Trace lines are JSON on their own; keep them out of the root logger's format
+trace_logger.propagate = False
+
+# Error messages can carry whole prompts; keep log lines bounded
+MAX_ERROR_CHARS = 200
+
+# Rotated trace files kept next to the current one
+TRACE_LOG_BACKUPS = 3
+
+# Fraction of successful turns written; failed turns are always written
+trace_sample_rate = 1.0
+
+# Background thread doing the actual writes
+_trace_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_trace_listener():
+    """Flush pending trace lines and stop the writer thread"""
+    global _trace_listener
+    if _trace_listener is not None:
+        _trace_listener.stop()
+        for handler in _trace_listener.handlers:
+            handler.close()
+        _trace_listener = None
+
+atexit.register(_stop_trace_listener)
+
+def configure_trace_log(destination: str, sample_rate: float = 1.0, max_bytes: int = 0):
+    """
+    Send chat trace lines to stdout, stderr or a file
+
+    Request threads only put the line on a queue; a background thread writes
+    it, so a slow terminal or disk never adds latency to a turn. A file is
+    rotated once it reaches max_bytes (0 never rotates), keeping
+    TRACE_LOG_BACKUPS old files. sample_rate is the fraction of successful
+    turns logged. An empty destination disables the log; traces are still
+    collected for tools_used and the optional response trace.
+    """
+    global trace_sample_rate, _trace_listener
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"Trace sample rate must be between 0 and 1, got {sample_rate}")
+    for handler in list(trace_logger.handlers):
+        trace_logger.removeHandler(handler)
+    _stop_trace_listener()
+    trace_sample_rate = sample_rate
+
+    if not destination:
+        trace_logger.disabled = True
+        return
+
+    if destination in ("stdout", "stderr"):
+        handler = logging.StreamHandler(getattr(sys, destination))
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            destination, maxBytes=max_bytes, backupCount=TRACE_LOG_BACKUPS, encoding="utf-8"
+        )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    lines: queue.SimpleQueue = queue.SimpleQueue()
+    _trace_listener = logging.handlers.QueueListener(lines, handler)
+    _trace_listener.start()
+    trace_logger.addHandler(logging.handlers.QueueHandler(lines))
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.disabled = False
+
+class ChatTracer(BaseCallbackHandler):
+    """
+    Collects the tool and LLM steps of a single agent turn
+
+    Create one per request and pass it in the invoke config's callbacks.
+    Step times are milliseconds relative to the tracer's creation.
+    Retriever results are counted against the tool that ran the retriever.
+    """
+
+    # Recording is a few dict updates; run in the caller's thread
+    run_inline = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.steps: List[Dict] = []
+        self._open: Dict[UUID, tuple] = {}
+        # Running retriever -> the tool run that called it
+        self._retriever_parents: Dict[UUID, UUID] = {}
+        self._lock = threading.Lock()
+
+    def _elapsed_ms(self, since: Optional[float] = None) -> float:
+        return round((time.perf_counter() - (since if since is not None else self.started)) * 1000, 3)
+
+    def _start(self, run_id: UUID, step: Dict):
+        with self._lock:
+            step["start_ms"] = self._elapsed_ms()
+            step["latency_ms"] = None
+            self.steps.append(step)
+            self._open[run_id] = (step, time.perf_counter())
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Dict]:
+        with self._lock:
+            run = self._open.pop(run_id, None)
+            if run is None:
+                return None
+            step, started = run
+            step["latency_ms"] = self._elapsed_ms(started)
+            if error is not None:
+                step["error"] = str(error)[:MAX_ERROR_CHARS]
+            return step
+
+    # LLM calls
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, {"type": "llm", "name": model_name(serialized, metadata)})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, {"type": "llm", "name": model_name(serialized, metadata)})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        step = self._end(run_id)
+        if step is not None:
+            step["input_tokens"], step["output_tokens"] = token_usage(response)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Tools
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, {"type": "tool", "name": name, "input_chars": len(input_str or ""), "chunks": None})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Retrievers run inside their tool; only their result size and packing
+    # stats are kept
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is not None:
+            with self._lock:
+                self._retriever_parents[run_id] = parent_run_id
+
+    def on_retriever_end(self, documents, *, run_id, parent_run_id=None, **kwargs):
+        with self._lock:
+            self._retriever_parents.pop(run_id, None)
+            run = self._open.get(parent_run_id) if parent_run_id is not None else None
+            if run is not None:
+                step = run[0]
+                step["chunks"] = (step["chunks"] or 0) + len(documents)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._retriever_parents.pop(run_id, None)
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        if name != CONTEXT_PACKED_EVENT:
+            return
+        with self._lock:
+            run = self._open.get(self._retriever_parents.get(run_id))
+            if run is not None:
+                step = run[0]
+                step["context_tokens"] = step.get("context_tokens", 0) + data["packed_tokens"]
+                step["tokens_saved"] = step.get("tokens_saved", 0) + data["tokens_saved"]
+
+    # Results
+
+    def finish(self):
+        """Stop the clock for the whole turn"""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    def tools_used(self) -> List[str]:
+        """Tool names in call order"""
+        with self._lock:
+            return [step["name"] for step in self.steps if step["type"] == "tool"]
+
+    def summary(self) -> Dict:
+        """Total time, LLM/tool time, token totals (including context tokens saved by packing) and every step"""
+        with self._lock:
+            steps = [dict(step) for step in self.steps]
+        end = self.finished if self.finished is not None else time.perf_counter()
+
+        def total(kind: str, field: str):
+            return round(sum(step.get(field) or 0 for step in steps if step["type"] == kind), 3)
+
+        return {
+            "total_ms": round((end - self.started) * 1000, 3),
+            "llm_calls": sum(1 for step in steps if step["type"] == "llm"),
+            "llm_ms": total("llm", "latency_ms"),
+            "tool_ms": total("tool", "latency_ms"),
+            "input_tokens": total("llm", "input_tokens"),
+            "output_tokens": total("llm", "output_tokens"),
+            "context_tokens_saved": total("tool", "tokens_saved"),
+            "steps": steps,
+        }
+
+def log_chat_trace(endpoint: str, session_id: str, message: str, tracer: ChatTracer,
+                   cached: bool = False, error: Optional[str] = None):
+    """Write one JSON line describing a chat turn; the message text itself is not logged"""
+    if trace_logger.disabled or not trace_logger.handlers:
+        return
+    if error is None and trace_sample_rate < 1.0 and random.random() >= trace_sample_rate:
+        return
+    tracer.finish()
+    record = {
+        "event": "chat_turn",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "endpoint": endpoint,
+        "session_id": session_id,
+        "message_chars": len(message),
+        "cached": cached,
+        "tools_used": tracer.tools_used(),
+        **tracer.summary(),
+    }
+    if error is not None:
+        record["error"] = error[:MAX_ERROR_CHARS]
+    trace_logger.info(json.dumps(record, default=str))
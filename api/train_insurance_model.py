@@ -0,0 +1,108 @@
+"""
+Offline training for the health insurance prediction model
+Fits the OLS model from CSV and writes a versioned artifact that the API
+loads at startup instead of retraining
+
+Usage: python train_insurance_model.py [--data CSV] [--output PATH]
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+import statsmodels.api as sm
+from dotenv import load_dotenv
+from sklearn.preprocessing import StandardScaler
+
+from insurance_predictor import (
+    FEATURES, LinearInsurancePredictor, REGION_MAPPING, SEX_MAPPING, SMOKER_MAPPING, file_sha256, save_artifact
+)
+
+DEFAULT_DATA_FILE = 'E:/MLCourse/Datasets/health_insurance.csv'
+DEFAULT_ARTIFACT_PATH = './models/insurance_model'
+
+def fit_insurance_model(data_file: str):
+    """
+    Load the CSV, encode categoricals and fit scaled OLS
+
+    Returns (predictor, model, scaler, training_samples)
+    """
+    # Load the data
+    df = pd.read_csv(data_file)
+    print(f"✓ Loaded {len(df)} insurance records")
+
+    # Convert categorical variables to numeric
+    # Sex: male -> 1, female -> 0
+    df['sex'] = df['sex'].astype(str).str.strip().str.lower()
+    df['sex'] = df['sex'].map(SEX_MAPPING)
+
+    # Smoker: yes -> 1, no -> 0
+    df['smoker'] = df['smoker'].astype(str).str.strip().str.lower()
+    df['smoker'] = df['smoker'].map(SMOKER_MAPPING)
+
+    # Region: southwest -> 0, southeast -> 1, northwest -> 2, northeast -> 3
+    df['region'] = df['region'].astype(str).str.strip().str.lower()
+    df['region'] = df['region'].map(REGION_MAPPING)
+
+    # Check for any NaN values after conversion
+    if df.isnull().any().any():
+        print("⚠️  Warning: Some values could not be converted. Dropping rows with NaN.")
+        df = df.dropna()
+
+    # Prepare features and target
+    X = df[FEATURES].copy()
+    y = df['charges']
+
+    # Scale the features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X.values)
+
+    # Add constant for intercept
+    X_scaled_with_const = sm.add_constant(X_scaled)
+
+    # Train the model
+    model = sm.OLS(y, X_scaled_with_const).fit()
+
+    # Fold scaler and intercept into raw-feature coefficients for fast prediction
+    predictor = LinearInsurancePredictor.from_fitted(model, scaler)
+
+    return predictor, model, scaler, len(df)
+
+def train_and_save(data_file: str, output: str) -> dict:
+    """Fit the model on data_file and write the artifact to output; returns the manifest"""
+    predictor, model, scaler, training_samples = fit_insurance_model(data_file)
+    return save_artifact(
+        predictor,
+        output,
+        model,
+        scaler,
+        r_squared=model.rsquared,
+        training_samples=training_samples,
+        data_sha256=file_sha256(data_file)
+    )
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Train the insurance model and write a model artifact")
+    parser.add_argument('--data', default=os.getenv('HEALTH_INSURANCE_DATA', DEFAULT_DATA_FILE),
+                        help="Training CSV (default: $HEALTH_INSURANCE_DATA)")
+    parser.add_argument('--output', default=os.getenv('INSURANCE_MODEL_ARTIFACT', DEFAULT_ARTIFACT_PATH),
+                        help="Artifact path without extension (default: $INSURANCE_MODEL_ARTIFACT)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"❌ Health insurance data file not found at {args.data}")
+        return 1
+
+    manifest = train_and_save(args.data, args.output)
+
+    print(f"✓ Model artifact written to {args.output}.npz / {args.output}.json")
+    print(f"  - Version: {manifest['version']}")
+    print(f"  - R-squared: {manifest['r_squared']:.3f}")
+    print(f"  - Training samples: {manifest['training_samples']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Web ingestion for the script and process directories
+Fetches the pages listed in a sources config (web_sources.json)
+concurrently over one pooled async HTTP client, extracts lines with each
+page's rules and writes each source to its own file in sample_data/, where
+the incremental indexes pick it up. Responses are cached on disk with
+their ETag and Last-Modified, so unchanged pages are revalidated with a
+conditional GET instead of being downloaded again.
+
+Usage:
+    python web_ingest.py [--config web_sources.json] [--output-dir sample_data]
+                         [--cache-dir .web_cache] [--only NAME ...]
+                         [--concurrency 4] [--timeout 20] [--force]
+
+Config:
+    {"sources": [{"name": "...", "url": "https://...", "output": "AgentScripts/file.txt",
+                  "extractor": "speaker_lines | quotes | blocks", "selector": "CSS selector",
+                  "drop": ["CSS selector", ...], "min_chars": 0}]}
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from bs4 import BeautifulSoup, Tag
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(BASE_DIR, "web_sources.json")
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, "sample_data")
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".web_cache")
+
+USER_AGENT = "AgentEasy-ingest/1.0"
+
+# ============================================================================
+# Extraction Rules
+# ============================================================================
+
+def clean_text(text: str) -> str:
+    """Collapse whitespace, drop spaces left before punctuation by inline tags, strip surrounding quotes"""
+    text = re.sub(r'\s+([.,;:!?])', r'\1', re.sub(r'\s+', ' ', text))
+    return text.strip().strip('"').strip()
+
+def extract_speaker_lines(element: Tag) -> List[str]:
+    """'Speaker: line' for every <br>-separated fragment that starts with a <strong> speaker name"""
+    lines = []
+    for fragment in re.split(r'<br\s*/?>', str(element)):
+        fragment_soup = BeautifulSoup(fragment, "html.parser")
+        strong = fragment_soup.find('strong')
+        if strong is None:
+            continue
+        # The colon may sit inside or after the <strong> tag
+        speaker = clean_text(strong.get_text()).rstrip(':').strip()
+        strong.extract()
+        text = re.sub(r'^:\s*', '', clean_text(fragment_soup.get_text()))
+        if speaker and text:
+            lines.append(f"{speaker}: {text}")
+    return lines
+
+def extract_quotes(element: Tag) -> List[str]:
+    """The element's text split after every closing quote that ends a sentence"""
+    text = clean_text(element.get_text(" "))
+    return [clean_text(part) for part in re.split(r'(?<=[.!?])"\s+', text) if clean_text(part)]
+
+def extract_blocks(element: Tag) -> List[str]:
+    """One line per paragraph and per list (items joined with ' | '), in document order"""
+    lines = []
+    for block in element.find_all(['p', 'ul']):
+        if block.find_parent('ul') is not None:
+            continue  # Part of a list already joined into one line
+        if block.name == 'ul':
+            items = [clean_text(li.get_text(" ")) for li in block.find_all('li')]
+            line = " | ".join(item for item in items if item)
+        else:
+            line = clean_text(block.get_text(" "))
+        if line:
+            lines.append(line)
+    return lines
+
+EXTRACTORS: Dict[str, Callable[[Tag], List[str]]] = {
+    "speaker_lines": extract_speaker_lines,
+    "quotes": extract_quotes,
+    "blocks": extract_blocks,
+}
+
+def extract_lines(html: str, source: Dict) -> List[str]:
+    """Apply a source's rules: select elements, drop unwanted parts, extract and filter lines"""
+    soup = BeautifulSoup(html, "html.parser")
+    extractor = EXTRACTORS[source["extractor"]]
+    min_chars = source.get("min_chars", 0)
+    lines = []
+    for element in soup.select(source["selector"]):
+        for selector in source.get("drop", []):
+            for unwanted in element.select(selector):
+                unwanted.decompose()
+        lines.extend(line for line in extractor(element) if len(line) >= min_chars)
+    return lines
+
+def load_sources(path: str) -> List[Dict]:
+    """Read and validate the sources config"""
+    with open(path, 'r', encoding='utf-8') as f:
+        sources = json.load(f).get("sources", [])
+
+    names = set()
+    for source in sources:
+        missing = [key for key in ("name", "url", "output", "extractor", "selector") if not source.get(key)]
+        if missing:
+            raise ValueError(f"Source {source.get('name', '?')} in {path} is missing {missing}")
+        if source["extractor"] not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor '{source['extractor']}' for {source['name']}. "
+                             f"Must be one of: {list(EXTRACTORS)}")
+        if source["name"] in names:
+            raise ValueError(f"Duplicate source name '{source['name']}' in {path}")
+        names.add(source["name"])
+    return sources
+
+# ============================================================================
+# Page Cache
+# ============================================================================
+
+def write_atomic(path: str, data: bytes):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class PageCache:
+    """Last successful response per URL: body plus its ETag / Last-Modified validators"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.html")
+
+    def load(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                meta["body"] = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("url") == url else None
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        meta_path, body_path = self._paths(url)
+        # Body first: a metadata file always describes a complete body
+        write_atomic(body_path, body)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified,
+                "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        write_atomic(meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+
+# ============================================================================
+# Ingestion
+# ============================================================================
+
+async def fetch_page(client: httpx.AsyncClient, url: str, cache: PageCache, force: bool = False) -> Dict:
+    """
+    GET a page, revalidating the cached copy when there is one
+
+    Returns {"status": "downloaded" | "not_modified", "body", "bytes"};
+    "bytes" is what came over the wire.
+    """
+    cached = None if force else cache.load(url)
+    headers = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = await client.get(url, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return {"status": "not_modified", "body": cached["body"], "bytes": 0}
+    response.raise_for_status()
+
+    body = response.content
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    await asyncio.to_thread(cache.store, url, body, etag, last_modified)
+    return {"status": "downloaded", "body": body, "bytes": len(body)}
+
+def write_output(path: str, lines: List[str]) -> bool:
+    """Write the lines unless the file already holds exactly them; True if it was written"""
+    data = "".join(line + "\n" for line in lines).encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                # Same content: keep the mtime so the indexes see nothing new
+                return False
+    except OSError:
+        pass
+    write_atomic(path, data)
+    return True
+
+def process_page(html: bytes, source: Dict, output_dir: str) -> Dict:
+    lines = extract_lines(html.decode('utf-8', errors='ignore'), source)
+    if not lines:
+        # Most likely the page layout changed; keep the previous output
+        raise ValueError(f"No lines matched selector '{source['selector']}'")
+    written = write_output(os.path.join(output_dir, source["output"]), lines)
+    return {"lines": len(lines), "written": written}
+
+async def ingest_source(client: httpx.AsyncClient, source: Dict, cache: PageCache, output_dir: str,
+                        semaphore: asyncio.Semaphore, force: bool = False) -> Dict:
+    """Fetch, extract and write one source; errors are reported, not raised"""
+    result = {"name": source["name"], "url": source["url"], "output": source["output"]}
+    started = time.perf_counter()
+    try:
+        async with semaphore:
+            page = await fetch_page(client, source["url"], cache, force)
+        result["status"] = page["status"]
+        result["bytes"] = page["bytes"]
+        # Parsing is CPU-bound; keep the event loop free for the other fetches
+        result.update(await asyncio.to_thread(process_page, page["body"], source, output_dir))
+    except (httpx.HTTPError, OSError, ValueError) as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+async def ingest_all(sources: List[Dict], output_dir: str = DEFAULT_OUTPUT_DIR, cache_dir: str = DEFAULT_CACHE_DIR,
+                     concurrency: int = 4, timeout: float = 20.0, force: bool = False,
+                     transport: Optional[httpx.AsyncBaseTransport] = None) -> List[Dict]:
+    """Ingest every source concurrently over one pooled client; results in config order"""
+    cache = PageCache(cache_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": USER_AGENT}, transport=transport) as client:
+        return await asyncio.gather(*(
+            ingest_source(client, source, cache, output_dir, semaphore, force) for source in sources
+        ))
+
+def print_report(results: List[Dict]):
+    print("=" * 78)
+    print(f"{'source':<34} {'status':<13} {'KB':>8} {'lines':>6}  output")
+    for result in results:
+        if result["status"] == "error":
+            print(f"❌ {result['name']:<32} {result['error']}")
+            continue
+        kilobytes = f"{result['bytes'] / 1024:.1f}"
+        note = "written" if result["written"] else "unchanged"
+        print(f"✓ {result['name']:<32} {result['status']:<13} {kilobytes:>8} {result['lines']:>6}  "
+              f"{result['output']} ({note})")
+    print("=" * 78)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fetch web sources into the script and process directories")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="Sources config (JSON)")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="Directory the source outputs are relative to")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Where fetched pages and validators are kept")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="Ingest only these sources")
+    parser.add_argument('--concurrency', type=int, default=4, help="Requests in flight at once")
+    parser.add_argument('--timeout', type=float, default=20.0, help="Per-request timeout in seconds")
+    parser.add_argument('--force', action='store_true', help="Download every page even if the cached copy is current")
+    args = parser.parse_args()
+
+    sources = load_sources(args.config)
+    if args.only:
+        unknown = set(args.only) - {source["name"] for source in sources}
+        if unknown:
+            parser.error(f"Unknown sources: {sorted(unknown)}")
+        sources = [source for source in sources if source["name"] in args.only]
+
+    results = asyncio.run(ingest_all(sources, args.output_dir, args.cache_dir, args.concurrency,
+                                     args.timeout, args.force))
+    print_report(results)
+    return 1 if any(result["status"] == "error" for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())